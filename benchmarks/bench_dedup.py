@@ -0,0 +1,62 @@
+# benchmarks/bench_dedup.py
+# Throughput transform tanpa dedup vs dedup exact/near (dedup.py): persentase note dan
+# teks yang analisisnya dilewati, speedup, dan apakah hasilnya identik dengan tanpa dedup
+# (kolom cluster_id/duplicate diabaikan; mode near memang mengubah baris duplikatnya).
+# Note duplikat umumnya pendek, jadi speedup mengikuti porsi teks, bukan porsi note.
+# Korpus sintetis memakai template_ratio 0.1, mendekati ~10% note identik di data ProtonDB.
+# Jalankan: python -m benchmarks.bench_dedup --reports-file temp_reports.jsonl.gz
+import argparse
+import json
+import time
+from transform import run_transform
+from handoff import iter_game_reports
+from profiling import get_records, reset
+from benchmarks.synthetic import make_payload
+
+def strip_clusters(result):
+    rows = [{k: v for k, v in row.items() if k not in ("cluster_id", "duplicate")} for row in result[0]]
+    return json.dumps([rows] + list(result[1:]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transform with and without note deduplication")
+    parser.add_argument("--reports-file", help="temp_reports.jsonl.gz from a previous extraction")
+    parser.add_argument("--games", type=int, default=500, help="Synthetic game count when no files are given")
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--template-ratio", type=float, default=0.1, help="Synthetic share of template notes")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the fastest one is reported")
+    parser.add_argument("--modes", nargs="+", choices=["none", "exact", "near"], default=["none", "exact", "near"])
+    args = parser.parse_args()
+
+    if args.reports_file:
+        games, all_reports = [], {}
+        for game, reports in iter_game_reports(args.reports_file):
+            games.append(game)
+            all_reports[game["appId"]] = reports
+    else:
+        games, all_reports = make_payload(args.games, args.reports_per_game, template_ratio=args.template_ratio)
+
+    # Run pemanasan: model dan memo token per proses sudah terisi sebelum mode pertama diukur
+    run_transform(games, all_reports, args.workers, dedup="none")
+    baseline = baseline_seconds = None
+    print(f"{'dedup':>6} {'seconds':>9} {'notes/s':>9} {'notes skipped':>14} {'text skipped':>13} {'speedup':>8} {'identical':>10}")
+    for mode in args.modes:
+        elapsed = None
+        for _ in range(max(args.repeat, 1)):
+            reset()
+            start = time.perf_counter()
+            result = run_transform(games, all_reports, args.workers, dedup=mode)
+            seconds = time.perf_counter() - start
+            elapsed = seconds if elapsed is None else min(elapsed, seconds)
+        records = get_records()
+        stats = {key: records.get(f"transform.dedup.{key}", {}).get("items", 0)
+                 for key in ("notes", "chars", "skipped", "skipped_chars")}
+        encoded = strip_clusters(result)
+        if baseline is None:
+            baseline, baseline_seconds = encoded, elapsed
+        print(f"{mode:>6} {elapsed:>9.2f} {len(result[0]) / elapsed:>9.1f} "
+              f"{stats['skipped'] / max(stats['notes'], 1) * 100:>13.1f}% {stats['skipped_chars'] / max(stats['chars'], 1) * 100:>12.1f}% "
+              f"{baseline_seconds / elapsed:>7.2f}x {str(encoded == baseline):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_distributed.py
+# Mode terdistribusi di satu mesin: queue -> beberapa proses worker -> merge, dibanding
+# extract + transform pipeline di satu host. Satu proses "crash" mengklaim shard lalu
+# mati tanpa menyelesaikannya, sehingga shard tersebut harus diambil alih setelah lease
+# habis. Exit status 1 jika hasil merge (semua kolom notes, termasuk cluster_id/duplicate
+# yang digabung lintas shard saat merge, dan tabel frekuensi) tidak identik dengan satu host.
+# Jalankan: python -m benchmarks.bench_distributed --games 400 --latency 0.05 --workers 4
+#           python -m benchmarks.bench_distributed --dedup near --near-ratio 0.2
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import extract
+from pipeline import extract_transform
+from distributed import plan_jobs, run_worker, merge_partials, queue_status
+from jobqueue import open_queue, claim_job
+from handoff import iter_records
+from profiling import reset
+from benchmarks.stub_server import start_stub_server
+from benchmarks.synthetic import make_payload
+
+def in_dir(path, fn):
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        return fn()
+    finally:
+        os.chdir(cwd)
+        reset()
+
+def worker_main(base_url, workdir, worker_id, lease, fetch_workers):
+    # Proses worker terpisah; output-nya dibuang supaya tabel hasil tetap terbaca
+    extract.BASE_URL = base_url
+    os.chdir(workdir)
+    sys.stdout = open(os.devnull, "w")
+    run_worker(worker_id=worker_id, fetch_workers=fetch_workers, lease_seconds=lease, poll_interval=0.2)
+
+def crash_main(workdir, lease):
+    # Klaim satu shard lalu mati tanpa complete/fail, seperti worker yang crash
+    os.chdir(workdir)
+    claim_job(open_queue(), "crashed-worker", lease)
+    os._exit(1)
+
+def result_data(result):
+    notes_file, *freqs = result
+    return json.dumps([list(iter_records(notes_file, "notes"))] + freqs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several queue workers on one machine and check the merged output")
+    parser.add_argument("--games", type=int, default=400)
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency in seconds")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Concurrent requests per worker")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes claiming shards")
+    parser.add_argument("--shard-size", type=int, default=25)
+    parser.add_argument("--lease", type=float, default=2.0, help="Lease seconds (short, so the crashed shard is retried quickly)")
+    parser.add_argument("--dedup", choices=["none", "exact", "near"], default="exact")
+    parser.add_argument("--near-ratio", type=float, default=0.0, help="Share of notes that are near duplicates of earlier notes")
+    args = parser.parse_args()
+
+    games, reports = make_payload(args.games, args.reports_per_game, near_ratio=args.near_ratio)
+    server, base_url = start_stub_server(games, reports, args.latency)
+    extract.BASE_URL = base_url
+    try:
+        single_dir = tempfile.mkdtemp(prefix="protondb_bench_single_")
+        start = time.perf_counter()
+        single = in_dir(single_dir, lambda: result_data(extract_transform(fetch_workers=args.fetch_workers, dedup=args.dedup)))
+        single_seconds = time.perf_counter() - start
+
+        workdir = tempfile.mkdtemp(prefix="protondb_bench_distributed_")
+        start = time.perf_counter()
+        shards = in_dir(workdir, lambda: plan_jobs(shard_size=args.shard_size, dedup=args.dedup))
+        crashed = multiprocessing.Process(target=crash_main, args=(workdir, args.lease))
+        crashed.start()
+        crashed.join()
+        processes = [multiprocessing.Process(target=worker_main, args=(base_url, workdir, f"worker-{i}", args.lease, args.fetch_workers))
+                     for i in range(args.workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        merged = in_dir(workdir, lambda: result_data(merge_partials()))
+        distributed_seconds = time.perf_counter() - start
+        jobs = in_dir(workdir, lambda: queue_status()[1])
+    finally:
+        server.shutdown()
+
+    retried = [job["job_id"] for job in jobs if job["attempts"] > 1]
+    identical = merged == single
+    print(f"\n{'mode':>22} {'seconds':>9}")
+    print(f"{'single host':>22} {single_seconds:>9.2f}")
+    print(f"{f'{args.workers} workers':>22} {distributed_seconds:>9.2f}")
+    print(f"{shards} shards, retried after lease expiry: {retried or 'none'}, identical to single host: {identical}")
+    print(f"Worker exit codes: {[process.exitcode for process in processes]}")
+    if not identical or any(process.exitcode for process in processes):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
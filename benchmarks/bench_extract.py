@@ -0,0 +1,34 @@
+# benchmarks/bench_extract.py
+# Throughput extraction (reports/detik) pada beberapa level concurrency
+# Jalankan: python -m benchmarks.bench_extract
+import argparse
+import time
+import extract
+from benchmarks.stub_server import start_stub_server
+from benchmarks.synthetic import make_payload
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent report extraction")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated server latency in seconds")
+    parser.add_argument("--fail-every", type=int, default=0, help="Return 503 on every Nth request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    games, reports = make_payload(args.games, args.reports_per_game)
+    server, base_url = start_stub_server(games, reports, args.latency, args.fail_every)
+    extract.BASE_URL = base_url
+    try:
+        print(f"{'workers':>8} {'seconds':>9} {'reports/s':>11}")
+        for workers in args.concurrency:
+            start = time.perf_counter()
+            all_reports = extract.extract_reports_concurrent(games, workers, max_retries=3)
+            elapsed = time.perf_counter() - start
+            total = sum(len(r) for r in all_reports.values())
+            print(f"{workers:>8} {elapsed:>9.2f} {total / elapsed:>11.1f}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
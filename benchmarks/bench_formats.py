@@ -0,0 +1,52 @@
+# benchmarks/bench_formats.py
+# Ukuran file serta waktu tulis/baca untuk JSON, CSV, Parquet dan Arrow IPC
+# Jalankan: python -m benchmarks.bench_formats --rows 100000
+import argparse
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+from load import write_table, read_table
+from benchmarks.bench_sqlite import make_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark output formats for notes_data")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    df = pd.DataFrame(rows)
+    workdir = tempfile.mkdtemp()
+    print(f"{'format':>8} {'size MB':>9} {'write s':>9} {'read s':>9}")
+
+    path = os.path.join(workdir, "notes.json")
+    start = time.perf_counter()
+    with open(path, 'w') as nf:
+        json.dump(rows, nf)
+    write = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(path, 'r') as nf:
+        pd.DataFrame(json.load(nf))
+    read = time.perf_counter() - start
+    print(f"{'json':>8} {os.path.getsize(path) / 1e6:>9.1f} {write:>9.2f} {read:>9.2f}")
+
+    for fmt in ("csv", "parquet", "arrow"):
+        path = os.path.join(workdir, f"notes.{fmt}")
+        start = time.perf_counter()
+        write_table(df, path, fmt)
+        write = time.perf_counter() - start
+        start = time.perf_counter()
+        read_table(path)
+        read = time.perf_counter() - start
+        print(f"{fmt:>8} {os.path.getsize(path) / 1e6:>9.1f} {write:>9.2f} {read:>9.2f}")
+
+    # Dashboard biasanya hanya butuh beberapa kolom; format kolumnar membaca kolom itu saja
+    columns = ["sentiment", "topic_category", "compound_score", "word_count"]
+    for fmt in ("csv", "parquet", "arrow"):
+        start = time.perf_counter()
+        read_table(os.path.join(workdir, f"notes.{fmt}"), columns)
+        print(f"{fmt:>8} read {len(columns)} columns: {time.perf_counter() - start:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_handoff.py
+# Waktu tulis/baca, ukuran file dan peak memori (tracemalloc) file serah-terima antar
+# stage: temp_*.json lama (json.dump/json.load) vs handoff.py (JSON Lines gzip).
+# "stream" = membaca semua record lewat iterator tanpa menyimpannya (seperti transform
+# yang membaca report per game).
+# Jalankan: python -m benchmarks.bench_handoff --rows 100000
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from handoff import write_records, iter_records, iter_game_reports
+from benchmarks.bench_sqlite import make_rows
+from benchmarks.synthetic import make_payload
+
+def measure(fn):
+    # Waktu diukur tanpa tracemalloc (overhead-nya besar), peak memori di run kedua
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+def json_write(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+def json_read(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def drain(records):
+    count = 0
+    for _ in records:
+        count += 1
+    return count
+
+def report_records(games, all_reports):
+    # Bentuk record yang ditulis extract(): satu record per game
+    for game in games:
+        yield {"app_id": game["appId"], "title": game["title"], "reports": all_reports[game["appId"]]}
+
+def report(label, fmt, path, write, read, stream=None):
+    stream_text = f"{stream[0]:>9.2f} {stream[1]:>10.1f}" if stream else f"{'-':>9} {'-':>10}"
+    print(f"{label:>8} {fmt:>8} {os.path.getsize(path) / 1e6:>9.1f} {write[0]:>9.2f} {write[1]:>10.1f} "
+          f"{read[0]:>9.2f} {read[1]:>10.1f} {stream_text}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stage handoff files: JSON vs gzip JSON Lines")
+    parser.add_argument("--rows", type=int, default=100000, help="Note rows (reports: rows / 10 games x 10 reports)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    notes = make_rows(args.rows)
+    games, all_reports = make_payload(args.rows // 10, 10)
+    print(f"{'data':>8} {'format':>8} {'size MB':>9} {'write s':>9} {'write MiB':>10} "
+          f"{'read s':>9} {'read MiB':>10} {'stream s':>9} {'stream MiB':>10}")
+
+    # Notes: list baris note (temp_notes.json vs temp_notes.jsonl.gz)
+    path = os.path.join(workdir, "temp_notes.json")
+    _, *write = measure(lambda: json_write(path, notes))
+    loaded, *read = measure(lambda: json_read(path))
+    assert loaded == notes
+    report("notes", "json", path, write, read)
+
+    path = os.path.join(workdir, "temp_notes.jsonl.gz")
+    _, *write = measure(lambda: write_records(path, "notes", notes))
+    loaded, *read = measure(lambda: list(iter_records(path, "notes")))
+    assert loaded == notes
+    count, *stream = measure(lambda: drain(iter_records(path, "notes")))
+    report("notes", "handoff", path, write, read, stream)
+
+    # Reports: dict appId -> reports (temp_reports.json) vs satu record per game
+    del loaded
+    path = os.path.join(workdir, "temp_reports.json")
+    _, *write = measure(lambda: json_write(path, all_reports))
+    _, *read = measure(lambda: json_read(path))
+    report("reports", "json", path, write, read)
+
+    path = os.path.join(workdir, "temp_reports.jsonl.gz")
+    _, *write = measure(lambda: write_records(path, "reports", report_records(games, all_reports)))
+    _, *read = measure(lambda: dict((game["appId"], reports) for game, reports in iter_game_reports(path)))
+    count, *stream = measure(lambda: drain(iter_game_reports(path)))
+    assert count == len(games)
+    report("reports", "handoff", path, write, read, stream)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_memory.py
+# Peak memori (tracemalloc) transform batch vs streaming pada beberapa ukuran korpus.
+# Streaming diukur per mode dedup. Kolom "dedup MiB" adalah memori state Deduplicator
+# (index cluster, baris kanonik yang disimpan) di akhir run: state ini tidak dibatasi
+# batch size, tetapi oleh dedup.MAX_CLUSTERS dan dedup.MAX_ROWS.
+# Jalankan: python -m benchmarks.bench_memory
+#           python -m benchmarks.bench_memory --games 1600 --dedup none near --near-ratio 0.2
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+import transform
+from dedup import DEDUP_MODES
+from transform import run_transform, transform_stream
+from benchmarks.synthetic import iter_payload, make_payload
+
+def measure(fn):
+    # Return (detik, peak MiB, MiB yang dilepas saat Deduplicator run dibuang)
+    deduplicators = []
+    new_deduplicator = transform.new_deduplicator
+
+    def capture(*args, **kwargs):
+        deduplicator = new_deduplicator(*args, **kwargs)
+        deduplicators.append(deduplicator)
+        return deduplicator
+
+    transform.new_deduplicator = capture
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        deduplicators.clear()
+        gc.collect()
+        dedup_bytes = current - tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        transform.new_deduplicator = new_deduplicator
+    return elapsed, peak / (1024 * 1024), dedup_bytes / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of batch vs streaming transform")
+    parser.add_argument("--games", type=int, nargs="+", default=[100, 400, 1600])
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dedup", nargs="+", choices=DEDUP_MODES, default=DEDUP_MODES,
+                        help="Dedup modes measured in streaming mode (batch mode uses exact)")
+    parser.add_argument("--near-ratio", type=float, default=0.0, help="Share of notes that are near duplicates of earlier notes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        notes_file = os.path.join(tmp_dir, "notes.jsonl.gz")
+        print(f"{'notes':>8} {'mode':>10} {'dedup':>6} {'seconds':>9} {'peak MiB':>9} {'dedup MiB':>10}")
+        for game_count in args.games:
+            notes = game_count * args.reports_per_game
+
+            def batch():
+                games, all_reports = make_payload(game_count, args.reports_per_game, near_ratio=args.near_ratio)
+                run_transform(games, all_reports, shard_size=args.batch_size)
+
+            def streaming(dedup):
+                return lambda: transform_stream(iter_payload(game_count, args.reports_per_game, near_ratio=args.near_ratio),
+                                                notes_file, batch_size=args.batch_size, dedup=dedup)
+
+            runs = [("batch", "exact", batch)] + [("streaming", dedup, streaming(dedup))
+                                                  for dedup in DEDUP_MODES if dedup in args.dedup]
+            for mode, dedup, fn in runs:
+                elapsed, peak, dedup_mib = measure(fn)
+                print(f"{notes:>8} {mode:>10} {dedup:>6} {elapsed:>9.2f} {peak:>9.1f} {dedup_mib:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_ngrams.py
+# Waktu dan peak memori (tracemalloc) penghitungan bigram/trigram: Counter of tuple
+# (cara lama) vs key integer di ngrams.py, plus pengecekan hasilnya identik
+# Jalankan: python -m benchmarks.bench_ngrams --notes 100000
+import argparse
+import time
+import tracemalloc
+from collections import Counter
+from ngrams import NgramCounts, count_shard_ngrams
+from benchmarks.synthetic import iter_payload
+
+def token_lists(note_count, seed):
+    # Tokenisasi sederhana (lowercase + split) supaya benchmark tidak butuh data NLTK
+    tokens = []
+    games = iter_payload(note_count // 10 + 1, 10, seed)
+    for game, reports in games:
+        for report in reports:
+            if len(tokens) >= note_count:
+                return tokens
+            tokens.append([word.strip(".,").lower() for word in (report["notes"] or "").split()])
+    return tokens
+
+def count_tuples(shards):
+    bigrams, trigrams = Counter(), Counter()
+    for shard in shards:
+        shard_bigrams, shard_trigrams = Counter(), Counter()
+        for tokens in shard:
+            shard_bigrams.update(zip(tokens, tokens[1:]))
+            shard_trigrams.update(zip(tokens, tokens[1:], tokens[2:]))
+        bigrams.update(shard_bigrams)
+        trigrams.update(shard_trigrams)
+    return bigrams, trigrams
+
+def count_packed(shards):
+    counts = NgramCounts()
+    for shard in shards:
+        counts.add(count_shard_ngrams(shard))
+    counts.compact()
+    return counts
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained / (1024 * 1024), peak / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tuple Counter vs integer-packed n-gram counting")
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--shard-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top-k", type=int, default=20, help="Top-k size for the query timing")
+    args = parser.parse_args()
+
+    tokens = token_lists(args.notes, args.seed)
+    shards = [tokens[i:i + args.shard_size] for i in range(0, len(tokens), args.shard_size)]
+    print(f"{len(tokens)} notes, {sum(map(len, tokens))} tokens, {len(shards)} shards")
+
+    # retained = memori yang masih dipegang hasil hitungan, peak = puncak selama menghitung
+    (bigrams, trigrams), *tuple_stats = measure(lambda: count_tuples(shards))
+    packed, *packed_stats = measure(lambda: count_packed(shards))
+    print(f"{'engine':>8} {'seconds':>9} {'retained MiB':>13} {'peak MiB':>9}")
+    for engine, (seconds, retained, peak) in [("tuple", tuple_stats), ("packed", packed_stats)]:
+        print(f"{engine:>8} {seconds:>9.2f} {retained:>13.1f} {peak:>9.1f}")
+
+    start = time.perf_counter()
+    tuple_top = bigrams.most_common(args.top_k)
+    tuple_query = time.perf_counter() - start
+    start = time.perf_counter()
+    packed_top = packed.most_common(2, args.top_k)
+    packed_query = time.perf_counter() - start
+    print(f"top-{args.top_k} bigrams: tuple {tuple_query * 1000:.1f} ms, packed {packed_query * 1000:.1f} ms")
+
+    identical = (packed.most_common(2) == [(" ".join(k), v) for k, v in bigrams.most_common()] and
+                 packed.most_common(3) == [(" ".join(k), v) for k, v in trigrams.most_common()])
+    print(f"{len(bigrams)} bigrams, {len(trigrams)} trigrams; identical ranking: {identical}")
+    assert [(" ".join(k), v) for k, v in tuple_top] == packed_top
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_pipeline.py
+# Wall time extract -> transform: berurutan, streaming (tanpa queue) dan pipeline
+# (producer thread + queue terbatas), dibanding max/jumlah waktu tiap stage sendiri
+# Jalankan: python -m benchmarks.bench_pipeline --games 400 --latency 0.05 --workers 2
+import argparse
+import os
+import tempfile
+import time
+import extract
+from transform import run_transform, transform_stream
+from pipeline import extract_transform
+from profiling import reset
+from benchmarks.stub_server import start_stub_server
+from benchmarks.synthetic import make_payload
+
+def timed_run(fn):
+    # Setiap mode berjalan di direktori kosong supaya checkpoint/temp file tidak terpakai ulang
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="protondb_bench_pipeline_"))
+    try:
+        start = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - start, result
+    finally:
+        os.chdir(cwd)
+        reset()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs pipelined extract + transform")
+    parser.add_argument("--games", type=int, default=400)
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency in seconds")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="Transform worker processes")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--queue-size", type=int, default=64)
+    args = parser.parse_args()
+
+    games, reports = make_payload(args.games, args.reports_per_game)
+    server, base_url = start_stub_server(games, reports, args.latency)
+    extract.BASE_URL = base_url
+    try:
+        extract_seconds, (fetched_games, all_reports) = timed_run(lambda: extract.extract(workers=args.fetch_workers))
+        transform_seconds, _ = timed_run(lambda: run_transform(fetched_games, all_reports, args.workers, args.batch_size))
+
+        def streaming():
+            return transform_stream(extract.iter_extract(extract.load_games(), args.fetch_workers),
+                                    workers=args.workers, batch_size=args.batch_size)
+
+        def pipelined():
+            return extract_transform(fetch_workers=args.fetch_workers, workers=args.workers,
+                                     batch_size=args.batch_size, queue_size=args.queue_size)
+
+        streaming_seconds, _ = timed_run(streaming)
+        pipelined_seconds, _ = timed_run(pipelined)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'mode':>22} {'seconds':>9}")
+    print(f"{'extract only':>22} {extract_seconds:>9.2f}")
+    print(f"{'transform only':>22} {transform_seconds:>9.2f}")
+    print(f"{'sequential (sum)':>22} {extract_seconds + transform_seconds:>9.2f}")
+    print(f"{'ideal (max)':>22} {max(extract_seconds, transform_seconds):>9.2f}")
+    print(f"{'streaming':>22} {streaming_seconds:>9.2f}")
+    print(f"{'pipelined':>22} {pipelined_seconds:>9.2f}")
+
+if __name__ == "__main__":
+    main()
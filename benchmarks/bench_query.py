@@ -0,0 +1,86 @@
+# benchmarks/bench_query.py
+# Latensi query.NotesQuery (p50/p95) tanpa cache vs dengan LRU cache, dibanding
+# cara lama: memuat tabel notes ke DataFrame pandas lalu memfilter
+# Jalankan: python -m benchmarks.bench_query --rows 100000
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import pandas as pd
+from load import load_sqlite
+from query import NotesQuery
+from benchmarks.bench_sqlite import make_rows
+
+SEARCH_TERMS = ["black screen", "crash", "proton ge", "no sound", "controller", "works out of the box",
+                "shader compilation", "anticheat", "fps", "multiplayer"]
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+def workload(rng, count, app_count):
+    # Campuran query yang mirip pemakaian dashboard; pengulangan membuat sebagian "hot"
+    queries = []
+    for i in range(count):
+        kind = rng.choice(["search", "filtered_search", "notes", "ngrams", "game"])
+        if kind == "search":
+            queries.append(("search", lambda q, t=rng.choice(SEARCH_TERMS): q.search(t)))
+        elif kind == "filtered_search":
+            queries.append(("filtered_search", lambda q, t=rng.choice(SEARCH_TERMS), s=rng.choice(["positive", "negative"]):
+                            q.search(t, sentiment=s, topic="bugs")))
+        elif kind == "notes":
+            queries.append(("notes", lambda q, a=rng.randrange(min(app_count, 50)): q.notes(app_id=a, sentiment="negative")))
+        elif kind == "ngrams":
+            queries.append(("ngrams", lambda q, t=rng.choice(["black", "screen", "crash", "sound"]): q.top_ngrams(2, 10, t)))
+        else:
+            queries.append(("game", lambda q, a=rng.randrange(min(app_count, 50)): q.game(a)))
+    return queries
+
+def run(query, queries):
+    timings = {}
+    for kind, fn in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.setdefault(kind, []).append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query latency with and without the LRU cache")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--pandas-queries", type=int, default=5, help="Queries for the DataFrame baseline (slow)")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "protondb.db")
+    rows = make_rows(args.rows)
+    start = time.perf_counter()
+    load_sqlite(rows, db_path)
+    print(f"Loaded {len(rows)} notes in {time.perf_counter() - start:.2f}s")
+    app_count = len({row["app_id"] for row in rows})
+
+    queries = workload(random.Random(0), args.queries, app_count)
+    cold = run(NotesQuery(db_path, cache_size=0), queries)
+    cached_query = NotesQuery(db_path)
+    warm = run(cached_query, queries)
+
+    print(f"\n{'query':>16} {'p50 ms':>9} {'p95 ms':>9} {'cached p50':>11} {'cached p95':>11}")
+    for kind in sorted(cold):
+        cold_p50, cold_p95 = percentiles(cold[kind])
+        warm_p50, warm_p95 = percentiles(warm[kind])
+        print(f"{kind:>16} {cold_p50:>9.3f} {cold_p95:>9.3f} {warm_p50:>11.3f} {warm_p95:>11.3f}")
+    print(f"Cache: {cached_query.cache_info()}")
+
+    # Cara lama: setiap tool memuat notes ke pandas lalu memfilter di memori
+    samples = []
+    for term in SEARCH_TERMS[:args.pandas_queries]:
+        start = time.perf_counter()
+        with sqlite3.connect(db_path) as conn:
+            df = pd.read_sql("SELECT * FROM notes", conn)
+        df[df["note_text"].str.contains(term, case=False) & (df["sentiment"] == "negative")].head(20)
+        samples.append(time.perf_counter() - start)
+    print(f"pandas reload + filter: p50 {percentiles(samples)[0]:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_sketch.py
+# Akurasi vs memori hitungan approximate (ngrams.SpaceSaving, --ngram-memory) dibanding
+# hitungan exact (Counter kata + NgramCounts): waktu, peak memori (tracemalloc), recall
+# top-k, error relatif terbesar di top-k, dan apakah batas error yang dilaporkan berlaku.
+# Korpus sintetis memilih kata secara acak (distribusi datar, kasus terburuk untuk
+# heavy hitter); --reports-file memakai report ProtonDB dari extract.
+# Jalankan: python -m benchmarks.bench_sketch --reports-file temp_reports.jsonl.gz --memory 0.25 1 4
+import argparse
+from collections import Counter
+from ngrams import NgramCounts, SpaceSaving, count_shard_ngrams, counter_counts, sketch_capacity
+from handoff import iter_game_reports
+from benchmarks.bench_ngrams import token_lists, measure
+
+def report_tokens(reports_file):
+    # Tokenisasi sederhana seperti bench_ngrams, tanpa data NLTK
+    tokens = []
+    for game, reports in iter_game_reports(reports_file):
+        for report in reports:
+            if report.get("notes"):
+                tokens.append([word.strip(".,!?()").lower() for word in report["notes"].split()])
+    return tokens
+
+def count_exact(shards):
+    words = Counter()
+    ngrams = NgramCounts()
+    for shard in shards:
+        words.update(token for tokens in shard for token in tokens)
+        ngrams.add(count_shard_ngrams(shard))
+    ngrams.compact()
+    return words, ngrams
+
+def count_sketch(shards, memory_mb):
+    sketch = SpaceSaving(sketch_capacity(memory_mb))
+    for shard in shards:
+        sketch.add(counter_counts(Counter(token for tokens in shard for token in tokens)))
+        sketch.add(count_shard_ngrams(shard))
+    sketch.compact()
+    return sketch
+
+def accuracy(sketch, n, exact, top_k):
+    # exact: list (n-gram, frekuensi) terurut; recall = porsi top-k exact yang ada di top-k sketch
+    true = dict(exact)
+    rows = sketch._rank(n)
+    estimated = sketch._decode(n, rows)
+    errors = sketch.errors[n][rows].tolist()
+    listed = {gram for gram, count in estimated}
+    bounds_hold = (all(count - error <= true.get(gram, 0) <= count for (gram, count), error in zip(estimated, errors)) and
+                   all(count <= sketch.floor[n] for gram, count in exact if gram not in listed))
+    top = estimated[:top_k]
+    recall = len({gram for gram, count in exact[:top_k]} & {gram for gram, count in top}) / max(min(top_k, len(exact)), 1)
+    max_rel_error = max(((count - true.get(gram, 0)) / count for gram, count in top), default=0.0)
+    return recall, max_rel_error, sketch.error_bound(n, top_k)["max_error"], bounds_hold
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark approximate (Space-Saving) vs exact word/n-gram counting")
+    parser.add_argument("--reports-file", help="temp_reports.jsonl.gz from a previous extraction")
+    parser.add_argument("--notes", type=int, default=100000, help="Synthetic note count when no file is given")
+    parser.add_argument("--shard-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", type=float, nargs="+", default=[0.25, 1, 4, 16], help="Sketch budgets in MiB")
+    parser.add_argument("--top-k", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = report_tokens(args.reports_file) if args.reports_file else token_lists(args.notes, args.seed)
+    shards = [tokens[i:i + args.shard_size] for i in range(0, len(tokens), args.shard_size)]
+    (words, ngrams), *exact_stats = measure(lambda: count_exact(shards))
+    exact = {1: words.most_common(), 2: ngrams.most_common(2), 3: ngrams.most_common(3)}
+    print(f"{len(tokens)} notes, {sum(map(len, tokens))} tokens; distinct words {len(exact[1])}, "
+          f"bigrams {len(exact[2])}, trigrams {len(exact[3])}")
+    print(f"exact: {exact_stats[0]:.2f} s, retained {exact_stats[1]:.1f} MiB, peak {exact_stats[2]:.1f} MiB")
+
+    # recall/error per tabel: kata, bigram, trigram (top-k)
+    print(f"\n{'MiB':>6} {'counters':>9} {'seconds':>8} {'peak MiB':>9} "
+          f"{'recall@k w/b/t':>16} {'max rel err w/b/t':>19} {'bound t':>8} {'bounds hold':>12}")
+    for memory_mb in args.memory:
+        sketch, seconds, retained, peak = measure(lambda: count_sketch(shards, memory_mb))
+        results = [accuracy(sketch, n, exact[n], args.top_k) for n in (1, 2, 3)]
+        recalls = "/".join(f"{recall:.2f}" for recall, *rest in results)
+        errors = "/".join(f"{error:.3f}" for recall, error, *rest in results)
+        print(f"{memory_mb:>6g} {sketch.capacity:>9} {seconds:>8.2f} {peak:>9.1f} {recalls:>16} {errors:>19} "
+              f"{results[2][2]:>8} {str(all(result[3] for result in results)):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_sqlite.py
+# Membandingkan DataFrame.to_sql (cara lama) dengan load_sqlite (bulk upsert), dan
+# update tabel frekuensi inkremental vs hitung ulang penuh saat sebagian note berubah
+# Jalankan: python -m benchmarks.bench_sqlite --rows 100000 250000
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import pandas as pd
+from load import load_sqlite, NOTES_INDEXES
+from benchmarks.synthetic import iter_payload
+
+def make_rows(count, seed=0):
+    # Baris notes dengan bentuk yang sama seperti output transform (nilai analisis acak)
+    rng = random.Random(seed)
+    rows = []
+    for game, reports in iter_payload(count // 10 + 1, 10, seed, empty_ratio=0):
+        for report in reports:
+            tokens = report["notes"].lower().replace(".", "").split()
+            rows.append({
+                "report_id": report["id"], "app_id": report["appId"], "title": game["title"],
+                "timestamp": report["timestamp"], "rating": report["rating"], "proton_version": report["protonVersion"],
+                "os": report["os"], "gpu_driver": report["gpuDriver"], "note_text": report["notes"],
+                "word_count": len(tokens), "char_count": len(report["notes"]), "sentence_count": 1,
+                "avg_word_length": sum(map(len, tokens)) / len(tokens), "lexical_diversity": len(set(tokens)) / len(tokens),
+                "tokens": " ".join(tokens), "stemmed_tokens": " ".join(tokens), "lemmatized_tokens": " ".join(tokens),
+                "noun_count": rng.randint(0, 10), "verb_count": rng.randint(0, 10), "adjective_count": rng.randint(0, 5),
+                "adverb_count": rng.randint(0, 5), "entities": "[]",
+                "sentiment": rng.choice(["positive", "neutral", "negative"]), "compound_score": rng.uniform(-1, 1),
+                "positive_score": rng.random(), "negative_score": rng.random(), "neutral_score": rng.random(),
+                "topic_category": rng.choice(["performance", "bugs", "compatibility", "other"])
+            })
+            if len(rows) == count:
+                return rows
+    return rows
+
+def timed_call(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite loading strategies")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000])
+    parser.add_argument("--changed", type=float, default=0.01, help="Share of notes edited before the delta load")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    print(f"{'rows':>8} {'to_sql s':>9} {'+index s':>9} {'bulk s':>9} {'upsert s':>9} {'delta s':>9} {'rebuild s':>9}")
+    for count in args.rows:
+        rows = make_rows(count)
+        freq = [{"word": f"w{i}", "frequency": i} for i in range(5000)]
+        old_db = os.path.join(workdir, f"old_{count}.db")
+        new_db = os.path.join(workdir, f"new_{count}.db")
+
+        def old_path(with_indexes=False):
+            conn = sqlite3.connect(old_db)
+            pd.DataFrame(rows).to_sql("notes", conn, if_exists="replace", index=False)
+            pd.DataFrame(freq).to_sql("word_freq", conn, if_exists="replace", index=False)
+            if with_indexes:
+                # Index yang sama dengan load_sqlite, supaya perbandingannya setara
+                for column, index in NOTES_INDEXES.items():
+                    conn.execute(f"CREATE INDEX {index} ON notes ({column})")
+            conn.commit()
+            conn.close()
+
+        old = timed_call(old_path)
+        old_indexed = timed_call(lambda: old_path(with_indexes=True))
+        bulk = timed_call(lambda: load_sqlite(rows, new_db))
+        # Run kedua: semua report_id sudah ada, sehingga setiap baris menjadi update
+        upsert = timed_call(lambda: load_sqlite(rows, new_db))
+        # Run ketiga: sebagian note diedit, tabel frekuensi diperbarui dari delta saja
+        # atau dihitung ulang dari seluruh tabel notes (rebuild_freq)
+        rng = random.Random(1)
+        edited = [dict(row) for row in rows]
+        for row in rng.sample(edited, int(len(edited) * args.changed)):
+            row["tokens"] += " edited"
+        delta = timed_call(lambda: load_sqlite(edited, new_db))
+        rebuild = timed_call(lambda: load_sqlite(edited, new_db, rebuild_freq=True))
+        print(f"{count:>8} {old:>9.2f} {old_indexed:>9.2f} {bulk:>9.2f} {upsert:>9.2f} {delta:>9.2f} {rebuild:>9.2f}")
+
+if __name__ == "__main__":
+    main()
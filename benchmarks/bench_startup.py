@@ -0,0 +1,65 @@
+# benchmarks/bench_startup.py
+# Waktu import modul (proses baru, tanpa cache modul) dan waktu load() total
+# dengan visualisasi dimatikan atau dirender dengan beberapa jumlah proses
+# Jalankan: python -m benchmarks.bench_startup --notes-file temp_notes.jsonl.gz --plot-workers 1 4
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from handoff import FREQ_FILES, freq_path, iter_records
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_seconds(module, repeat):
+    # Minimum dari beberapa proses baru supaya noise disk/CPU tidak ikut terukur
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, env=dict(os.environ, MPLBACKEND="Agg"))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def load_freq(notes_file, name):
+    path = freq_path(name, os.path.dirname(notes_file))
+    if not os.path.exists(path):
+        return []
+    return list(iter_records(path, name))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import time and load() wall time")
+    parser.add_argument("--modules", nargs="+", default=["main", "load", "visualize"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--notes-file", help="temp_notes.jsonl.gz to load; temp_*_freq.jsonl.gz are read from the same directory")
+    parser.add_argument("--plot-workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    print(f"{'module':>12} {'import s':>9}")
+    for module in args.modules:
+        print(f"{module:>12} {import_seconds(module, args.repeat):>9.2f}")
+
+    if not args.notes_file:
+        return
+    notes_file = os.path.abspath(args.notes_file)
+    notes_data = list(iter_records(notes_file, "notes"))
+    freq = [load_freq(notes_file, name) for name in FREQ_FILES]
+
+    from load import load
+    cwd = os.getcwd()
+    print(f"\n{'notes':>8} {'charts':>12} {'load s':>9}")
+    for label, charts, workers in [("skipped", False, None)] + [(f"{w} proc", True, w) for w in args.plot_workers]:
+        workdir = tempfile.mkdtemp(prefix="protondb_bench_startup_")
+        os.chdir(workdir)
+        try:
+            start = time.perf_counter()
+            load(notes_data, *freq, db_path=os.path.join(workdir, "protondb.db"), visualize_charts=charts, plot_workers=workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+        print(f"{len(notes_data):>8} {label:>12} {elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
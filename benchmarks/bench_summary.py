@@ -0,0 +1,64 @@
+# benchmarks/bench_summary.py
+# Waktu dan peak memori (tracemalloc) menyiapkan angka laporan analysis + input chart:
+# cara lama berbasis DataFrame (value_counts/groupby dua kali, join token per sentimen
+# untuk laporan dan word cloud) vs satu kali lewat baris note di summary.py
+# Jalankan: python -m benchmarks.bench_summary --rows 10000 100000
+import argparse
+import time
+import tracemalloc
+from collections import Counter
+import pandas as pd
+from summary import summarize, REPORT_SENTIMENTS
+from visualize import PERFORMANCE_WORDS, POS_COLUMNS, prepare_charts
+from benchmarks.bench_sqlite import make_rows
+
+def legacy_summary(notes_data, word_freq_data, technical_freq_data):
+    # Perhitungan yang dulu dilakukan load.py (laporan) dan visualize.prepare_charts (chart)
+    notes_df = pd.DataFrame(notes_data)
+    report = [notes_df["topic_category"].value_counts(), notes_df["sentiment"].value_counts(),
+              notes_df["compound_score"].mean(),
+              {w["word"]: w["frequency"] for w in word_freq_data if w["word"] in PERFORMANCE_WORDS},
+              notes_df.groupby("sentiment")[POS_COLUMNS].mean()]
+    for sentiment in REPORT_SENTIMENTS:
+        report.append(Counter(" ".join(notes_df[notes_df["sentiment"] == sentiment]["tokens"]).split()).most_common(5))
+    report += [notes_df.groupby("topic_category")["word_count"].agg(['mean', 'min', 'max']),
+               notes_df["word_count"].corr(notes_df["compound_score"]), list(technical_freq_data),
+               notes_df["word_count"].mean(), notes_df["sentence_count"].mean(), notes_df["lexical_diversity"].mean()]
+    charts = [notes_df["topic_category"].value_counts(), notes_df["sentiment"].value_counts(),
+              notes_df.groupby("sentiment")[POS_COLUMNS].mean(), list(technical_freq_data),
+              notes_df[["topic_category", "word_count"]], notes_df[["word_count", "compound_score", "topic_category"]]]
+    for sentiment in REPORT_SENTIMENTS:
+        charts.append(" ".join(notes_df[notes_df["sentiment"] == sentiment]["tokens"]))
+    return report, charts
+
+def single_pass(notes_data, word_freq_data, technical_freq_data):
+    summary = summarize(notes_data, word_freq_data, technical_freq_data)
+    return summary, prepare_charts(summary)
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DataFrame report/chart inputs vs the single-pass summary")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'notes':>8} {'engine':>12} {'seconds':>9} {'peak MiB':>9}")
+    for count in args.rows:
+        rows = make_rows(count)
+        words = Counter(token for row in rows for token in row["tokens"].split())
+        word_freq_data = [{"word": word, "frequency": freq} for word, freq in words.most_common()]
+        technical_freq_data = [{"bigram": "black screen", "frequency": 10}, {"bigram": "no sound", "frequency": 5}]
+        for engine, fn in [("dataframe", legacy_summary), ("single-pass", single_pass)]:
+            seconds, peak = measure(fn, rows, word_freq_data, technical_freq_data)
+            print(f"{count:>8} {engine:>12} {seconds:>9.2f} {peak:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_tokenizer.py
+# Throughput (notes/detik) tokenizer nltk vs fast dan tingkat kesesuaian hasilnya
+# (token, topic_category, sentence_count) per note
+# Jalankan: python -m benchmarks.bench_tokenizer --reports-file temp_reports.jsonl.gz
+import argparse
+import time
+from collections import Counter
+from transform import TOKENIZERS, run_transform
+from handoff import iter_game_reports
+from benchmarks.synthetic import make_payload
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and cross-check the nltk and fast tokenizers")
+    parser.add_argument("--reports-file", help="temp_reports.jsonl.gz from a previous extraction")
+    parser.add_argument("--games", type=int, default=500, help="Synthetic game count when no files are given")
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--stages", nargs="+", default=["topics", "ngrams"], help="Stages to run with each tokenizer")
+    parser.add_argument("--show", type=int, default=10, help="Most frequent token differences to print")
+    args = parser.parse_args()
+
+    if args.reports_file:
+        games, all_reports = [], {}
+        for game, reports in iter_game_reports(args.reports_file):
+            games.append(game)
+            all_reports[game["appId"]] = reports
+    else:
+        games, all_reports = make_payload(args.games, args.reports_per_game)
+
+    rows = {}
+    print(f"{'tokenizer':>10} {'seconds':>9} {'notes/s':>9}")
+    for tokenizer in TOKENIZERS:
+        start = time.perf_counter()
+        notes_data = run_transform(games, all_reports, stages=args.stages, tokenizer=tokenizer)[0]
+        elapsed = time.perf_counter() - start
+        rows[tokenizer] = {row["report_id"]: row for row in notes_data}
+        print(f"{tokenizer:>10} {elapsed:>9.2f} {len(notes_data) / elapsed:>9.1f}")
+
+    # Kesesuaian dihitung terhadap path nltk; note yang hanya ada di salah satu path dihitung berbeda
+    reference, fast = rows["nltk"], rows["fast"]
+    report_ids = reference.keys() | fast.keys()
+    agree = Counter()
+    differences = Counter()
+    jaccard = 0.0
+    for report_id in report_ids:
+        a, b = reference.get(report_id, {}), fast.get(report_id, {})
+        for column in ("tokens", "topic_category", "sentence_count"):
+            agree[column] += a.get(column) == b.get(column)
+        tokens_a, tokens_b = set(a.get("tokens", "").split()), set(b.get("tokens", "").split())
+        union = tokens_a | tokens_b
+        jaccard += len(tokens_a & tokens_b) / len(union) if union else 1.0
+        differences.update(f"nltk-only {token}" for token in tokens_a - tokens_b)
+        differences.update(f"fast-only {token}" for token in tokens_b - tokens_a)
+
+    total = len(report_ids) or 1
+    print(f"\nAgreement over {len(report_ids)} notes:")
+    for column in ("tokens", "topic_category", "sentence_count"):
+        print(f"- {column}: {agree[column] / total * 100:.2f}% identical")
+    print(f"- mean token-set Jaccard: {jaccard / total:.4f}")
+    if differences:
+        print("Most frequent token differences:")
+        for difference, count in differences.most_common(args.show):
+            print(f"- {difference}: {count}")
+
+if __name__ == "__main__":
+    main()
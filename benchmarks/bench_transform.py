@@ -0,0 +1,40 @@
+# benchmarks/bench_transform.py
+# Membandingkan transform dengan 1/2/4/8 worker dan memastikan output identik
+# Jalankan: python -m benchmarks.bench_transform --reports-file temp_reports.jsonl.gz
+import argparse
+import json
+import time
+from transform import run_transform
+from handoff import iter_game_reports
+from benchmarks.synthetic import make_payload
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process transform")
+    parser.add_argument("--reports-file", help="temp_reports.jsonl.gz from a previous extraction")
+    parser.add_argument("--games", type=int, default=500, help="Synthetic game count when no files are given")
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-size", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.reports_file:
+        games, all_reports = [], {}
+        for game, reports in iter_game_reports(args.reports_file):
+            games.append(game)
+            all_reports[game["appId"]] = reports
+    else:
+        games, all_reports = make_payload(args.games, args.reports_per_game)
+
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>9} {'notes/s':>9} {'identical':>10}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = run_transform(games, all_reports, workers, args.shard_size)
+        elapsed = time.perf_counter() - start
+        encoded = json.dumps(result)
+        if baseline is None:
+            baseline = encoded
+        print(f"{workers:>8} {elapsed:>9.2f} {len(result[0]) / elapsed:>9.1f} {str(encoded == baseline):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# benchmarks/run_suite.py
+# Benchmark end-to-end extract -> transform -> load terhadap korpus sintetis yang
+# disajikan stub server lokal. Hasil disimpan di benchmarks/results/ dan
+# dibandingkan dengan run sebelumnya untuk menandai regresi.
+# Jalankan: python -m benchmarks.run_suite --scales 1000 10000 100000
+import argparse
+import glob
+import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import extract
+from transform import transform
+from load import load
+from benchmarks.stub_server import start_stub_server
+from benchmarks.synthetic import make_payload
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(__file__)).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_scale(notes, args):
+    game_count = max(notes // args.reports_per_game, 1)
+    games, reports = make_payload(game_count, args.reports_per_game, args.seed,
+                                  note_lengths=args.note_lengths, mean_words=args.mean_words)
+    server, base_url = start_stub_server(games, reports, args.latency)
+    extract.BASE_URL = base_url
+    result = {"notes": notes, "games": game_count}
+    cwd = os.getcwd()
+    # Setiap skala berjalan di direktori kosong (dihapus setelahnya) supaya tidak ada
+    # temp file/cache yang terpakai ulang
+    workdir = tempfile.TemporaryDirectory(prefix=f"protondb_bench_{notes}_")
+    os.chdir(workdir.name)
+    try:
+        if "extract" in args.stages:
+            start = time.perf_counter()
+            games, all_reports = extract.extract(workers=args.fetch_workers)
+            result["extract_seconds"] = time.perf_counter() - start
+        else:
+            all_reports = reports
+        if "transform" in args.stages:
+            start = time.perf_counter()
+            transformed = transform(games, all_reports, workers=args.workers, cache_file=None)
+            result["transform_seconds"] = time.perf_counter() - start
+            result["notes_analyzed"] = len(transformed[0])
+            if "load" in args.stages:
+                start = time.perf_counter()
+                load(*transformed)
+                result["load_seconds"] = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        workdir.cleanup()
+    result["total_seconds"] = sum(v for k, v in result.items() if k.endswith("_seconds"))
+    if result.get("transform_seconds"):
+        result["transform_notes_per_second"] = result["notes_analyzed"] / result["transform_seconds"]
+    return result
+
+def comparable_params(params):
+    # Parameter yang menentukan hasil; skala dicocokkan per baris di compare()
+    return {k: v for k, v in params.items() if k not in ("scales", "threshold")}
+
+def params_diff(params, baseline_params):
+    params, baseline_params = comparable_params(params), comparable_params(baseline_params)
+    return {k: (baseline_params.get(k), params.get(k)) for k in params.keys() | baseline_params.keys()
+            if params.get(k) != baseline_params.get(k)}
+
+def latest_result(params, exclude=None):
+    # Hasil terbaru dengan parameter yang sama (notes/workers/stages/...)
+    files = sorted(f for f in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if f != exclude)
+    for path in reversed(files):
+        with open(path, 'r') as rf:
+            result = json.load(rf)
+        if not params_diff(params, result.get("params", {})):
+            return path, result
+    return None, None
+
+def compare(current, baseline, threshold):
+    # Tandai stage yang lebih lambat dari baseline lebih dari `threshold` (mis. 0.2 = 20%)
+    regressions = []
+    baseline_scales = {r["notes"]: r for r in baseline["scales"]}
+    for result in current["scales"]:
+        previous = baseline_scales.get(result["notes"])
+        if not previous:
+            continue
+        for key, seconds in result.items():
+            if not key.endswith("_seconds") or not previous.get(key):
+                continue
+            change = seconds / previous[key] - 1
+            flag = "REGRESSION" if change > threshold else ""
+            print(f"{result['notes']:>8} {key:<20} {previous[key]:>9.2f} -> {seconds:>9.2f} ({change * 100:+.1f}%) {flag}")
+            if flag:
+                regressions.append((result["notes"], key, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ETL benchmark on a synthetic ProtonDB corpus")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="Note counts to benchmark")
+    parser.add_argument("--reports-per-game", type=int, default=10)
+    parser.add_argument("--note-lengths", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--mean-words", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated server latency in seconds")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="Transform worker processes")
+    parser.add_argument("--stages", nargs="+", choices=["extract", "transform", "load"], default=["extract", "transform", "load"])
+    parser.add_argument("--baseline", help="Result file to compare against (default: latest in benchmarks/results)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown ratio flagged as a regression")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    run = {
+        "started_at": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("baseline", "no_save")},
+        "scales": []
+    }
+    for notes in args.scales:
+        print(f"\n=== Benchmark: {notes} notes ===")
+        run["scales"].append(run_scale(notes, args))
+
+    print(f"\n{'notes':>8} {'extract s':>10} {'transform s':>12} {'load s':>9} {'notes/s':>9}")
+    for r in run["scales"]:
+        print(f"{r['notes']:>8} {r.get('extract_seconds', 0):>10.2f} {r.get('transform_seconds', 0):>12.2f} "
+              f"{r.get('load_seconds', 0):>9.2f} {r.get('transform_notes_per_second', 0):>9.1f}")
+
+    saved = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        saved = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+        with open(saved, 'w') as rf:
+            json.dump(run, rf, indent=2)
+        print(f"\nResults saved to {saved}")
+
+    if args.baseline:
+        baseline_file = args.baseline
+        with open(baseline_file, 'r') as bf:
+            baseline = json.load(bf)
+        diff = params_diff(run["params"], baseline.get("params", {}))
+        if diff:
+            print(f"\nNot comparing with {baseline_file}, its parameters differ:")
+            for key, (old, new) in sorted(diff.items()):
+                print(f"  {key}: {old} -> {new}")
+            baseline = None
+    else:
+        baseline_file, baseline = latest_result(run["params"], exclude=saved)
+        if not baseline:
+            print("\nNo earlier result with the same parameters to compare with")
+    if baseline:
+        print(f"\nComparing with {baseline_file}:")
+        regressions = compare(run, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold * 100:.0f}%")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
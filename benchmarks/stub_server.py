@@ -0,0 +1,62 @@
+# benchmarks/stub_server.py
+# Stub HTTP server lokal yang meniru API protondb.max-p.me
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORTS_PATH = re.compile(r"^/games/(\d+)/reports/?$")
+
+def start_stub_server(games, reports, latency=0.0, fail_every=0, port=0):
+    # latency: jeda per request (detik), fail_every: setiap request ke-N dibalas 503
+    state = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with lock:
+                state["requests"] += 1
+                count = state["requests"]
+            if latency:
+                time.sleep(latency)
+            if fail_every and count % fail_every == 0:
+                self.send_json(503, {"error": "unavailable"})
+                return
+            if self.path.rstrip("/") == "/games":
+                self.send_json(200, games)
+                return
+            match = REPORTS_PATH.match(self.path)
+            if match:
+                self.send_json(200, reports.get(int(match.group(1)), []))
+                return
+            self.send_json(404, {"error": "not found"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.state = state
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,92 @@
+# benchmarks/synthetic.py
+# Generator korpus ProtonDB sintetis dengan bentuk yang sama seperti hasil
+# extract_games()/extract_reports(), deterministik berdasarkan seed
+import math
+import random
+
+WORDS = ("game runs perfectly works out of the box proton ge crash black screen fps smooth "
+         "lag stutter sound audio controller steam launch options dxvk vulkan install broken "
+         "fine great slow fast error fix after update multiplayer online mouse keyboard "
+         "settings resolution fullscreen windowed driver nvidia amd mesa kernel ubuntu arch "
+         "cutscenes video playback crackling menu intro skip shader compilation freeze "
+         "anticheat login launcher window borderless vsync framerate mods saves cloud").split()
+PHRASES = ["works out of the box", "black screen on launch", "no sound", "proton ge fixes it",
+           "game crashes after intro", "use PROTON_USE_WINED3D=1 %command%", "not working",
+           "cant run multiplayer", "runs at 60 fps", "had to install vcrun2019 with protontricks"]
+TEMPLATE_NOTES = ["Works out of the box.", "Works perfectly.", "Runs great, no issues.",
+                  "PROTON_USE_WINED3D=1 %command%", "Black screen on launch."]
+RATINGS = ["Platinum", "Gold", "Silver", "Bronze", "Borked"]
+PROTON_VERSIONS = ["Default", "3.16-9", "4.11-13", "5.0-10", "6.3-8", "7.0-6", "8.0-5", "GE-Proton9-20"]
+
+def note_length(rng, distribution, mean_words):
+    if distribution == "fixed":
+        return mean_words
+    if distribution == "uniform":
+        return rng.randint(1, max(2 * mean_words - 1, 1))
+    if distribution == "lognormal":
+        # sigma=1, mu dipilih supaya rata-ratanya mean_words (panjang note nyata sangat miring)
+        return max(1, int(rng.lognormvariate(math.log(mean_words) - 0.5, 1.0)))
+    raise ValueError(f"Unknown note length distribution: {distribution}")
+
+def make_note(rng, length, template_ratio=0.1):
+    if rng.random() < template_ratio:
+        return rng.choice(TEMPLATE_NOTES)
+    words = []
+    while len(words) < length:
+        if rng.random() < 0.1:
+            words.extend(rng.choice(PHRASES).split())
+        else:
+            words.append(rng.choice(WORDS))
+        if rng.random() < 0.08:
+            words[-1] += "."
+    return " ".join(words[:length]).capitalize().rstrip(".") + "."
+
+def iter_payload(game_count=100, reports_per_game=5, seed=0, note_lengths="lognormal", mean_words=30,
+                 reports_distribution="fixed", empty_ratio=0.03, template_ratio=0.1, near_ratio=0.0):
+    # Yield (game, reports) satu per satu tanpa menyimpan seluruh korpus.
+    # reports_distribution "geometric": banyak game dengan sedikit report, sedikit
+    # game dengan banyak report, rata-rata tetap reports_per_game.
+    # near_ratio: porsi note yang menyalin note sebelumnya dengan satu kata tambahan
+    # (hampir-duplikat untuk dedup "near", juga dari game lain)
+    rng = random.Random(seed)
+    report_id = 0
+    recent = []
+    for app_id in range(game_count):
+        game = {"appId": app_id, "title": f"Game {app_id}"}
+        if reports_distribution == "fixed":
+            count = reports_per_game
+        elif reports_distribution == "geometric":
+            count = int(rng.expovariate(1 / reports_per_game)) if reports_per_game else 0
+        else:
+            raise ValueError(f"Unknown reports distribution: {reports_distribution}")
+        reports = []
+        for i in range(count):
+            report_id += 1
+            if rng.random() < empty_ratio:
+                notes = rng.choice([None, "", "   "])
+            elif near_ratio and recent and rng.random() < near_ratio:
+                notes = f"{rng.choice(recent)[:-1]} {rng.choice(WORDS)}."
+            else:
+                notes = make_note(rng, note_length(rng, note_lengths, mean_words), template_ratio)
+                if near_ratio:
+                    recent = (recent + [notes])[-50:]
+            reports.append({
+                "id": report_id,
+                "appId": app_id,
+                "timestamp": 1535081997 + rng.randint(0, 7 * 365 * 86400),
+                "rating": rng.choice(RATINGS),
+                "notes": notes,
+                "os": "Ubuntu 18.04",
+                "gpuDriver": "Mesa 18.1.6",
+                "specs": None,
+                "protonVersion": rng.choice(PROTON_VERSIONS)
+            })
+        yield game, reports
+
+def make_payload(game_count=100, reports_per_game=5, seed=0, **options):
+    games = []
+    reports = {}
+    for game, game_reports in iter_payload(game_count, reports_per_game, seed, **options):
+        games.append(game)
+        reports[game["appId"]] = game_reports
+    return games, reports
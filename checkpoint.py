@@ -0,0 +1,64 @@
+# checkpoint.py
+# Checkpoint per game untuk ekstraksi yang bisa dilanjutkan (resume) dan delta crawl
+import sqlite3
+import hashlib
+import json
+import time
+
+def open_checkpoint(path="temp_checkpoint.db"):
+    # busy timeout: beberapa worker di host yang sama bisa menulis checkpoint bersamaan
+    conn = sqlite3.connect(path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS report_checkpoint (
+            app_id INTEGER PRIMARY KEY,
+            fetched_at REAL,
+            etag TEXT,
+            content_hash TEXT,
+            reports TEXT
+        )
+    ''')
+    conn.commit()
+    return conn
+
+def content_hash(reports):
+    return hashlib.sha256(json.dumps(reports, sort_keys=True).encode()).hexdigest()
+
+def get_checkpoint_state(conn):
+    # appId -> (fetched_at, etag, content_hash), tanpa memuat isi report
+    rows = conn.execute("SELECT app_id, fetched_at, etag, content_hash FROM report_checkpoint")
+    return {app_id: (fetched_at, etag, digest) for app_id, fetched_at, etag, digest in rows}
+
+def stale_app_ids(state, app_ids, max_age=None, now=None):
+    # Game yang belum pernah diambil, atau lebih tua dari max_age (detik)
+    now = now or time.time()
+    stale = []
+    for app_id in app_ids:
+        entry = state.get(app_id)
+        if entry is None or (max_age is not None and now - entry[0] > max_age):
+            stale.append(app_id)
+    return stale
+
+def save_reports(conn, app_id, reports, etag=None, fetched_at=None):
+    # Return True jika isi report berubah dibanding checkpoint sebelumnya
+    digest = content_hash(reports)
+    row = conn.execute("SELECT content_hash FROM report_checkpoint WHERE app_id = ?", (app_id,)).fetchone()
+    conn.execute(
+        "INSERT OR REPLACE INTO report_checkpoint (app_id, fetched_at, etag, content_hash, reports) VALUES (?, ?, ?, ?, ?)",
+        (app_id, fetched_at or time.time(), etag, digest, json.dumps(reports))
+    )
+    conn.commit()
+    return row is None or row[0] != digest
+
+def touch_reports(conn, app_id, fetched_at=None):
+    # Dipakai saat server membalas 304 Not Modified
+    conn.execute("UPDATE report_checkpoint SET fetched_at = ? WHERE app_id = ?", (fetched_at or time.time(), app_id))
+    conn.commit()
+
+def load_reports(conn, app_ids):
+    all_reports = {}
+    for app_id in app_ids:
+        row = conn.execute("SELECT reports FROM report_checkpoint WHERE app_id = ?", (app_id,)).fetchone()
+        all_reports[app_id] = json.loads(row[0]) if row else []
+    return all_reports
@@ -0,0 +1,281 @@
+# dedup.py
+# Deteksi note duplikat sebelum analisis. Mode "exact": isi note identik (hash);
+# mode "near": juga hampir-duplikat lewat MinHash + LSH atas shingle kata.
+# Setiap note mendapat cluster_id = report_id note pertama (kanonik) di cluster-nya.
+# Duplikat tidak dianalisis ulang: baris hasil analisis note kanonik dipakai ulang
+# di proses utama (Deduplicator.resolve, dipanggil dari transform.merge_shards).
+# Hampir-duplikat hanya memakai ulang hasil model (POS, NER, sentiment); kolom teksnya
+# (tokens, word_count, char_count, ...) dihitung dari teksnya sendiri.
+import hashlib
+import re
+import time
+import zlib
+from collections import OrderedDict
+from itertools import islice
+import numpy as np
+from errors import InvalidArgumentError
+
+DEDUP_MODES = ["none", "exact", "near"]
+NUM_PERM = 64
+# 16 band x 4 baris: kandidat muncul mulai Jaccard ~0.5, lalu diverifikasi dengan threshold
+BANDS = 16
+NEAR_THRESHOLD = 0.8
+# Index cluster dibatasi (yang paling lama dibuang). Batas ini dan MAX_ROWS tidak bergantung
+# batch size: state dedup tumbuh sampai batasnya (lihat benchmarks/bench_memory.py)
+MAX_CLUSTERS = 200000
+# Baris analisis kanonik yang disimpan untuk dipakai ulang (LRU). Baris yang masih
+# ditunggu duplikat tidak dibuang; duplikat yang muncul setelah barisnya terbuang
+# dianalisis penuh di worker
+MAX_ROWS = 20000
+PRIME = (1 << 32) - 5
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Seed tetap supaya cluster sama di setiap run
+_rng = np.random.RandomState(1)
+PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_MISSING = object()
+# Penanda di meta hampir-duplikat: worker hanya menghitung kolom teks (lihat transform.TEXT_STAGES)
+REUSE_ANALYSIS = "reuse_analysis"
+# Baris pengganti dari worker untuk note yang dianalisis penuh tetapi tidak punya kata
+# bermakna, supaya cluster-nya tidak tertinggal di pending
+NO_WORDS = "no_words"
+STAT_KEYS = ["notes", "chars", "exact", "near", "skipped", "skipped_chars", "reanalyzed"]
+
+def shingles(notes):
+    # Shingle 3 kata dari teks yang dinormalisasi; note pendek memakai shingle lebih pendek
+    tokens = WORD_PATTERN.findall(notes.lower())
+    k = min(3, len(tokens))
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)} if tokens else set()
+
+def minhash(shingle_set):
+    # Signature NUM_PERM nilai: minimum (a * crc32(shingle) + b) mod PRIME per permutasi.
+    # Semua nilai < 2^32, jadi disimpan sebagai uint32 (key band cukup 16 byte)
+    hashes = np.array([zlib.crc32(shingle.encode()) for shingle in shingle_set], dtype=np.uint64)
+    return ((PERM_A[:, None] * hashes + PERM_B[:, None]) % PRIME).min(axis=1).astype(np.uint32)
+
+def note_digest(notes):
+    return hashlib.blake2b(notes.encode(), digest_size=16).digest()
+
+def with_analysis(row, analysis):
+    # Metadata baris diikuti kolom analysis, dengan urutan kolom seperti baris hasil analisis biasa
+    return {**{key: value for key, value in row.items() if key not in analysis}, **analysis}
+
+class Deduplicator:
+    def __init__(self, mode="exact", analyze=None, threshold=NEAR_THRESHOLD, max_clusters=MAX_CLUSTERS, max_rows=MAX_ROWS,
+                 trace=False):
+        if mode not in DEDUP_MODES[1:]:
+            raise InvalidArgumentError(f"Unknown dedup mode: {mode}. Available: {', '.join(DEDUP_MODES)}")
+        self.mode = mode
+        # analyze(notes) -> (row, tokens) atau None; cadangan jika baris kanonik sudah terbuang
+        self.analyze = analyze
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self.max_rows = max_rows
+        self.digests = {}
+        # Satu dict per band: key band -> cluster_id
+        self.bands = [{} for _ in range(BANDS)]
+        # cluster_id -> (digest note di cluster, signature MinHash, key band)
+        self.clusters = OrderedDict()
+        self.rows = OrderedDict()
+        self.pending = set()
+        # cluster_id -> jumlah duplikat yang sudah di-tag dan menunggu baris cluster-nya di resolve
+        self.waiting = {}
+        self.next_id = -1
+        # dict biasa (bukan Counter): diperbarui untuk setiap note
+        self.stats = dict.fromkeys(STAT_KEYS, 0)
+        self.seconds = 0.0
+        # trace: (report_id, digest, signature) setiap note sesuai urutan, termasuk note yang
+        # nantinya dibuang; dipakai merge mode terdistribusi untuk menggabungkan cluster antar shard
+        self.trace = [] if trace else None
+
+    def band_keys(self, signature):
+        raw = signature.tobytes()
+        size = len(raw) // BANDS
+        return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+    def find_near(self, signature, keys):
+        # Kandidat dari band yang sama diverifikasi dengan perkiraan Jaccard (porsi nilai signature yang sama)
+        for bands, key in zip(self.bands, keys):
+            cluster = bands.get(key)
+            if cluster is not None and np.count_nonzero(self.clusters[cluster][1] == signature) >= self.threshold * NUM_PERM:
+                return cluster
+        return None
+
+    def fingerprint(self, notes):
+        # (digest, signature MinHash atau None) satu note
+        shingle_set = shingles(notes) if self.mode == "near" else None
+        return note_digest(notes), minhash(shingle_set) if shingle_set else None
+
+    def assign(self, meta, notes, fingerprint=None):
+        # Return (cluster_id, jenis duplikat: None untuk note kanonik, "exact" atau "near").
+        # fingerprint: hasil fingerprint() yang sudah dihitung (notes boleh None)
+        digest, signature = fingerprint or (note_digest(notes), _MISSING)
+        cluster = self.digests.get(digest)
+        if cluster is not None:
+            # Salinan hampir-duplikat (digest bukan milik note kanonik) tetap "near"
+            return cluster, "exact" if self.clusters[cluster][0][0] == digest else "near"
+        if signature is _MISSING:
+            signature = self.fingerprint(notes)[1]
+        keys = None
+        if signature is not None:
+            keys = self.band_keys(signature)
+            cluster = self.find_near(signature, keys)
+            if cluster is not None:
+                # Salinan persis berikutnya dari note ini cukup dicek lewat hash
+                self.digests[digest] = cluster
+                self.clusters[cluster][0].append(digest)
+                return cluster, "near"
+        cluster = meta.get("report_id")
+        if cluster is None:
+            # Note tanpa report_id mendapat id negatif berurutan
+            cluster = self.next_id
+            self.next_id -= 1
+        self.digests[digest] = cluster
+        for bands, key in zip(self.bands, keys or []):
+            bands.setdefault(key, cluster)
+        self.clusters[cluster] = ([digest], signature, keys)
+        if len(self.clusters) > self.max_clusters:
+            self.evict()
+        return cluster, None
+
+    def evict(self):
+        cluster, (digests, signature, keys) = self.clusters.popitem(last=False)
+        for digest in digests:
+            if self.digests.get(digest) == cluster:
+                del self.digests[digest]
+        for bands, key in zip(self.bands, keys or []):
+            if bands.get(key) == cluster:
+                del bands[key]
+        if cluster not in self.waiting:
+            self.rows.pop(cluster, None)
+        self.pending.discard(cluster)
+
+    def tag(self, notes_iter):
+        # Yield (meta, notes) seperti notes_iter dengan kolom cluster_id/duplicate di meta
+        # (meta diubah langsung; report_meta membuat dict baru per note). Duplikat exact
+        # yang hasil analisisnya bisa dipakai ulang dikirim sebagai (meta + note_text, None)
+        # sehingga worker melewatinya; hampir-duplikat ditandai REUSE_ANALYSIS.
+        stats, rows, pending, waiting = self.stats, self.rows, self.pending, self.waiting
+        for meta, notes in notes_iter:
+            start = time.perf_counter()
+            fingerprint = None
+            if self.trace is not None:
+                fingerprint = self.fingerprint(notes)
+                self.trace.append((meta.get("report_id"),) + fingerprint)
+            cluster, kind = self.assign(meta, notes, fingerprint)
+            meta["cluster_id"] = cluster
+            meta["duplicate"] = kind
+            stats["notes"] += 1
+            stats["chars"] += len(notes)
+            if kind is not None:
+                stats[kind] += 1
+            canonical = rows.get(cluster, _MISSING)
+            # Hampir-duplikat dari note kanonik tanpa kata bermakna (baris None) dianalisis penuh di worker
+            if kind is not None and (cluster in pending or canonical is not _MISSING and (canonical is not None or kind == "exact")):
+                # Biaya analisis sebanding dengan panjang note, jadi karakter yang dilewati juga dicatat
+                stats["skipped"] += 1
+                stats["skipped_chars"] += len(notes)
+                # Baris cluster dipin sampai duplikat ini di-resolve, supaya tidak terbuang dari LRU
+                waiting[cluster] = waiting.get(cluster, 0) + 1
+                if canonical is not _MISSING:
+                    rows.move_to_end(cluster)
+                if kind == "exact":
+                    meta["note_text"] = notes
+                    notes = None
+                else:
+                    meta[REUSE_ANALYSIS] = True
+            elif kind != "near" or canonical is None:
+                # Baris note ini nantinya disimpan untuk cluster-nya (lihat resolve)
+                pending.add(cluster)
+            self.seconds += time.perf_counter() - start
+            yield meta, notes
+
+    def store(self, cluster, row):
+        self.rows[cluster] = row
+        self.rows.move_to_end(cluster)
+        self.pending.discard(cluster)
+        excess = len(self.rows) - self.max_rows
+        if excess > 0:
+            # Baris yang masih ditunggu duplikat tidak dibuang (tag memindahkannya ke akhir LRU)
+            for old in list(islice((old for old in self.rows if old not in self.waiting), excess)):
+                del self.rows[old]
+
+    def release(self, cluster):
+        count = self.waiting.pop(cluster) - 1
+        if count:
+            self.waiting[cluster] = count
+
+    def reanalyze(self, row):
+        # Analisis penuh di proses utama (serial); dihitung di stats["reanalyzed"]
+        self.stats["reanalyzed"] += 1
+        result = self.analyze(row["note_text"])
+        return with_analysis(row, result[0]) if result else None
+
+    def resolve(self, rows):
+        # Lengkapi baris duplikat dari baris kanonik; simpan baris yang baru dianalisis.
+        # Return (rows, token list duplikat exact untuk tabel frekuensi). Token
+        # hampir-duplikat sudah dihitung worker dari teksnya sendiri.
+        resolved = []
+        token_lists = []
+        for row in rows:
+            cluster = row.get("cluster_id")
+            kind = row.get("duplicate")
+            reuse = row.pop(REUSE_ANALYSIS, False)
+            skipped = reuse or "tokens" not in row and not row.get(NO_WORDS)
+            if skipped:
+                self.release(cluster)
+            if row.get(NO_WORDS):
+                # Duplikat exact juga tidak punya kata bermakna; hampir-duplikat belum tentu
+                if kind != "near":
+                    self.store(cluster, None)
+                else:
+                    self.pending.discard(cluster)
+                continue
+            canonical = self.rows.get(cluster, _MISSING)
+            if not skipped:
+                # Dianalisis penuh di worker. Hampir-duplikat hanya disimpan untuk cluster
+                # yang note kanoniknya tidak punya kata bermakna, bukan menggantikan baris
+                # kanonik yang sudah terbuang dari LRU
+                if kind != "near" or canonical is None:
+                    self.store(cluster, row)
+                resolved.append(row)
+                continue
+            if canonical is _MISSING:
+                # Cadangan: tidak terjadi selama baris cluster dipin oleh tag()
+                row = self.reanalyze(row)
+                if row is not None:
+                    if kind == "exact":
+                        self.store(cluster, row)
+                    resolved.append(row)
+                continue
+            if canonical is None and reuse:
+                # Note kanonik tidak punya kata bermakna, hampir-duplikat ini punya. Hasilnya
+                # disimpan sehingga hampir-duplikat berikutnya memakai hasil model baris ini
+                row = self.reanalyze(row)
+                self.store(cluster, row)
+                if row is not None:
+                    resolved.append(row)
+                continue
+            if canonical is None or kind == "exact" and canonical["note_text"] != row["note_text"]:
+                # Salinan exact note tanpa kata bermakna (baris cluster milik hampir-duplikatnya)
+                continue
+            self.rows.move_to_end(cluster)
+            # Kolom analisis dari note kanonik; metadata report, note_text dan (untuk
+            # hampir-duplikat) kolom teks milik duplikat sendiri
+            row = {**canonical, **row}
+            resolved.append(row)
+            if not reuse:
+                token_lists.append(row["tokens"].split())
+        return resolved, token_lists
+
+    def print_stats(self):
+        stats = self.stats
+        if not stats["notes"]:
+            return
+        print(f"Dedup ({self.mode}): {stats['exact']} exact and {stats['near']} near duplicates in {stats['notes']} notes, "
+              f"analysis skipped for {stats['skipped']} ({stats['skipped'] / stats['notes'] * 100:.1f}% of notes, "
+              f"{stats['skipped_chars'] / max(stats['chars'], 1) * 100:.1f}% of text)")
+        if stats["reanalyzed"]:
+            print(f"Dedup: {stats['reanalyzed']} near duplicates re-analyzed in the main process "
+                  f"(their first note has no meaningful words)")
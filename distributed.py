@@ -0,0 +1,324 @@
+# distributed.py
+# Mode terdistribusi: daftar game dibagi menjadi shard appId di antrian job (jobqueue.py),
+# beberapa proses/mesin worker mengklaim shard dan menjalankan extract + transform, lalu
+# merge menggabungkan hasil parsial menjadi file handoff transform biasa
+# (temp_notes.jsonl.gz + temp_*_freq.jsonl.gz) yang dibaca stage load.
+import json
+import os
+import re
+import socket
+import threading
+import time
+import numpy as np
+from extract import load_games, iter_extract
+from pipeline import prefetch
+from transform import (stream_notes, resolve_stages, handoff_meta, freq_tables, write_freq_handoffs, new_totals,
+                       print_sketch_bounds, new_deduplicator, MODEL_COLUMNS)
+from handoff import HandoffWriter, NOTES_FILE, iter_records
+from dedup import NUM_PERM, note_digest, with_analysis
+from profiling import timed
+from jobqueue import (LEASE_SECONDS, MAX_ATTEMPTS, open_queue, default_worker_id, create_jobs, get_queue_meta,
+                      claim_job, renew_lease, complete_job, fail_job, job_counts, active_jobs, list_jobs)
+from errors import MissingInputError, InvalidArgumentError
+
+QUEUE_FILE = "temp_jobs.db"
+SHARD_DIR = "temp_shards"
+
+def shard_games(games, shard_size):
+    # Shard berurutan sesuai daftar game, supaya hasil merge sama dengan satu host
+    return [games[i:i + shard_size] for i in range(0, len(games), shard_size)]
+
+def host_path(path):
+    # Checkpoint dan cache note (SQLite WAL) dibuat per host: WAL butuh shared memory di
+    # host yang sama, jadi file ini tidak boleh dipakai bersama lintas mesin
+    base, ext = os.path.splitext(path)
+    return f"{base}.{re.sub(r'[^A-Za-z0-9_-]', '_', socket.gethostname())}{ext}"
+
+def partial_paths(job_id, shard_dir=SHARD_DIR):
+    base = os.path.join(shard_dir, f"shard_{job_id:05d}")
+    return base + ".notes.jsonl.gz", base + ".counts.npz"
+
+def save_counts(path, word_freq, ngrams, dedup_trace=None):
+    # Hitungan kata (urutan kemunculan pertama) dan n-gram (NgramCounts.export) satu shard;
+    # ditulis ke file sementara lalu di-rename seperti file handoff. Dengan SpaceSaving
+    # (word_freq None) kata ada di orde 1 dan errors/floor/total ikut disimpan.
+    # dedup_trace (Deduplicator.trace) disimpan untuk menggabungkan cluster duplikat saat merge.
+    exported = ngrams.export()
+    word_freq = word_freq or {}
+    arrays = {"words": np.array(list(word_freq), dtype=str),
+              "word_counts": np.array(list(word_freq.values()), dtype=np.int64),
+              "vocab": np.array(exported["vocab"], dtype=str)}
+    for n in ngrams.orders:
+        arrays[f"keys_{n}"], arrays[f"counts_{n}"], arrays[f"first_{n}"], *errors = exported[n]
+        if errors:
+            arrays[f"errors_{n}"] = errors[0]
+            arrays[f"floor_{n}"] = np.int64(exported["floor"][n])
+            arrays[f"total_{n}"] = np.int64(exported["total"][n])
+    if dedup_trace is not None:
+        # report_id disimpan sebagai JSON supaya tipenya (int/str/None) sama dengan cluster_id satu host
+        arrays["dedup_ids"] = np.array(json.dumps([report_id for report_id, _, _ in dedup_trace]))
+        # Digest sebagai byte mentah (dtype "S" memotong byte nol di akhir)
+        arrays["dedup_digests"] = np.frombuffer(b"".join(digest for _, digest, _ in dedup_trace), dtype=np.uint8).reshape(-1, 16)
+        arrays["dedup_signatures"] = np.array([signature if signature is not None else np.zeros(NUM_PERM, dtype=np.uint32)
+                                               for _, _, signature in dedup_trace], dtype=np.uint32).reshape(-1, NUM_PERM)
+        arrays["dedup_has_signature"] = np.array([signature is not None for _, _, signature in dedup_trace], dtype=bool)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+def load_counts(path, orders=(2, 3)):
+    with np.load(path) as data:
+        words = dict(zip(data["words"].tolist(), data["word_counts"].tolist()))
+        shard_ngrams = {"vocab": data["vocab"].tolist(), "floor": {}, "total": {}}
+        for n in orders:
+            shard_ngrams[n] = (data[f"keys_{n}"], data[f"counts_{n}"], data[f"first_{n}"])
+            if f"errors_{n}" in data.files:
+                shard_ngrams[n] += (data[f"errors_{n}"],)
+                shard_ngrams["floor"][n] = int(data[f"floor_{n}"])
+                shard_ngrams["total"][n] = int(data[f"total_{n}"])
+    return words, shard_ngrams
+
+def load_dedup_trace(path):
+    with np.load(path) as data:
+        if "dedup_ids" not in data.files:
+            raise MissingInputError(f"{path} has no dedup trace; re-run the queue command and the workers")
+        report_ids = json.loads(str(data["dedup_ids"]))
+        digests = [row.tobytes() for row in data["dedup_digests"]]
+        signatures = data["dedup_signatures"]
+        has_signature = data["dedup_has_signature"].tolist()
+    return [(report_id, digest, signatures[i] if has_signature[i] else None)
+            for i, (report_id, digest) in enumerate(zip(report_ids, digests))]
+
+def reconcile_rows(dedup, trace, rows):
+    # Putar ulang trace dedup satu shard (semua note sesuai urutan, termasuk yang dibuang
+    # worker) di Deduplicator global, lalu ganti cluster_id/duplicate baris shard dengan
+    # hasilnya. Mode "near": kolom model mengikuti resolve() di satu host, yaitu diambil
+    # dari baris kanonik global, dan dianalisis ulang jika baris shard memakai hasil model
+    # note lain padahal secara global note ini kanonik.
+    entries = iter(trace)
+
+    def replay(stop_digest=None, stop_id=None):
+        for report_id, digest, signature in entries:
+            cluster, kind = dedup.assign({"report_id": report_id}, None, (digest, signature))
+            if stop_digest is not None and digest == stop_digest and report_id == stop_id:
+                return cluster, kind
+            if kind != "near":
+                # Note kanonik (atau salinan exact-nya) tanpa kata bermakna: tidak ada barisnya
+                dedup.store(cluster, None)
+        return None
+
+    for row in rows:
+        found = replay(note_digest(row["note_text"]), row["report_id"])
+        if found is None:
+            raise MissingInputError(f"dedup trace does not match the notes of a shard (report {row['report_id']})")
+        cluster, kind = found
+        own_models = row["duplicate"] != "near"
+        row["cluster_id"], row["duplicate"] = cluster, kind
+        if dedup.mode == "near":
+            stored = cluster in dedup.rows
+            canonical = dedup.rows.get(cluster)
+            if kind == "near" and canonical is not None:
+                row.update((column, canonical[column]) for column in MODEL_COLUMNS if column in canonical)
+                dedup.rows.move_to_end(cluster)
+                yield row
+                continue
+            if not own_models:
+                row = with_analysis(row, dedup.analyze(row["note_text"])[0])
+                dedup.stats["reanalyzed"] += 1
+            # Seperti resolve(): hampir-duplikat hanya disimpan jika note kanonik tidak punya
+            # kata bermakna (baris None), duplikat exact hanya jika baris kanonik sudah terbuang
+            if kind is None or kind == "near" and stored or kind == "exact" and not stored:
+                dedup.store(cluster, row)
+        yield row
+    replay()
+
+def shard_meta(queue_meta):
+    return handoff_meta(queue_meta["stages"], queue_meta["tokenizer"], dedup=queue_meta["dedup"],
+                        ngram_memory=queue_meta.get("ngram_memory"))
+
+def plan_jobs(limit=None, shard_size=100, max_age=None, stages=None, tokenizer="nltk", dedup="exact",
+              queue_file=QUEUE_FILE, shard_dir=SHARD_DIR, ngram_memory=None, refresh_games=False):
+    # Isi antrian dengan shard game. Opsi analisis disimpan di antrian supaya semua
+    # worker memakai stage/tokenizer/dedup/ngram_memory yang sama.
+    if shard_size < 1:
+        raise InvalidArgumentError("shard_size must be at least 1")
+    stages = resolve_stages(stages)
+    games = load_games(limit, max_age, refresh=refresh_games)
+    shards = shard_games([{"appId": game["appId"], "title": game.get("title")} for game in games], shard_size)
+    conn = open_queue(queue_file)
+    try:
+        running = active_jobs(conn)
+        if running:
+            raise InvalidArgumentError(f"{running} shards in {queue_file} are still being processed; "
+                             f"wait for the workers or for their leases to expire")
+        create_jobs(conn, shards, {"stages": list(stages), "tokenizer": tokenizer, "dedup": dedup, "max_age": max_age,
+                                   "ngram_memory": ngram_memory})
+    finally:
+        conn.close()
+    # Hasil parsial dari antrian sebelumnya tidak berlaku lagi
+    if os.path.isdir(shard_dir):
+        for name in os.listdir(shard_dir):
+            if name.startswith("shard_"):
+                os.remove(os.path.join(shard_dir, name))
+    print(f"Queued {len(shards)} shards of up to {shard_size} games ({len(games)} games) in {queue_file}")
+    return len(shards)
+
+class LeaseKeeper:
+    # Perpanjang lease job di thread terpisah (dengan koneksi sendiri) selama shard diproses
+    def __init__(self, queue_file, job_id, worker, lease_seconds=LEASE_SECONDS):
+        self.queue_file = queue_file
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        conn = open_queue(self.queue_file)
+        try:
+            while not self.stop.wait(self.lease_seconds / 3):
+                if not renew_lease(conn, self.job_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        return False
+
+def run_shard(job, queue_meta, worker_id, shard_dir=SHARD_DIR, fetch_workers=8, workers=1, batch_size=200,
+              rate_limit=None, checkpoint_file="temp_checkpoint.db", cache_file=None, cache_max_entries=None, queue_size=64):
+    # Extract + transform satu shard (dipipeline seperti run-all --stream); hasil parsial
+    # berupa baris note dan hitungan frekuensi yang belum dipangkas. Ditulis dulu ke file
+    # milik worker ini: worker lama yang lease-nya habis bisa masih menulis shard yang sama.
+    notes_file, counts_file = partial_paths(job["job_id"], shard_dir)
+    suffix = "." + re.sub(r"[^A-Za-z0-9_-]", "_", worker_id)
+    stages = tuple(queue_meta["stages"])
+    game_reports = prefetch(iter_extract(job["games"], fetch_workers, rate_limit, queue_meta["max_age"], checkpoint_file),
+                            queue_size, "worker.pipeline")
+    totals, note_count = stream_notes(game_reports, notes_file + suffix, shard_meta(queue_meta), workers, batch_size, stages,
+                                      cache_file, cache_max_entries, queue_meta["tokenizer"], queue_meta["dedup"],
+                                      queue_meta.get("ngram_memory"), dedup_trace=True)
+    save_counts(counts_file + suffix, totals["word_freq"], totals["ngrams"], totals["dedup_trace"])
+    # Isi shard deterministik, jadi file dari worker mana pun yang terakhir di-rename tetap benar
+    os.replace(notes_file + suffix, notes_file)
+    os.replace(counts_file + suffix, counts_file)
+    return note_count
+
+def run_worker(queue_file=QUEUE_FILE, shard_dir=SHARD_DIR, worker_id=None, fetch_workers=8, workers=1, batch_size=200,
+               rate_limit=None, checkpoint_file="temp_checkpoint.db", cache_file=None, cache_max_entries=None,
+               lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, poll_interval=5):
+    # Klaim dan proses shard sampai antrian habis. Selama ada shard yang masih dikerjakan
+    # worker lain, worker menunggu supaya shard dari worker yang crash tetap diambil alih.
+    worker_id = worker_id or default_worker_id()
+    checkpoint_file = host_path(checkpoint_file)
+    cache_file = host_path(cache_file) if cache_file else None
+    require_queue(queue_file)
+    conn = open_queue(queue_file)
+    done = 0
+    try:
+        queue_meta = get_queue_meta(conn)
+        if not queue_meta:
+            raise MissingInputError(f"no jobs in {queue_file}; run the queue command first")
+        os.makedirs(shard_dir, exist_ok=True)
+        print(f"Worker {worker_id} started on {queue_file} (checkpoint: {checkpoint_file}, "
+              f"cache: {cache_file or 'off'})")
+        while True:
+            job = claim_job(conn, worker_id, lease_seconds, max_attempts)
+            if job is None:
+                counts = job_counts(conn)
+                if not counts.get("pending") and not counts.get("running"):
+                    break
+                time.sleep(poll_interval)
+                continue
+            job_id = job["job_id"]
+            if job["expired_from"]:
+                print(f"Shard {job_id}: lease of {job['expired_from']} expired, retrying (attempt {job['attempt']})")
+            print(f"Shard {job_id}: {len(job['games'])} games")
+            try:
+                with timed("worker.shard", cpu=False) as counter, LeaseKeeper(queue_file, job_id, worker_id, lease_seconds) as lease:
+                    counter["items"] = run_shard(job, queue_meta, worker_id, shard_dir, fetch_workers, workers, batch_size, rate_limit,
+                                                 checkpoint_file, cache_file, cache_max_entries)
+            except Exception as e:
+                fail_job(conn, job_id, worker_id, f"{type(e).__name__}: {e}", max_attempts)
+                print(f"Shard {job_id} failed: {e}")
+                continue
+            if lease.lost or not complete_job(conn, job_id, worker_id):
+                # Shard sudah diambil worker lain; hasilnya identik, jadi file yang ditulis tetap valid
+                print(f"Shard {job_id}: lease lost to another worker")
+                continue
+            done += 1
+    finally:
+        conn.close()
+    print(f"Worker {worker_id} finished {done} shards")
+    return done
+
+def require_queue(queue_file):
+    # Worker/merge/status tidak membuat antrian baru (open_queue akan membuat file kosong)
+    if not os.path.exists(queue_file):
+        raise MissingInputError(f"{queue_file} not found; run the queue command first")
+
+def queue_status(queue_file=QUEUE_FILE):
+    require_queue(queue_file)
+    conn = open_queue(queue_file)
+    try:
+        return job_counts(conn), list_jobs(conn)
+    finally:
+        conn.close()
+
+def merge_partials(queue_file=QUEUE_FILE, shard_dir=SHARD_DIR, notes_file=NOTES_FILE, ngram_top_k=None, ngram_min_count=1):
+    # Gabungkan hasil semua shard sesuai urutan job: hitungan kata dan n-gram dijumlahkan
+    # dengan urutan tie yang sama seperti transform di satu host. Worker hanya mendeteksi
+    # duplikat di dalam shard-nya; cluster antar shard digabung di sini dari trace dedup
+    # worker (digest/signature setiap note, termasuk note kanonik yang dibuang), lihat
+    # reconcile_rows.
+    # Return sama dengan transform_stream: (notes_file, word, bigram, trigram).
+    counts, jobs = queue_status(queue_file)
+    if not jobs:
+        raise MissingInputError(f"no jobs in {queue_file}; run the queue command first")
+    if counts.get("done", 0) < len(jobs):
+        pending = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()) if status != "done")
+        raise MissingInputError(f"only {counts.get('done', 0)} of {len(jobs)} shards are done ({pending}); run more workers first")
+    conn = open_queue(queue_file)
+    try:
+        queue_meta = get_queue_meta(conn)
+    finally:
+        conn.close()
+
+    print(f"Merging {len(jobs)} shards from {shard_dir}...")
+    partial_meta = shard_meta(queue_meta)
+    meta = handoff_meta(queue_meta["stages"], queue_meta["tokenizer"], ngram_top_k, ngram_min_count, queue_meta["dedup"],
+                        queue_meta.get("ngram_memory"))
+    totals = new_totals(queue_meta.get("ngram_memory"))
+    word_freq, ngrams = totals["word_freq"], totals["ngrams"]
+    dedup = new_deduplicator(queue_meta["dedup"], resolve_stages(queue_meta["stages"]), queue_meta["tokenizer"])
+    with timed("merge", profile=True) as counter, HandoffWriter(notes_file, "notes", meta) as writer:
+        for job in jobs:
+            shard_notes, shard_counts = partial_paths(job["job_id"], shard_dir)
+            if not os.path.exists(shard_notes) or not os.path.exists(shard_counts):
+                raise MissingInputError(f"partial results of shard {job['job_id']} are missing in {shard_dir}")
+            rows = iter_records(shard_notes, "notes", partial_meta)
+            if dedup is not None:
+                rows = reconcile_rows(dedup, load_dedup_trace(shard_counts), rows)
+            for row in rows:
+                writer.write(row)
+                counter["items"] += 1
+            words, shard_ngrams = load_counts(shard_counts, ngrams.orders)
+            if word_freq is not None:
+                word_freq.update(words)
+            ngrams.add(shard_ngrams)
+    if dedup is not None and dedup.stats["reanalyzed"]:
+        print(f"Dedup: {dedup.stats['reanalyzed']} notes re-analyzed because their cluster changed across shards")
+    freqs = freq_tables(word_freq, ngrams, ngram_top_k, ngram_min_count)
+    print_sketch_bounds(ngrams, ngram_top_k, ngram_min_count)
+    write_freq_handoffs(freqs, meta, os.path.dirname(notes_file))
+    print(f"Merged {counter['items']} notes into {notes_file}")
+    return (notes_file,) + freqs
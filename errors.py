@@ -0,0 +1,13 @@
+# errors.py
+# Exception untuk kesalahan yang sudah diketahui; CLI main.py memetakannya ke exit code.
+# Turunan LookupError/ValueError supaya pemanggil yang menangkap tipe dasar (menu) tetap jalan.
+
+class MissingInputError(LookupError):
+    # File handoff/antrian dari stage sebelumnya tidak ada, stale atau belum lengkap
+    pass
+
+class MissingNLTKDataError(MissingInputError):
+    pass
+
+class InvalidArgumentError(ValueError):
+    pass
@@ -2,58 +2,246 @@
 import requests
 import json
 import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from profiling import timed
+from checkpoint import open_checkpoint, get_checkpoint_state, stale_app_ids, save_reports, touch_reports, load_reports
+from handoff import HandoffWriter, GAMES_FILE, REPORTS_FILE, iter_records, iter_game_reports, write_records
 
-def extract_games():
-    url = "https://protondb.max-p.me/games/"
-    response = requests.get(url)
+# temp_reports.json dari versi sebelum format handoff, masih bisa diimpor ke checkpoint
+LEGACY_REPORTS_FILE = "temp_reports.json"
+
+# Bisa diarahkan ke stub server lokal untuk testing/benchmark
+BASE_URL = os.environ.get("PROTONDB_API_URL", "https://protondb.max-p.me")
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Daftar game yang tersimpan lebih tua dari ini (detik) diambil ulang supaya game baru ikut
+GAMES_MAX_AGE = 24 * 3600
+
+class RateLimiter:
+    # Membatasi jumlah request per detik untuk setiap host secara terpisah
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def create_session(pool_size=10):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch(url, session=None, rate_limiter=None, max_retries=3, backoff=0.5, timeout=30, headers=None):
+    # GET dengan retry + exponential backoff untuk 429/5xx dan error koneksi
+    client = session or requests
+    for attempt in range(max_retries + 1):
+        if rate_limiter:
+            rate_limiter.wait(url)
+        delay = backoff * (2 ** attempt)
+        try:
+            with timed("extract.http_fetch", items=1, cpu=False):
+                response = client.get(url, timeout=timeout, headers=headers)
+        except requests.RequestException:
+            if attempt == max_retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+        time.sleep(delay)
+
+def extract_games(session=None, rate_limiter=None, max_retries=3):
+    url = f"{BASE_URL}/games/"
+    response = fetch(url, session, rate_limiter, max_retries)
     if response.status_code == 200:
         return response.json()
     else:
         raise Exception(f"Failed to fetch games. Status code: {response.status_code}")
 
-def extract_reports(app_id):
-    url = f"https://protondb.max-p.me/games/{app_id}/reports/"
-    response = requests.get(url)
+def fetch_reports(app_id, etag=None, session=None, rate_limiter=None, max_retries=3):
+    # Return (status_code, reports, etag); status None berarti gagal koneksi
+    url = f"{BASE_URL}/games/{app_id}/reports/"
+    headers = {"If-None-Match": etag} if etag else None
+    try:
+        response = fetch(url, session, rate_limiter, max_retries, headers=headers)
+    except requests.RequestException as e:
+        print(f"Failed to fetch reports for appId {app_id}. Error: {e}")
+        return None, [], None
     if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Failed to fetch reports for appId {app_id}. Status code: {response.status_code}")
-        return []
+        return 200, response.json(), response.headers.get("ETag")
+    if response.status_code == 304:
+        return 304, None, etag
+    print(f"Failed to fetch reports for appId {app_id}. Status code: {response.status_code}")
+    return response.status_code, [], None
 
-def extract(limit=None):
-    print("Starting extraction process...")
-    games_file = "temp_games.json"
-    reports_file = "temp_reports.json"
-
-    # Cek apakah data sudah ada dalam file sementara
-    if os.path.exists(games_file) and os.path.exists(reports_file):
-        print("Loading existing extracted data from JSON files...")
-        with open(games_file, 'r') as gf:
-            games = json.load(gf)
+def extract_reports(app_id, session=None, rate_limiter=None, max_retries=3):
+    return fetch_reports(app_id, None, session, rate_limiter, max_retries)[1]
+
+def iter_fetch_reports(app_ids, etags=None, workers=8, rate_limit=None, max_retries=3):
+    # Yield (app_id, status, reports, etag) sesuai urutan app_ids; paling banyak
+    # workers * 4 request berjalan/tertahan sekaligus supaya memori tetap terbatas
+    etags = etags or {}
+    rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+    if workers <= 1:
+        for app_id in app_ids:
+            yield (app_id,) + fetch_reports(app_id, etags.get(app_id), None, rate_limiter, max_retries)
+        return
+
+    session = create_session(workers)
+    app_ids = iter(app_ids)
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit(app_id):
+                future = executor.submit(fetch_reports, app_id, etags.get(app_id), session, rate_limiter, max_retries)
+                pending.append((app_id, future))
+
+            for app_id in app_ids:
+                submit(app_id)
+                if len(pending) >= workers * 4:
+                    break
+            while pending:
+                app_id, future = pending.popleft()
+                next_app_id = next(app_ids, None)
+                if next_app_id is not None:
+                    submit(next_app_id)
+                yield (app_id,) + future.result()
+    finally:
+        session.close()
+
+def extract_reports_concurrent(games, workers=8, rate_limit=None, max_retries=3):
+    # Ambil report semua game secara paralel lewat satu session keep-alive
+    app_ids = [game["appId"] for game in games]
+    all_reports = {}
+    for i, (app_id, status, reports, etag) in enumerate(iter_fetch_reports(app_ids, None, workers, rate_limit, max_retries), 1):
+        all_reports[app_id] = reports
+        if i % 100 == 0 or i == len(app_ids):
+            print(f"Extracted reports for {i}/{len(app_ids)} games...")
+    return all_reports
+
+def seed_checkpoint(conn, reports_file):
+    # Impor file reports yang sudah ada supaya tidak perlu crawl ulang dari nol
+    print(f"Importing existing {reports_file} into checkpoint store...")
+    fetched_at = os.path.getmtime(reports_file)
+    if reports_file.endswith(".json"):
         with open(reports_file, 'r') as rf:
-            all_reports = json.load(rf)
-        print(f"Loaded {len(games)} games from {games_file}")
-        return games, all_reports
+            game_reports = [({"appId": int(app_id)}, reports) for app_id, reports in json.load(rf).items()]
+    else:
+        game_reports = iter_game_reports(reports_file)
+    for game, reports in game_reports:
+        save_reports(conn, game["appId"], reports, fetched_at=fetched_at)
 
-    # Jika tidak ada, lakukan ekstraksi
-    games = extract_games()
+def load_games(limit=None, max_age=None, games_file=GAMES_FILE, refresh=False):
+    # Daftar game diambil ulang jika belum ada, lebih tua dari GAMES_MAX_AGE,
+    # saat refresh report (max_age) atau jika dipaksa (refresh)
+    if os.path.exists(games_file) and max_age is None and not refresh \
+            and time.time() - os.path.getmtime(games_file) <= GAMES_MAX_AGE:
+        print(f"Loading existing game list from {games_file}...")
+        games = list(iter_records(games_file, "games"))
+    else:
+        games = extract_games()
+        write_records(games_file, "games", games)
     if limit:
         games = games[:limit]
         print(f"Limiting to {limit} games...")
     else:
         print(f"Processing all {len(games)} games...")
+    return games
 
-    all_reports = {}
-    for game in games:
-        app_id = game["appId"]
-        print(f"Extracting reports for {game['title']} (appId: {app_id})...")
-        all_reports[app_id] = extract_reports(app_id)
-
-    # Simpan ke file JSON sementara
-    with open(games_file, 'w') as gf:
-        json.dump(games, gf)
-    with open(reports_file, 'w') as rf:
-        json.dump(all_reports, rf)
-    print(f"Extracted data saved to {games_file} and {reports_file}")
+def iter_extract(games, workers=1, rate_limit=None, max_age=None, checkpoint_file="temp_checkpoint.db",
+                 reports_file=REPORTS_FILE):
+    # Yield (game, reports) per game sesuai urutan games; report baru langsung
+    # disimpan ke checkpoint sehingga run yang terputus bisa dilanjutkan
+    conn = open_checkpoint(checkpoint_file)
+    try:
+        state = get_checkpoint_state(conn)
+        seed_file = next((f for f in [reports_file, LEGACY_REPORTS_FILE] if os.path.exists(f)), None)
+        if not state and seed_file:
+            seed_checkpoint(conn, seed_file)
+            state = get_checkpoint_state(conn)
+
+        app_ids = [game["appId"] for game in games]
+        stale = stale_app_ids(state, app_ids, max_age)
+        print(f"{len(app_ids) - len(stale)} games up to date in checkpoint, {len(stale)} to fetch...")
+        if workers > 1 and stale:
+            print(f"Extracting reports with {workers} concurrent workers...")
+
+        stale_set = set(stale)
+        etags = {app_id: state[app_id][1] for app_id in stale if app_id in state}
+        fetched = iter_fetch_reports(stale, etags, workers, rate_limit)
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "failed": 0}
+        for i, game in enumerate(games, 1):
+            app_id = game["appId"]
+            if app_id not in stale_set:
+                yield game, load_reports(conn, [app_id])[app_id]
+                continue
+
+            _, status, reports, etag = next(fetched)
+            if status == 304:
+                touch_reports(conn, app_id)
+                counts["unchanged"] += 1
+                reports = load_reports(conn, [app_id])[app_id]
+            elif status == 200:
+                existed = app_id in state
+                with timed("extract.checkpoint_write", items=1, cpu=False):
+                    changed = save_reports(conn, app_id, reports, etag)
+                counts["changed" if existed and changed else "new" if not existed else "unchanged"] += 1
+            else:
+                # Tidak disimpan ke checkpoint supaya dicoba lagi di run berikutnya; game
+                # yang sudah ada di checkpoint tetap memakai report tersimpan
+                counts["failed"] += 1
+                if app_id in state:
+                    reports = load_reports(conn, [app_id])[app_id]
+            if workers <= 1:
+                print(f"Extracted reports for {game['title']} (appId: {app_id})...")
+            elif i % 100 == 0 or i == len(games):
+                print(f"Extracted reports for {i}/{len(games)} games...")
+            yield game, reports
+        print(f"Checkpoint: {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged, {counts['failed']} failed")
+    finally:
+        conn.close()
+
+def extract(limit=None, workers=1, rate_limit=None, max_age=None, checkpoint_file="temp_checkpoint.db", temp_files=True,
+            refresh_games=False):
+    # max_age (detik): game yang checkpoint-nya lebih tua dari ini diambil ulang;
+    # None berarti hanya game yang belum pernah diambil (resume).
+    # temp_files=False: hasil hanya dikembalikan, temp_reports.jsonl.gz tidak ditulis
+    print("Starting extraction process...")
+    games_file = GAMES_FILE
+    reports_file = REPORTS_FILE
+
+    with timed("extract", profile=True) as counter:
+        games = load_games(limit, max_age, games_file, refresh_games)
+        all_reports = {}
+        # Report ditulis ke file handoff per game, bersamaan dengan ekstraksi
+        writer = HandoffWriter(reports_file, "reports") if temp_files else None
+        try:
+            for game, reports in iter_extract(games, workers, rate_limit, max_age, checkpoint_file, reports_file):
+                all_reports[game["appId"]] = reports
+                counter["items"] += len(reports)
+                if writer is not None:
+                    writer.write({"app_id": game["appId"], "title": game.get("title"), "reports": reports})
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        if writer is not None:
+            writer.close()
+    if temp_files:
+        print(f"Extracted data saved to {games_file} and {reports_file}")
     print("Extraction completed!")
     return games, all_reports
@@ -0,0 +1,139 @@
+# handoff.py
+# Format file serah-terima antar stage (temp_*.jsonl.gz): JSON Lines terkompresi gzip.
+# Baris pertama adalah header {"format", "version", "kind", "meta"}, setiap baris
+# berikutnya satu record. File ditulis bertahap per record dan dibaca lazy lewat
+# iterator, jadi tidak ada stage yang perlu memuat seluruh file sekaligus.
+import gzip
+import json
+import os
+from errors import MissingInputError
+
+FORMAT = "protondb-handoff"
+# Naikkan setiap kali struktur record berubah; file versi lama dianggap stale
+FORMAT_VERSION = 1
+# Level rendah: file sementara, kecepatan tulis lebih penting dari rasio kompresi
+COMPRESS_LEVEL = 1
+
+GAMES_FILE = "temp_games.jsonl.gz"
+REPORTS_FILE = "temp_reports.jsonl.gz"
+NOTES_FILE = "temp_notes.jsonl.gz"
+FREQ_FILES = {
+    "word_freq": "temp_word_freq.jsonl.gz",
+    "bigram_freq": "temp_bigram_freq.jsonl.gz",
+    "trigram_freq": "temp_trigram_freq.jsonl.gz",
+    "technical_freq": "temp_technical_freq.jsonl.gz"
+}
+
+class HandoffWriter:
+    # Ditulis ke <path>.tmp lalu di-rename saat close(), sehingga run yang gagal di
+    # tengah jalan tidak meninggalkan file setengah jadi yang terbaca sebagai valid
+    def __init__(self, path, kind, meta=None, compresslevel=COMPRESS_LEVEL):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.count = 0
+        self.file = gzip.open(self.tmp_path, 'wt', encoding="utf-8", compresslevel=compresslevel)
+        header = {"format": FORMAT, "version": FORMAT_VERSION, "kind": kind, "meta": meta or {}}
+        self.file.write(json.dumps(header) + "\n")
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_records(path, kind, records, meta=None):
+    # records boleh berupa generator; return jumlah record yang ditulis
+    with HandoffWriter(path, kind, meta) as writer:
+        writer.write_many(records)
+    return writer.count
+
+def parse_header(path, line):
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise MissingInputError(f"{path} is not a {FORMAT} file; rerun the stage that writes it")
+    return header
+
+def open_handoff(path):
+    try:
+        return gzip.open(path, 'rt', encoding="utf-8")
+    except FileNotFoundError:
+        raise MissingInputError(f"{path} not found; run the stage that writes it first") from None
+
+def read_header(path):
+    with open_handoff(path) as f:
+        return parse_header(path, f.readline())
+
+def stale_reason(header, kind, meta=None):
+    # None jika header cocok; selain itu alasan file tidak bisa dipakai
+    if header["version"] != FORMAT_VERSION:
+        return f"written with handoff format v{header['version']}, expected v{FORMAT_VERSION}"
+    if header["kind"] != kind:
+        return f"contains {header['kind']} records, expected {kind}"
+    for key, value in (meta or {}).items():
+        if header["meta"].get(key) != value:
+            return f"{key} is {header['meta'].get(key)!r}, expected {value!r}"
+    return None
+
+def handoff_status(path, kind, meta=None, inputs=()):
+    # Untuk cache antar run: None jika file ada dan masih berlaku, selain itu alasannya.
+    # File yang lebih tua dari salah satu file inputs juga dianggap stale.
+    if not os.path.exists(path):
+        return "missing"
+    try:
+        reason = stale_reason(read_header(path), kind, meta)
+    except (LookupError, OSError, EOFError) as e:
+        return str(e)
+    if reason:
+        return reason
+    for input_path in inputs:
+        if os.path.exists(input_path) and os.path.getmtime(input_path) > os.path.getmtime(path):
+            return f"older than {input_path}"
+    return None
+
+def iter_records(path, kind, meta=None):
+    # File dibuka dan header dicek saat dipanggil (MissingInputError langsung
+    # muncul), record dibaca lazy saat iterator dikonsumsi
+    f = open_handoff(path)
+    try:
+        reason = stale_reason(parse_header(path, f.readline()), kind, meta)
+        if reason:
+            raise MissingInputError(f"{path} is stale ({reason}); rerun the stage that writes it")
+    except BaseException:
+        f.close()
+        raise
+    return _records(f)
+
+def _records(f):
+    with f:
+        for line in f:
+            yield json.loads(line)
+
+def iter_game_reports(path=REPORTS_FILE):
+    # Yield (game, reports) sesuai urutan ekstraksi dari file handoff reports
+    records = iter_records(path, "reports")
+    return (({"appId": record["app_id"], "title": record["title"]}, record["reports"]) for record in records)
+
+def freq_path(name, directory=""):
+    return os.path.join(directory, FREQ_FILES[name])
@@ -0,0 +1,110 @@
+# jobqueue.py
+# Antrian job berbasis SQLite untuk mode terdistribusi (distributed.py). Satu job = satu
+# shard game. Worker mengklaim job dengan lease yang diperpanjang selama job berjalan;
+# job yang lease-nya habis (worker crash/mati) bisa diklaim worker lain, sampai
+# max_attempts kali.
+import json
+import os
+import socket
+import sqlite3
+import time
+
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+def open_queue(path="temp_jobs.db"):
+    # Tanpa WAL: file antrian bisa berada di filesystem bersama yang dipakai beberapa
+    # mesin, dan WAL butuh shared memory di host yang sama. busy timeout menunggu
+    # giliran lock saat banyak worker mengklaim job bersamaan.
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY,
+            games TEXT,
+            status TEXT,
+            worker TEXT,
+            attempts INTEGER,
+            lease_until REAL,
+            started_at REAL,
+            finished_at REAL,
+            error TEXT
+        )
+    ''')
+    conn.execute("CREATE TABLE IF NOT EXISTS queue_meta (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def create_jobs(conn, shards, meta=None):
+    # Ganti isi antrian dengan job baru; job_id mengikuti urutan shard
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM jobs")
+        conn.execute("DELETE FROM queue_meta")
+        conn.executemany("INSERT INTO jobs (job_id, games, status, attempts) VALUES (?, ?, 'pending', 0)",
+                         [(job_id, json.dumps(games)) for job_id, games in enumerate(shards)])
+        conn.executemany("INSERT INTO queue_meta (key, value) VALUES (?, ?)",
+                         [(key, json.dumps(value)) for key, value in (meta or {}).items()])
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def get_queue_meta(conn):
+    return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM queue_meta")}
+
+def claim_job(conn, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, now=None):
+    # Klaim job pending (atau running yang lease-nya habis) dengan job_id terkecil.
+    # Return dict job atau None jika tidak ada yang bisa diklaim sekarang.
+    now = now or time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("UPDATE jobs SET status = 'failed', error = coalesce(error, 'lease expired') "
+                     "WHERE status = 'running' AND lease_until < ? AND attempts >= ?", (now, max_attempts))
+        row = conn.execute("SELECT job_id, games, status, worker, attempts FROM jobs "
+                           "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) "
+                           "ORDER BY job_id LIMIT 1", (now,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?, "
+                         "started_at = ?, finished_at = NULL WHERE job_id = ?", (worker, now + lease_seconds, now, row[0]))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+    job_id, games, status, previous_worker, attempts = row
+    # expired_from: worker sebelumnya jika job diambil alih setelah lease-nya habis
+    return {"job_id": job_id, "games": json.loads(games), "attempt": attempts + 1,
+            "expired_from": previous_worker if status == "running" else None}
+
+def renew_lease(conn, job_id, worker, lease_seconds=LEASE_SECONDS):
+    # False jika job sudah diambil alih worker lain
+    cursor = conn.execute("UPDATE jobs SET lease_until = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+                          (time.time() + lease_seconds, job_id, worker))
+    return cursor.rowcount == 1
+
+def complete_job(conn, job_id, worker):
+    cursor = conn.execute("UPDATE jobs SET status = 'done', lease_until = NULL, finished_at = ?, error = NULL "
+                          "WHERE job_id = ? AND worker = ? AND status = 'running'", (time.time(), job_id, worker))
+    return cursor.rowcount == 1
+
+def fail_job(conn, job_id, worker, error, max_attempts=MAX_ATTEMPTS):
+    # Kembali ke pending untuk dicoba lagi, atau failed setelah max_attempts percobaan
+    conn.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                 "lease_until = NULL, finished_at = ?, error = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+                 (max_attempts, time.time(), error, job_id, worker))
+
+def job_counts(conn):
+    return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+def active_jobs(conn, now=None):
+    # Job running yang lease-nya masih berlaku
+    return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running' AND lease_until >= ?",
+                        (now or time.time(),)).fetchone()[0]
+
+def list_jobs(conn):
+    columns = ["job_id", "games", "status", "worker", "attempts", "lease_until", "started_at", "finished_at", "error"]
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM jobs ORDER BY job_id")
+    return [dict(zip(columns, row), games=json.loads(row[1])) for row in rows]
@@ -2,313 +2,580 @@
 import pandas as pd
 import sqlite3
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
-from wordcloud import WordCloud
-import json
-import numpy as np
 from collections import Counter
+from profiling import timed, write_run_report, print_summary, reset
+from visualize import visualize, POS_COLUMNS
+from summary import summarize, REPORT_SENTIMENTS
+from ngrams import count_shard_ngrams
+from transform import TOPIC_KEYWORDS, new_totals, add_counts
+from errors import InvalidArgumentError
 
-def load(notes_data, word_freq_data, bigram_freq_data, trigram_freq_data):
-    print("Starting loading process...")
+# pyarrow opsional, hanya dibutuhkan untuk output Parquet/Arrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
-    # Simpan data sementara ke JSON
-    temp_notes_file = "temp_notes.json"
-    temp_word_freq_file = "temp_word_freq.json"
-    temp_bigram_freq_file = "temp_bigram_freq.json"
-    temp_trigram_freq_file = "temp_trigram_freq.json"
-
-    with open(temp_notes_file, 'w') as nf:
-        json.dump(notes_data, nf)
-    with open(temp_word_freq_file, 'w') as wf:
-        json.dump(word_freq_data, wf)
-    with open(temp_bigram_freq_file, 'w') as bf:
-        json.dump(bigram_freq_data, bf)
-    with open(temp_trigram_freq_file, 'w') as tf:
-        json.dump(trigram_freq_data, tf)
-    print(f"Temporary data saved to {temp_notes_file}, {temp_word_freq_file}, {temp_bigram_freq_file}, {temp_trigram_freq_file}")
+# Tipe kolom tabel notes; hanya kolom yang ada di notes_data (sesuai stage
+# transform yang aktif) yang dibuat
+NOTES_SCHEMA = {
+    "report_id": "INTEGER",
+    "app_id": "INTEGER",
+    "title": "TEXT",
+    "timestamp": "INTEGER",
+    "rating": "TEXT",
+    "proton_version": "TEXT",
+    "os": "TEXT",
+    "gpu_driver": "TEXT",
+    "cluster_id": "INTEGER",
+    "duplicate": "TEXT",
+    "note_text": "TEXT",
+    "word_count": "INTEGER",
+    "char_count": "INTEGER",
+    "sentence_count": "INTEGER",
+    "avg_word_length": "REAL",
+    "lexical_diversity": "REAL",
+    "tokens": "TEXT",
+    "stemmed_tokens": "TEXT",
+    "lemmatized_tokens": "TEXT",
+    "noun_count": "INTEGER",
+    "verb_count": "INTEGER",
+    "adjective_count": "INTEGER",
+    "adverb_count": "INTEGER",
+    "entities": "TEXT",
+    "sentiment": "TEXT",
+    "compound_score": "REAL",
+    "positive_score": "REAL",
+    "negative_score": "REAL",
+    "neutral_score": "REAL",
+    "topic_category": "TEXT"
+}
+NOTES_INDEXES = {"sentiment": "idx_notes_sentiment", "topic_category": "idx_notes_topic_category", "app_id": "idx_notes_app_id",
+                 "timestamp": "idx_notes_timestamp", "proton_version": "idx_notes_proton_version",
+                 "cluster_id": "idx_notes_cluster_id"}
+FREQ_TABLES = {"word_freq": "word", "bigram_freq": "bigram", "trigram_freq": "trigram"}
+# Panjang n-gram tiap tabel frekuensi (dihitung dari kolom notes.tokens)
+FREQ_ORDERS = {"word_freq": 1, "bigram_freq": 2, "trigram_freq": 3}
+# Batas parameter per query IN (...) (SQLITE_MAX_VARIABLE_NUMBER lama = 999)
+SQLITE_IN_CHUNK = 500
 
-    # Lanjutkan dengan penyimpanan permanen dan visualisasi
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = f"output_{timestamp}"
-    os.makedirs(output_dir, exist_ok=True)
+# Tabel agregat (dihitung ulang dari tabel notes setiap load) -> kolom group by.
+# Dashboard cukup membaca baris per key (primary key) tanpa scan seluruh notes.
+AGGREGATE_TABLES = {
+    "game_stats": ["app_id"],
+    "game_monthly_stats": ["app_id", "month"],
+    "monthly_stats": ["month"],
+    "proton_version_stats": ["proton_version"]
+}
+# Key agregat -> (ekspresi SQL, kolom notes yang dibutuhkan)
+AGGREGATE_KEYS = {
+    "app_id": ("app_id", "app_id"),
+    "month": ("strftime('%Y-%m', timestamp, 'unixepoch')", "timestamp"),
+    "proton_version": ("COALESCE(proton_version, 'unknown')", "proton_version")
+}
+RATINGS = ["platinum", "gold", "silver", "bronze", "borked"]
+SENTIMENTS = ["positive", "neutral", "negative"]
 
-    notes_csv = f"{output_dir}/protondb_notes_{timestamp}.csv"
-    word_freq_csv = f"{output_dir}/protondb_word_freq_{timestamp}.csv"
-    bigram_freq_csv = f"{output_dir}/protondb_bigram_freq_{timestamp}.csv"
-    trigram_freq_csv = f"{output_dir}/protondb_trigram_freq_{timestamp}.csv"
-    notes_db = f"{output_dir}/protondb_notes_analysis_{timestamp}.db"
+# Database SQLite persisten yang diperbarui setiap run (bukan file .db baru per timestamp)
+SQLITE_DB = "protondb.db"
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456"
+]
 
-    notes_df = pd.DataFrame(notes_data)
-    word_freq_df = pd.DataFrame(word_freq_data)
-    bigram_freq_df = pd.DataFrame(bigram_freq_data)
-    trigram_freq_df = pd.DataFrame(trigram_freq_data)
-
-    notes_df.to_csv(notes_csv, index=False)
-    word_freq_df.to_csv(word_freq_csv, index=False)
-    bigram_freq_df.to_csv(bigram_freq_csv, index=False)
-    trigram_freq_df.to_csv(trigram_freq_csv, index=False)
-    print(f"Notes saved to {notes_csv}")
-    print(f"Word frequency saved to {word_freq_csv}")
-    print(f"Bigram frequency saved to {bigram_freq_csv}")
-    print(f"Trigram frequency saved to {trigram_freq_csv}")
-
-    conn = sqlite3.connect(notes_db)
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS notes (
-            note_text TEXT,
-            word_count INTEGER,
-            char_count INTEGER,
-            sentence_count INTEGER,
-            avg_word_length REAL,
-            lexical_diversity REAL,
-            tokens TEXT,
-            stemmed_tokens TEXT,
-            lemmatized_tokens TEXT,
-            noun_count INTEGER,
-            verb_count INTEGER,
-            adjective_count INTEGER,
-            adverb_count INTEGER,
-            entities TEXT,
-            sentiment TEXT,
-            compound_score REAL,
-            positive_score REAL,
-            negative_score REAL,
-            neutral_score REAL,
-            topic_category TEXT
-        )
-    ''')
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS word_freq (
-            word TEXT,
-            frequency INTEGER
-        )
-    ''')
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS bigram_freq (
-            bigram TEXT,
-            frequency INTEGER
-        )
-    ''')
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS trigram_freq (
-            trigram TEXT,
-            frequency INTEGER
-        )
-    ''')
-    notes_df.to_sql("notes", conn, if_exists="replace", index=False)
-    word_freq_df.to_sql("word_freq", conn, if_exists="replace", index=False)
-    bigram_freq_df.to_sql("bigram_freq", conn, if_exists="replace", index=False)
-    trigram_freq_df.to_sql("trigram_freq", conn, if_exists="replace", index=False)
-    conn.commit()
-    conn.close()
-    print(f"Notes analysis saved to {notes_db}")
+OUTPUT_FORMATS = ("csv", "parquet", "arrow")
+OUTPUT_TABLES = ("notes", "word_freq", "bigram_freq", "trigram_freq", "technical_freq")
+# Kolom dengan sedikit nilai unik disimpan dengan dictionary encoding
+DICTIONARY_COLUMNS = ["sentiment", "topic_category"]
+
+def check_output_formats(output_formats):
+    unknown = [fmt for fmt in output_formats if fmt not in OUTPUT_FORMATS]
+    if unknown:
+        raise InvalidArgumentError(f"Unknown output format(s): {', '.join(unknown)}. Available: {', '.join(OUTPUT_FORMATS)}")
+    if pa is None and any(fmt != "csv" for fmt in output_formats):
+        raise ImportError("pyarrow is required for parquet/arrow output (pip install pyarrow)")
+
+def to_arrow_table(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for column in DICTIONARY_COLUMNS:
+        if column in table.column_names:
+            index = table.column_names.index(column)
+            table = table.set_column(index, column, pc.dictionary_encode(table[column]))
+    return table
+
+def write_table(df, path, fmt):
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        pq.write_table(to_arrow_table(df), path, compression="zstd")
+    elif fmt == "arrow":
+        # Arrow IPC tanpa kompresi supaya bisa di-memory-map tanpa decode
+        table = to_arrow_table(df)
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def read_table(path, columns=None):
+    # Baca satu tabel output sebagai DataFrame; Arrow IPC dan Parquet di-memory-map
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns)
+    if pa is None:
+        raise ImportError("pyarrow is required to read parquet/arrow output (pip install pyarrow)")
+    if path.endswith(".arrow"):
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns:
+                table = table.select(columns)
+            return table.to_pandas()
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    raise ValueError(f"Unsupported output file: {path}")
+
+def find_dataset(output_dir):
+    # Path tiap tabel di output_dir, memilih arrow > parquet > csv jika tersedia
+    dataset = {}
+    for name in OUTPUT_TABLES:
+        for fmt in ("arrow", "parquet", "csv"):
+            if fmt != "csv" and pa is None:
+                continue
+            matches = sorted(f for f in os.listdir(output_dir) if f.startswith(f"protondb_{name}_") and f.endswith(f".{fmt}"))
+            if matches:
+                dataset[name] = os.path.join(output_dir, matches[-1])
+                break
+    return dataset
+
+def notes_schema(columns):
+    return {column: NOTES_SCHEMA.get(column, "TEXT") for column in columns}
+
+def open_database(db_path=SQLITE_DB):
+    # isolation_level=None: transaksi dikontrol manual dengan BEGIN/COMMIT
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def ensure_notes_table(conn, columns):
+    # report_id menjadi primary key untuk upsert; kolom baru (mis. stage yang baru
+    # diaktifkan) ditambahkan ke tabel yang sudah ada
+    schema = notes_schema(columns)
+    column_defs = [f"{column} {column_type}" + (" PRIMARY KEY" if column == "report_id" else "")
+                   for column, column_type in schema.items()]
+    conn.execute(f"CREATE TABLE IF NOT EXISTS notes ({', '.join(column_defs)})")
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+    for column, column_type in schema.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE notes ADD COLUMN {column} {column_type}")
+
+def ensure_notes_indexes(conn):
+    # Dibuat setelah bulk insert: membangun index sekali lebih cepat daripada
+    # memperbaruinya untuk setiap baris pada load pertama
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+    for column, index in NOTES_INDEXES.items():
+        if column in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON notes ({column})")
+
+def fts5_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+def ensure_notes_fts(conn):
+    # Index full-text (FTS5, external content) atas note_text dan tokens. Dibangun
+    # sekali setelah bulk insert pertama, lalu dijaga trigger pada tabel notes.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+    if not {"report_id", "note_text", "tokens"} <= columns or not fts5_available(conn):
+        return False
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").fetchone():
+        return True
+    conn.execute("CREATE VIRTUAL TABLE notes_fts USING fts5(note_text, tokens, content='notes', content_rowid='report_id')")
+    conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+    conn.execute("""CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts (rowid, note_text, tokens) VALUES (new.report_id, new.note_text, new.tokens);
+    END""")
+    conn.execute("""CREATE TRIGGER notes_fts_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, note_text, tokens) VALUES ('delete', old.report_id, old.note_text, old.tokens);
+    END""")
+    conn.execute("""CREATE TRIGGER notes_fts_update AFTER UPDATE OF note_text, tokens ON notes
+        WHEN old.note_text IS NOT new.note_text OR old.tokens IS NOT new.tokens BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, note_text, tokens) VALUES ('delete', old.report_id, old.note_text, old.tokens);
+        INSERT INTO notes_fts (rowid, note_text, tokens) VALUES (new.report_id, new.note_text, new.tokens);
+    END""")
+    return True
+
+def ensure_freq_tables(conn):
+    for table, key in FREQ_TABLES.items():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({key} TEXT PRIMARY KEY, frequency INTEGER)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_frequency ON {table} (frequency)")
+    conn.execute("CREATE TABLE IF NOT EXISTS load_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+def freq_tables_incremental(conn):
+    # Tabel frekuensi dari versi lama (diganti setiap run) atau hasil hitungan approximate
+    # (--ngram-memory) harus dihitung ulang sekali
+    row = conn.execute("SELECT value FROM load_meta WHERE key = 'freq_tables'").fetchone()
+    return row is not None and row[0] == "incremental"
+
+def token_ngrams(tokens, n):
+    if n == 1:
+        return tokens
+    return [" ".join(gram) for gram in zip(*(tokens[i:] for i in range(n)))]
+
+def update_freq_deltas(deltas, tokens_text, sign):
+    # Tambah (sign=1) atau kurangi (sign=-1) kata/bigram/trigram satu note
+    tokens = (tokens_text or "").split()
+    for table, n in FREQ_ORDERS.items():
+        if sign > 0:
+            deltas[table].update(token_ngrams(tokens, n))
+        else:
+            deltas[table].subtract(token_ngrams(tokens, n))
+
+def stored_tokens(conn, report_ids):
+    found = {}
+    for i in range(0, len(report_ids), SQLITE_IN_CHUNK):
+        chunk = report_ids[i:i + SQLITE_IN_CHUNK]
+        found.update(conn.execute(f"SELECT report_id, tokens FROM notes WHERE report_id IN ({', '.join('?' * len(chunk))})",
+                                  chunk))
+    return found
+
+def delete_missing_notes(conn, report_ids, app_ids, deltas=None):
+    # Report yang hilang dari game yang ikut di run ini (dihapus/dikosongkan di ProtonDB)
+    # dihapus dari notes; game yang tidak ikut di run ini tidak disentuh
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS run_reports (report_id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS run_apps (app_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM run_reports")
+    conn.execute("DELETE FROM run_apps")
+    conn.executemany("INSERT OR IGNORE INTO run_reports VALUES (?)", ((report_id,) for report_id in report_ids))
+    conn.executemany("INSERT OR IGNORE INTO run_apps VALUES (?)", ((app_id,) for app_id in app_ids))
+    missing = conn.execute("SELECT report_id, tokens FROM notes WHERE app_id IN (SELECT app_id FROM run_apps) "
+                           "AND report_id NOT IN (SELECT report_id FROM run_reports)").fetchall()
+    for report_id, tokens in missing:
+        if deltas is not None:
+            update_freq_deltas(deltas, tokens, -1)
+    conn.executemany("DELETE FROM notes WHERE report_id = ?", ((report_id,) for report_id, tokens in missing))
+    return len(missing)
+
+def apply_freq_deltas(conn, deltas):
+    for table, key in FREQ_TABLES.items():
+        conn.executemany(f"INSERT INTO {table} ({key}, frequency) VALUES (?, ?) "
+                         f"ON CONFLICT({key}) DO UPDATE SET frequency = frequency + excluded.frequency",
+                         ((gram, delta) for gram, delta in deltas[table].items() if delta))
+        conn.execute(f"DELETE FROM {table} WHERE frequency <= 0")
+
+def rebuild_freq_tables(conn, batch_size=5000, ngram_memory=None):
+    # Hitung ulang penuh dari notes.tokens (load pertama/migrasi, atau --rebuild-freq);
+    # bigram/trigram dihitung per batch dengan ngrams.py. Dengan ngram_memory (MiB)
+    # kata/bigram/trigram dihitung approximate dengan SpaceSaving, seperti di transform
+    totals = new_totals(ngram_memory)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes'").fetchone():
+        cursor = conn.execute("SELECT tokens FROM notes")
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            token_lists = [(tokens or "").split() for (tokens,) in batch]
+            words = Counter()
+            for tokens in token_lists:
+                words.update(tokens)
+            add_counts(totals, words, count_shard_ngrams(token_lists))
+    ngrams = totals["ngrams"]
+    words = totals["word_freq"].items() if totals["word_freq"] is not None else ngrams.most_common(1)
+    totals = {"word_freq": words, "bigram_freq": ngrams.most_common(2), "trigram_freq": ngrams.most_common(3)}
+    # Index frekuensi dibangun ulang setelah insert, seperti index tabel notes
+    for table, key in FREQ_TABLES.items():
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_frequency")
+        conn.execute(f"DELETE FROM {table}")
+        conn.executemany(f"INSERT INTO {table} ({key}, frequency) VALUES (?, ?)", totals[table])
+        conn.execute(f"CREATE INDEX idx_{table}_frequency ON {table} (frequency)")
+    conn.execute("INSERT OR REPLACE INTO load_meta (key, value) VALUES ('freq_tables', ?)",
+                 ("approximate" if ngram_memory else "incremental",))
+
+def load_sqlite(notes_data, db_path=SQLITE_DB, batch_size=5000, rebuild_freq=False, ngram_memory=None):
+    # Bulk insert dalam satu transaksi. notes_data boleh berupa iterable (mis. dari
+    # transform.iter_notes_file) sehingga tidak perlu dimuat semua ke memori.
+    # Tabel frekuensi mencakup semua note di database dan diperbarui secara inkremental:
+    # hanya note baru, berubah (tokens beda) atau terhapus yang menggeser hitungannya.
+    # Dengan ngram_memory tabel frekuensi dihitung ulang approximate dalam memori terbatas.
+    rows = iter(notes_data)
+    first = next(rows, None)
+    conn = open_database(db_path)
+    stats = Counter()
+    try:
+        conn.execute("BEGIN")
+        ensure_freq_tables(conn)
+        incremental = not rebuild_freq and not ngram_memory and freq_tables_incremental(conn)
+        deltas = {table: Counter() for table in FREQ_TABLES} if incremental else None
+        if first is not None:
+            columns = list(first.keys())
+            ensure_notes_table(conn, columns)
+            value_columns = [column for column in columns if column != "report_id"]
+            updates = ", ".join(f"{column} = excluded.{column}" for column in value_columns)
+            # Baris yang isinya sama tidak ditulis ulang (dan tidak memicu trigger FTS)
+            changed = " OR ".join(f"notes.{column} IS NOT excluded.{column}" for column in value_columns)
+            upsert = (f"INSERT INTO notes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                      + (f" ON CONFLICT(report_id) DO UPDATE SET {updates} WHERE {changed}"
+                         if "report_id" in columns and value_columns else ""))
+            tracked = "report_id" in columns and "tokens" in columns
+            if incremental and not tracked:
+                # Tanpa report_id/tokens perubahan tidak bisa dilacak; hitung ulang penuh
+                incremental, deltas = False, None
+            report_ids = []
+            app_ids = set()
+
+            def write_batch(batch):
+                if tracked:
+                    ids = [row["report_id"] for row in batch]
+                    report_ids.extend(ids)
+                    app_ids.update(row.get("app_id") for row in batch)
+                    if incremental:
+                        previous = stored_tokens(conn, ids)
+                        for row in batch:
+                            old_tokens = previous.get(row["report_id"])
+                            if old_tokens == row["tokens"]:
+                                continue
+                            if row["report_id"] in previous:
+                                update_freq_deltas(deltas, old_tokens, -1)
+                                stats["changed"] += 1
+                            else:
+                                stats["new"] += 1
+                            update_freq_deltas(deltas, row["tokens"], 1)
+                conn.executemany(upsert, [tuple(row.get(column) for column in columns) for row in batch])
+                stats["notes"] += len(batch)
+
+            batch = [first]
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    write_batch(batch)
+                    batch = []
+            write_batch(batch)
+            if tracked and "app_id" in columns:
+                stats["deleted"] = delete_missing_notes(conn, report_ids, app_ids - {None}, deltas)
+            ensure_notes_indexes(conn)
+            ensure_notes_fts(conn)
+
+        if incremental:
+            apply_freq_deltas(conn, deltas)
+        else:
+            rebuild_freq_tables(conn, ngram_memory=ngram_memory)
+            stats["rebuilt"] = 1
+        with timed("load.sqlite_aggregates"):
+            stats["aggregates"] = len(build_aggregates(conn))
+        # Penanda untuk query.py: cache hasil query dibuang setelah ada load baru
+        conn.execute("INSERT OR REPLACE INTO load_meta (key, value) VALUES ('last_load', ?)", (datetime.now().isoformat(),))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return stats
+
+def aggregate_measures(columns, keys):
+    # (nama kolom, ekspresi SQL) untuk kolom notes yang tersedia
+    measures = [("report_count", "COUNT(*)")]
+    if "app_id" in keys and "title" in columns:
+        measures.append(("title", "MAX(title)"))
+    if "timestamp" in columns:
+        measures += [("first_report", "MIN(timestamp)"), ("last_report", "MAX(timestamp)")]
+    measures.append(("avg_word_count", "AVG(word_count)"))
+    if "rating" in columns:
+        measures += [(f"{rating}_count", f"SUM(lower(rating) = '{rating}')") for rating in RATINGS]
+    if "sentiment" in columns:
+        measures += [(f"{sentiment}_count", f"SUM(sentiment = '{sentiment}')") for sentiment in SENTIMENTS]
+    if "compound_score" in columns:
+        measures.append(("avg_compound", "AVG(compound_score)"))
+    if "topic_category" in columns:
+        # topic_category bisa berisi beberapa topik ("performance, bugs"), jadi dihitung per topik
+        measures += [(f"{topic}_count", f"SUM(instr(topic_category, '{topic}') > 0)") for topic in list(TOPIC_KEYWORDS) + ["other"]]
+    return measures
 
+def build_aggregates(conn):
+    # Dihitung ulang dari seluruh tabel notes dengan GROUP BY di SQLite (satu scan per
+    # tabel), sehingga ikut mencerminkan note yang diubah atau dihapus di run ini
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+    built = []
+    for table, keys in AGGREGATE_TABLES.items():
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        if not columns or any(AGGREGATE_KEYS[key][1] not in columns for key in keys):
+            continue
+        measures = aggregate_measures(columns, keys)
+        column_defs = [f"{key} {'INTEGER' if key == 'app_id' else 'TEXT'}" for key in keys]
+        column_defs += [f"{name} {'TEXT' if name == 'title' else 'REAL' if name.startswith('avg_') else 'INTEGER'}"
+                        for name, expr in measures]
+        conn.execute(f"CREATE TABLE {table} ({', '.join(column_defs)}, PRIMARY KEY ({', '.join(keys)}))")
+        key_exprs = [AGGREGATE_KEYS[key][0] for key in keys]
+        where = " AND ".join(f"{AGGREGATE_KEYS[key][1]} IS NOT NULL" for key in keys if key != "proton_version")
+        conn.execute(f"INSERT INTO {table} SELECT {', '.join(key_exprs + [expr for name, expr in measures])} FROM notes"
+                     + (f" WHERE {where}" if where else "") + f" GROUP BY {', '.join(key_exprs)}")
+        built.append(table)
+    if "game_stats" in built:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_game_stats_report_count ON game_stats (report_count)")
+        if "title" in columns:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_game_stats_title ON game_stats (title)")
+    if "game_monthly_stats" in built:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_game_monthly_stats_month ON game_monthly_stats (month)")
+    return built
+
+def load(notes_data, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data=(), db_path=SQLITE_DB,
+         output_formats=("csv",), visualize_charts=True, plot_workers=None, output_dir=None, rebuild_freq=False,
+         ngram_memory=None):
+    # output_dir None berarti output_<timestamp>. File handoff temp_*.jsonl.gz ditulis
+    # oleh stage yang menghasilkannya (extract/transform), bukan di sini
+    check_output_formats(output_formats)
+    with timed("load", items=len(notes_data), profile=True):
+        output_dir, timestamp = write_outputs(notes_data, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data,
+                                              db_path, output_formats, visualize_charts, plot_workers, output_dir,
+                                              rebuild_freq, ngram_memory)
+
+    # Laporan run (JSON) mencakup semua stage sejak laporan terakhir
+    print_summary()
+    report_file = write_run_report(f"{output_dir}/run_report_{timestamp}.json", {"output_dir": output_dir})
+    print(f"Run report saved to {report_file}")
+    reset()
+    return output_dir
+
+def print_analysis_report(summary):
+    has_sentiment = summary.has("sentiment")
+    has_topics = summary.has("topic_category")
     print("\n=== DETAILED ANALYSIS RESULTS ===\n")
 
     # 1. Issue Categories Analysis
-    topic_counts = notes_df["topic_category"].value_counts()
-    print("1. DISTRIBUTION OF ISSUE CATEGORIES:")
-    print("-" * 50)
-    for category, count in topic_counts.items():
-        percentage = (count / len(notes_df)) * 100
-        print(f"- {category}: {count} reports ({percentage:.1f}%)")
-    print()
+    if has_topics:
+        print("1. DISTRIBUTION OF ISSUE CATEGORIES:")
+        print("-" * 50)
+        for category, count in summary.topic_distribution():
+            percentage = (count / summary.count) * 100
+            print(f"- {category}: {count} reports ({percentage:.1f}%)")
+        print()
 
     # 2. Sentiment Analysis
-    sentiment_counts = notes_df["sentiment"].value_counts()
-    print("2. USER SENTIMENT ANALYSIS:")
-    print("-" * 50)
-    for sentiment, count in sentiment_counts.items():
-        percentage = (count / len(notes_df)) * 100
-        print(f"- {sentiment.title()}: {count} reports ({percentage:.1f}%)")
-    
-    # Calculate average sentiment scores
-    avg_compound = notes_df["compound_score"].mean()
-    print(f"\nOverall Sentiment Score: {avg_compound:.3f}")
-    print(f"(Positive > 0.05, Neutral: -0.05 to 0.05, Negative < -0.05)\n")
+    if has_sentiment:
+        print("2. USER SENTIMENT ANALYSIS:")
+        print("-" * 50)
+        for sentiment, count in summary.sentiment_distribution():
+            percentage = (count / summary.count) * 100
+            print(f"- {sentiment.title()}: {count} reports ({percentage:.1f}%)")
+
+        # Calculate average sentiment scores
+        print(f"\nOverall Sentiment Score: {summary.mean('compound_score'):.3f}")
+        print(f"(Positive > 0.05, Neutral: -0.05 to 0.05, Negative < -0.05)\n")
 
     # 3. Performance Terms Analysis
     print("3. PERFORMANCE-RELATED TERMS FREQUENCY:")
     print("-" * 50)
-    performance_words = ["fps", "performance", "smooth", "lag", "stutter", "slow", "fast", "run"]
-    perf_freq = {w["word"]: w["frequency"] for w in word_freq_data if w["word"] in performance_words}
-    for word, freq in sorted(perf_freq.items(), key=lambda x: x[1], reverse=True):
+    for word, freq in sorted(summary.perf_freq.items(), key=lambda x: x[1], reverse=True):
         print(f"- '{word}' mentioned {freq} times")
     print()
 
     # 4. Parts of Speech Analysis by Sentiment
-    print("4. LANGUAGE USAGE BY SENTIMENT:")
-    print("-" * 50)
-    pos_by_sentiment = notes_df.groupby("sentiment")[["noun_count", "verb_count", "adjective_count", "adverb_count"]].mean()
-    for sentiment in pos_by_sentiment.index:
-        print(f"\n{sentiment.title()} Reviews Average Word Usage:")
-        for pos in ["noun_count", "verb_count", "adjective_count", "adverb_count"]:
-            print(f"- {pos.replace('_count', 's').title()}: {pos_by_sentiment.loc[sentiment, pos]:.1f}")
-    print()
+    if has_sentiment and summary.has(*POS_COLUMNS):
+        print("4. LANGUAGE USAGE BY SENTIMENT:")
+        print("-" * 50)
+        for sentiment, means in summary.pos_by_sentiment().items():
+            print(f"\n{sentiment.title()} Reviews Average Word Usage:")
+            for pos in POS_COLUMNS:
+                print(f"- {pos.replace('_count', 's').title()}: {means[pos]:.1f}")
+        print()
 
     # 5. Most Common Words by Sentiment
-    print("5. MOST COMMON WORDS BY SENTIMENT:")
-    print("-" * 50)
-    for sentiment in ["positive", "negative", "neutral"]:
-        sentiment_tokens = " ".join(notes_df[notes_df["sentiment"] == sentiment]["tokens"]).split()
-        word_freq = Counter(sentiment_tokens).most_common(5)
-        print(f"\n{sentiment.title()} Review Common Words:")
-        for word, count in word_freq:
-            print(f"- '{word}': {count} times")
-    print()
+    if has_sentiment:
+        print("5. MOST COMMON WORDS BY SENTIMENT:")
+        print("-" * 50)
+        for sentiment in REPORT_SENTIMENTS:
+            print(f"\n{sentiment.title()} Review Common Words:")
+            for word, count in summary.common_words(sentiment):
+                print(f"- '{word}': {count} times")
+        print()
 
     # 6. Review Length Analysis
-    print("6. REVIEW LENGTH STATISTICS BY CATEGORY:")
-    print("-" * 50)
-    length_stats = notes_df.groupby("topic_category")["word_count"].agg(['mean', 'min', 'max'])
-    for category in length_stats.index:
-        stats = length_stats.loc[category]
-        print(f"\n{category}:")
-        print(f"- Average length: {stats['mean']:.1f} words")
-        print(f"- Range: {stats['min']} to {stats['max']} words")
-    print()
+    if has_topics:
+        print("6. REVIEW LENGTH STATISTICS BY CATEGORY:")
+        print("-" * 50)
+        for category, (mean, low, high) in summary.length_by_topic().items():
+            print(f"\n{category}:")
+            print(f"- Average length: {mean:.1f} words")
+            print(f"- Range: {low} to {high} words")
+        print()
 
     # 7. Sentiment vs Length Analysis
-    print("7. SENTIMENT AND REVIEW LENGTH CORRELATION:")
-    print("-" * 50)
-    correlation = notes_df["word_count"].corr(notes_df["compound_score"])
-    print(f"Correlation coefficient: {correlation:.3f}")
-    print("(1 = perfect positive correlation, -1 = perfect negative correlation)")
-    print()
+    if summary.has("compound_score"):
+        print("7. SENTIMENT AND REVIEW LENGTH CORRELATION:")
+        print("-" * 50)
+        print(f"Correlation coefficient: {summary.correlation.value():.3f}")
+        print("(1 = perfect positive correlation, -1 = perfect negative correlation)")
+        print()
 
     # 8. Technical Issues Analysis
     print("8. MOST REPORTED TECHNICAL ISSUES:")
     print("-" * 50)
-    technical_bigrams = [b for b in bigram_freq_data 
-                        if any(word in b["bigram"].lower() 
-                        for word in ["not working", "doesn work", "cant run", "black screen", 
-                                   "crash game", "game crash", "no sound", "proton ge"])][:10]
-    for bigram in technical_bigrams:
+    for bigram in summary.technical:
         print(f"- '{bigram['bigram']}': reported {bigram['frequency']} times")
     print()
 
     # Additional Statistics
     print("9. GENERAL STATISTICS:")
     print("-" * 50)
-    print(f"Total number of reviews analyzed: {len(notes_df)}")
-    print(f"Average words per review: {notes_df['word_count'].mean():.1f}")
-    print(f"Average sentences per review: {notes_df['sentence_count'].mean():.1f}")
-    print(f"Average lexical diversity: {notes_df['lexical_diversity'].mean():.3f}")
+    print(f"Total number of reviews analyzed: {summary.count}")
+    print(f"Average words per review: {summary.mean('word_count'):.1f}")
+    print(f"Average sentences per review: {summary.mean('sentence_count'):.1f}")
+    print(f"Average lexical diversity: {summary.mean('lexical_diversity'):.3f}")
     print()
 
-    # Visualisasi yang lebih bermakna untuk konteks ProtonDB
-    vis_dir = f"{output_dir}/visualizations"
-    os.makedirs(vis_dir, exist_ok=True)
-    sns.set_style("whitegrid")
-    plt.rcParams['figure.figsize'] = (12, 8)
-
-    # 1. Bar Plot: Distribusi Kategori Masalah
-    plt.figure()
-    topic_counts = notes_df["topic_category"].value_counts()
-    sns.barplot(x=topic_counts.values, y=topic_counts.index, palette="RdYlGn_r")
-    plt.title("Distribusi Kategori Masalah di ProtonDB", fontsize=14)
-    plt.xlabel("Jumlah Laporan", fontsize=12)
-    plt.ylabel("Kategori Masalah", fontsize=12)
-    plt.tight_layout()
-    plt.savefig(f"{vis_dir}/issue_categories_{timestamp}.png")
-    plt.close()
-
-    # 2. Pie Chart: Sentimen Pengguna terhadap Proton
-    plt.figure()
-    sentiment_counts = notes_df["sentiment"].value_counts()
-    colors = {"positive": "#2ecc71", "neutral": "#f1c40f", "negative": "#e74c3c"}
-    plt.pie(sentiment_counts, labels=sentiment_counts.index, 
-            autopct="%1.1f%%", 
-            colors=[colors[s] for s in sentiment_counts.index])
-    plt.title("Sentimen Pengguna terhadap Kompatibilitas Proton", fontsize=14)
-    plt.tight_layout()
-    plt.savefig(f"{vis_dir}/proton_sentiment_{timestamp}.png")
-    plt.close()
-
-    # 3. Bar Plot: Kata-kata Terkait Performa
-    plt.figure()
-    performance_words = ["fps", "performance", "smooth", "lag", "stutter", "slow", "fast", "run"]
-    perf_freq = {w["word"]: w["frequency"] for w in word_freq_data if w["word"] in performance_words}
-    if perf_freq:
-        sns.barplot(x=list(perf_freq.values()), y=list(perf_freq.keys()), palette="YlOrRd")
-        plt.title("Frekuensi Kata Terkait Performa Game", fontsize=14)
-        plt.xlabel("Frekuensi", fontsize=12)
-        plt.ylabel("Kata", fontsize=12)
-        plt.tight_layout()
-        plt.savefig(f"{vis_dir}/performance_terms_{timestamp}.png")
-    plt.close()
-
-    # 4. Grouped Bar Plot: Distribusi POS Tags berdasarkan Sentimen
-    plt.figure()
-    pos_by_sentiment = notes_df.groupby("sentiment")[["noun_count", "verb_count", "adjective_count", "adverb_count"]].mean()
-    pos_by_sentiment.plot(kind="bar", width=0.8)
-    plt.title("Penggunaan Kata berdasarkan Sentimen Review", fontsize=14)
-    plt.xlabel("Sentimen", fontsize=12)
-    plt.ylabel("Rata-rata Jumlah Kata", fontsize=12)
-    plt.legend(title="Jenis Kata")
-    plt.tight_layout()
-    plt.savefig(f"{vis_dir}/pos_by_sentiment_{timestamp}.png")
-    plt.close()
-
-    # 5. Word Cloud berdasarkan Sentimen
-    for sentiment in ["positive", "negative", "neutral"]:
-        plt.figure(figsize=(10, 6))
-        sentiment_tokens = " ".join(notes_df[notes_df["sentiment"] == sentiment]["tokens"])
-        if sentiment_tokens.strip():
-            color = "YlGn" if sentiment == "positive" else "Reds" if sentiment == "negative" else "Greys"
-            wordcloud = WordCloud(width=800, height=400, 
-                                background_color="white",
-                                colormap=color).generate(sentiment_tokens)
-            plt.imshow(wordcloud, interpolation="bilinear")
-            plt.axis("off")
-            plt.title(f"Kata-kata Umum dalam Review {sentiment.title()}", fontsize=14)
-            plt.tight_layout()
-            plt.savefig(f"{vis_dir}/wordcloud_{sentiment}_{timestamp}.png")
-        plt.close()
-
-    # 6. Box Plot: Panjang Review berdasarkan Kategori Masalah
-    plt.figure()
-    sns.boxplot(x="topic_category", y="word_count", data=notes_df, palette="Set3")
-    plt.xticks(rotation=45, ha="right")
-    plt.title("Panjang Review berdasarkan Kategori Masalah", fontsize=14)
-    plt.xlabel("Kategori Masalah", fontsize=12)
-    plt.ylabel("Jumlah Kata", fontsize=12)
-    plt.tight_layout()
-    plt.savefig(f"{vis_dir}/review_length_by_category_{timestamp}.png")
-    plt.close()
-
-    # 7. Scatter Plot: Hubungan Sentimen dengan Panjang Review
-    plt.figure()
-    sns.scatterplot(data=notes_df, x="word_count", y="compound_score", 
-                    hue="topic_category", alpha=0.6)
-    plt.axhline(y=0, color='r', linestyle='--', alpha=0.3)
-    plt.title("Hubungan Panjang Review dengan Sentimen", fontsize=14)
-    plt.xlabel("Jumlah Kata", fontsize=12)
-    plt.ylabel("Skor Sentimen", fontsize=12)
-    plt.legend(title="Kategori Masalah", bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
-    plt.savefig(f"{vis_dir}/sentiment_vs_length_{timestamp}.png")
-    plt.close()
-
-    # 8. Bar Plot: Bigram Terkait Masalah Teknis
-    plt.figure()
-    technical_bigrams = [b for b in bigram_freq_data 
-                        if any(word in b["bigram"].lower() 
-                        for word in ["not working", "doesn work", "cant run", "black screen", 
-                                   "crash game", "game crash", "no sound", "proton ge"])][:10]
-    if technical_bigrams:
-        sns.barplot(x=[b["frequency"] for b in technical_bigrams], 
-                   y=[b["bigram"] for b in technical_bigrams], 
-                   palette="Reds_r")
-        plt.title("Masalah Teknis yang Sering Dilaporkan", fontsize=14)
-        plt.xlabel("Frekuensi", fontsize=12)
-        plt.ylabel("Masalah", fontsize=12)
-        plt.tight_layout()
-        plt.savefig(f"{vis_dir}/technical_issues_{timestamp}.png")
-    plt.close()
-
-    print("All visualizations saved in", vis_dir)
+def write_outputs(notes_data, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data=(), db_path=SQLITE_DB,
+                  output_formats=("csv",), visualize_charts=True, plot_workers=None, output_dir=None, rebuild_freq=False,
+                  ngram_memory=None):
+    # Tabel frekuensi di output (file, laporan, chart) adalah tabel run ini dari transform
+    # (ikut --ngram-top-k/--ngram-min-count/--ngram-memory); tabel seluruh riwayat note
+    # diperbarui inkremental di protondb.db
+    print("Starting loading process...")
+
+    # Lanjutkan dengan penyimpanan permanen dan visualisasi
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_dir = output_dir or f"output_{timestamp}"
+    os.makedirs(output_dir, exist_ok=True)
+
+    with timed("load.sqlite_write", items=len(notes_data)):
+        stats = load_sqlite(notes_data, db_path, rebuild_freq=rebuild_freq, ngram_memory=ngram_memory)
+    if ngram_memory:
+        print(f"Notes analysis saved to {db_path} (frequency tables recounted approximately from all stored notes "
+              f"within {ngram_memory:g} MiB)")
+    elif stats["rebuilt"]:
+        print(f"Notes analysis saved to {db_path} (frequency tables rebuilt from all stored notes)")
+    else:
+        print(f"Notes analysis saved to {db_path} (frequency tables updated for {stats['new']} new, "
+              f"{stats['changed']} changed and {stats['deleted']} deleted notes)")
+
+    notes_df = pd.DataFrame(notes_data)
+    word_freq_df = pd.DataFrame(word_freq_data, columns=["word", "frequency"])
+    bigram_freq_df = pd.DataFrame(bigram_freq_data, columns=["bigram", "frequency"])
+    trigram_freq_df = pd.DataFrame(trigram_freq_data, columns=["trigram", "frequency"])
+    technical_freq_df = pd.DataFrame(technical_freq_data, columns=["bigram", "frequency"])
+
+    tables = {"notes": notes_df, "word_freq": word_freq_df, "bigram_freq": bigram_freq_df, "trigram_freq": trigram_freq_df,
+              "technical_freq": technical_freq_df}
+    for fmt in output_formats:
+        with timed(f"load.{fmt}_write", items=len(notes_df)):
+            for name, df in tables.items():
+                path = f"{output_dir}/protondb_{name}_{timestamp}.{fmt}"
+                write_table(df, path, fmt)
+                print(f"{name.replace('_', ' ').title()} saved to {path}")
+
+    # Semua angka laporan dan input chart dihitung sekali di sini
+    with timed("load.summary", items=len(notes_data)):
+        summary = summarize(notes_data, word_freq_data, technical_freq_data)
+    with timed("load.analysis_report"):
+        print_analysis_report(summary)
+
+    # Chart dirender paralel di visualize.py; bisa dilewati dan dijalankan nanti
+    # dengan: python visualize.py <output_dir>
+    if visualize_charts:
+        visualize(summary, output_dir, timestamp, plot_workers)
     print("Loading and visualization completed!")
-    return output_dir
+    return output_dir, timestamp
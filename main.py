@@ -1,26 +1,62 @@
 # main.py
+# Tanpa argumen: menu interaktif. Dengan subcommand: CLI non-interaktif untuk cron/scheduler,
+# mis. python main.py run-all --limit 500 --fetch-workers 16 --workers 4 --formats csv parquet
+import argparse
 import sys
+import traceback
 from extract import extract
-from transform import transform
-from load import load
-import json
+from transform import transform, iter_notes_file, ALL_STAGES, TOKENIZERS
+from pipeline import extract_transform
+from handoff import REPORTS_FILE, NOTES_FILE, FREQ_FILES, iter_game_reports, iter_records, read_header
+from dedup import DEDUP_MODES
+from distributed import QUEUE_FILE, SHARD_DIR, plan_jobs, run_worker, queue_status, merge_partials
+from jobqueue import LEASE_SECONDS, MAX_ATTEMPTS
+from errors import MissingInputError, InvalidArgumentError
+
+# Exit code CLI (2 = argumen tidak valid, dari argparse)
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_MISSING_INPUT = 3
+
+def read_extracted():
+    # Daftar game diambil dari file reports: game tanpa report tidak menghasilkan note
+    games, all_reports = [], {}
+    for game, reports in iter_game_reports(REPORTS_FILE):
+        games.append(game)
+        all_reports[game["appId"]] = reports
+    return games, all_reports
+
+def read_transformed():
+    # Record dibaca per baris dari file handoff, tanpa json.load seluruh file sekaligus
+    notes_data = list(iter_notes_file(NOTES_FILE))
+    freqs = [list(iter_records(path, kind)) for kind, path in FREQ_FILES.items()]
+    return (notes_data,) + tuple(freqs)
+
+def transformed_ngram_memory():
+    # --ngram-memory transform yang menulis file frekuensi; load memakai batas yang sama
+    return read_header(FREQ_FILES["word_freq"])["meta"].get("ngram_memory")
 
 def display_menu():
     print("\n=== ProtonDB ETL Menu ===")
     print("1. Extract Data")
     print("2. Transform Data")
     print("3. Load Data (dan Visualisasi)")
+    print("4. Extract + Transform (pipeline streaming, hemat memori; load tetap memuat semua notes)")
     print("0. Keluar")
-    choice = input("Pilih opsi (0-3): ")
+    choice = input("Pilih opsi (0-4): ")
     return choice
 
-def main():
+def menu():
     games = None
     all_reports = None
     notes_data = None
     word_freq_data = None
     bigram_freq_data = None
     trigram_freq_data = None
+    technical_freq_data = None
+    notes_file = None
+    ngram_memory = None
 
     while True:
         choice = display_menu()
@@ -28,7 +64,10 @@ def main():
         if choice == "1":
             try:
                 limit = int(input("Masukkan limit jumlah game (kosongkan untuk semua): ") or 0)
-                games, all_reports = extract(limit if limit > 0 else None)
+                workers = int(input("Jumlah request paralel (kosongkan untuk 8): ") or 8)
+                max_age_hours = float(input("Ambil ulang report yang lebih tua dari N jam (kosongkan untuk lanjutkan saja): ") or -1)
+                games, all_reports = extract(limit if limit > 0 else None, workers=max(workers, 1),
+                                             max_age=max_age_hours * 3600 if max_age_hours >= 0 else None)
                 print(f"Data berhasil diekstrak: {len(games)} game.")
             except ValueError as e:
                 print(f"Input tidak valid: {e}")
@@ -37,50 +76,249 @@ def main():
 
         elif choice == "2":
             if games is None or all_reports is None:
-                print("Mencoba memuat data ekstraksi dari file JSON sementara...")
+                print("Mencoba memuat data ekstraksi dari file handoff sementara...")
                 try:
-                    with open("temp_games.json", 'r') as gf:
-                        games = json.load(gf)
-                    with open("temp_reports.json", 'r') as rf:
-                        all_reports = json.load(rf)
+                    games, all_reports = read_extracted()
                     print(f"Loaded {len(games)} games from temp files.")
-                except FileNotFoundError:
-                    print("File sementara tidak ditemukan. Silakan lakukan ekstraksi (opsi 1) terlebih dahulu!")
+                except (FileNotFoundError, LookupError) as e:
+                    print(f"File sementara tidak bisa dipakai ({e}). Silakan lakukan ekstraksi (opsi 1) terlebih dahulu!")
                     continue
             try:
-                notes_data, word_freq_data, bigram_freq_data, trigram_freq_data = transform(games, all_reports)
+                workers = int(input("Jumlah proses worker NLP (kosongkan untuk 1): ") or 1)
+                stages = input(f"Stage analisis, pisahkan dengan koma (kosongkan untuk semua: {', '.join(ALL_STAGES)}): ").strip()
+                stages = [stage.strip() for stage in stages.split(",") if stage.strip()] or None
+                tokenizer = input("Tokenizer (nltk/fast, kosongkan untuk nltk): ").strip() or "nltk"
+                notes_data, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data = transform(
+                    games, all_reports, workers=max(workers, 1), stages=stages, tokenizer=tokenizer)
+                ngram_memory = None
                 print(f"Transformasi selesai: {len(notes_data)} notes diproses.")
             except Exception as e:
                 print(f"Error saat transformasi: {e}")
 
         elif choice == "3":
-            if notes_data is None or word_freq_data is None or bigram_freq_data is None or trigram_freq_data is None:
-                print("Mencoba memuat data transformasi dari file JSON sementara...")
+            if notes_data is None and notes_file is not None and word_freq_data is not None:
+                notes_data = list(iter_notes_file(notes_file))
+            if notes_data is None or None in (word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data):
+                print("Mencoba memuat data transformasi dari file handoff sementara...")
                 try:
-                    with open("temp_notes.json", 'r') as nf:
-                        notes_data = json.load(nf)
-                    with open("temp_word_freq.json", 'r') as wf:
-                        word_freq_data = json.load(wf)
-                    with open("temp_bigram_freq.json", 'r') as bf:
-                        bigram_freq_data = json.load(bf)
-                    with open("temp_trigram_freq.json", 'r') as tf:
-                        trigram_freq_data = json.load(tf)
+                    notes_data, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data = read_transformed()
+                    ngram_memory = transformed_ngram_memory()
                     print(f"Loaded {len(notes_data)} notes from temp files.")
-                except FileNotFoundError:
-                    print("File sementara tidak ditemukan. Silakan lakukan transformasi (opsi 2) terlebih dahulu!")
+                except (FileNotFoundError, LookupError) as e:
+                    print(f"File sementara tidak bisa dipakai ({e}). Silakan lakukan transformasi (opsi 2) terlebih dahulu!")
                     continue
             try:
-                output_dir = load(notes_data, word_freq_data, bigram_freq_data, trigram_freq_data)
+                formats = input("Format output, pisahkan dengan koma (csv,parquet,arrow; kosongkan untuk csv): ").strip()
+                formats = [fmt.strip() for fmt in formats.split(",") if fmt.strip()] or ["csv"]
+                charts = input("Render visualisasi sekarang? (Y/n, n = nanti lewat visualize.py): ").strip().lower() != "n"
+                # Import di sini supaya menu tampil tanpa menunggu pandas/pyarrow
+                from load import load
+                output_dir = load(notes_data, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data,
+                                  output_formats=formats, visualize_charts=charts, ngram_memory=ngram_memory)
                 print(f"Data berhasil disimpan di {output_dir}")
             except Exception as e:
                 print(f"Error saat loading: {e}")
 
+        elif choice == "4":
+            try:
+                limit = int(input("Masukkan limit jumlah game (kosongkan untuk semua): ") or 0)
+                fetch_workers = int(input("Jumlah request paralel (kosongkan untuk 8): ") or 8)
+                workers = int(input("Jumlah proses worker NLP (kosongkan untuk 1): ") or 1)
+                batch_size = int(input("Ukuran batch note (kosongkan untuk 200): ") or 200)
+                notes_file, word_freq_data, bigram_freq_data, trigram_freq_data, technical_freq_data = extract_transform(
+                    limit if limit > 0 else None, fetch_workers=max(fetch_workers, 1), workers=max(workers, 1),
+                    batch_size=max(batch_size, 1))
+                notes_data = None
+                all_reports = None
+                ngram_memory = None
+                print(f"Streaming selesai: notes tersimpan di {notes_file}.")
+            except ValueError as e:
+                print(f"Input tidak valid: {e}")
+            except Exception as e:
+                print(f"Error saat streaming: {e}")
+
         elif choice == "0":
             print("Keluar dari program.")
             sys.exit(0)
 
         else:
-            print("Opsi tidak valid, pilih antara 0-3.")
+            print("Opsi tidak valid, pilih antara 0-4.")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ProtonDB ETL pipeline. Run without arguments for the interactive menu.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_extract_args(p):
+        p.add_argument("--limit", type=int, default=None, help="Only process the first N games")
+        p.add_argument("--fetch-workers", type=int, default=8, help="Concurrent report requests")
+        p.add_argument("--rate-limit", type=float, default=None, help="Max requests per second per host")
+        p.add_argument("--max-age", type=float, default=None, help="Refetch reports older than N hours (default: resume only)")
+        p.add_argument("--refresh-games", action="store_true",
+                       help="Refetch the game list even if temp_games.jsonl.gz is less than a day old")
+        p.add_argument("--checkpoint", default="temp_checkpoint.db", help="Report checkpoint database")
+
+    def add_transform_args(p):
+        p.add_argument("--workers", type=int, default=1, help="NLP worker processes")
+        p.add_argument("--stages", nargs="+", choices=ALL_STAGES, default=None, help="Analysis stages (default: all)")
+        p.add_argument("--tokenizer", choices=list(TOKENIZERS), default="nltk",
+                       help="nltk (Punkt + word_tokenize) or fast (precompiled regex, no punkt data)")
+        p.add_argument("--cache", default="temp_note_cache.db", help="Per-note analysis cache database")
+        p.add_argument("--no-cache", action="store_true", help="Analyse every note without the cache")
+        p.add_argument("--cache-max-entries", type=int, default=500000)
+        p.add_argument("--ngram-top-k", type=int, default=None, help="Keep only the N most frequent bigrams/trigrams")
+        p.add_argument("--ngram-min-count", type=int, default=1, help="Drop bigrams/trigrams seen fewer than N times")
+        p.add_argument("--dedup", choices=DEDUP_MODES, default="exact",
+                       help="Reuse the analysis of duplicate notes: exact (identical text) or near (MinHash/LSH)")
+        p.add_argument("--ngram-memory", type=float, default=None,
+                       help="Count words/bigrams/trigrams approximately within N MiB (default: exact counts)")
+
+    def add_load_args(p):
+        p.add_argument("--output-dir", default=None, help="Output directory (default: output_<timestamp>)")
+        p.add_argument("--formats", nargs="+", choices=["csv", "parquet", "arrow"], default=["csv"])
+        p.add_argument("--db", default="protondb.db", help="Persistent SQLite database")
+        p.add_argument("--no-charts", action="store_true", help="Skip charts (render later with visualize.py)")
+        p.add_argument("--plot-workers", type=int, default=None, help="Chart rendering processes (default: CPU count)")
+        p.add_argument("--rebuild-freq", action="store_true",
+                       help="Recount the stored frequency tables from every note instead of applying only this run's changes")
+
+    add_extract_args(subparsers.add_parser("extract", help="Fetch games and reports into temp_games.jsonl.gz/temp_reports.jsonl.gz"))
+    add_transform_args(subparsers.add_parser("transform", help="Analyse temp_reports.jsonl.gz into temp_notes.jsonl.gz and frequency tables"))
+    add_load_args(subparsers.add_parser("load", help="Write outputs, SQLite and charts from the temp_*.jsonl.gz transform results"))
+    run_all = subparsers.add_parser("run-all", help="Extract, transform and load in one process")
+    add_extract_args(run_all)
+    add_transform_args(run_all)
+    add_load_args(run_all)
+    run_all.add_argument("--stream", action="store_true",
+                         help="Pipeline extract and transform: analyse reports in batches while fetching continues "
+                              "(bounds the memory of extract and transform only; load still holds every note)")
+    run_all.add_argument("--batch-size", type=int, default=200, help="Notes per batch with --stream")
+    run_all.add_argument("--queue-size", type=int, default=64, help="Games buffered between extract and transform with --stream")
+    run_all.add_argument("--keep-temp", action="store_true", help="Also write the temp_*.jsonl.gz handoff files")
+
+    # Mode terdistribusi: queue -> beberapa worker (proses/mesin) -> merge -> load
+    def add_queue_args(p):
+        p.add_argument("--queue-file", default=QUEUE_FILE, help="SQLite job queue (on a shared filesystem for several machines)")
+        p.add_argument("--shard-dir", default=SHARD_DIR, help="Directory of the partial results of each shard")
+
+    queue_cmd = subparsers.add_parser("queue", help="Split the game list into shards in the job queue")
+    add_queue_args(queue_cmd)
+    queue_cmd.add_argument("--limit", type=int, default=None, help="Only process the first N games")
+    queue_cmd.add_argument("--max-age", type=float, default=None, help="Refetch reports older than N hours (default: resume only)")
+    queue_cmd.add_argument("--refresh-games", action="store_true",
+                           help="Refetch the game list even if temp_games.jsonl.gz is less than a day old")
+    queue_cmd.add_argument("--shard-size", type=int, default=100, help="Games per shard")
+    queue_cmd.add_argument("--stages", nargs="+", choices=ALL_STAGES, default=None, help="Analysis stages (default: all)")
+    queue_cmd.add_argument("--tokenizer", choices=list(TOKENIZERS), default="nltk")
+    queue_cmd.add_argument("--dedup", choices=DEDUP_MODES, default="exact")
+    queue_cmd.add_argument("--ngram-memory", type=float, default=None,
+                           help="Count words/bigrams/trigrams approximately within N MiB per worker and in merge")
+    queue_cmd.add_argument("--status", action="store_true", help="Only print the state of the existing queue")
+    worker = subparsers.add_parser("worker", help="Claim shards from the job queue and extract + transform them")
+    add_queue_args(worker)
+    worker.add_argument("--worker-id", default=None, help="Worker name in the queue (default: host:pid)")
+    worker.add_argument("--fetch-workers", type=int, default=8, help="Concurrent report requests")
+    worker.add_argument("--rate-limit", type=float, default=None, help="Max requests per second per host")
+    worker.add_argument("--checkpoint", default="temp_checkpoint.db", help="Report checkpoint database")
+    worker.add_argument("--workers", type=int, default=1, help="NLP worker processes")
+    worker.add_argument("--batch-size", type=int, default=200, help="Notes per analysis batch")
+    worker.add_argument("--cache", default="temp_note_cache.db", help="Per-note analysis cache database")
+    worker.add_argument("--no-cache", action="store_true", help="Analyse every note without the cache")
+    worker.add_argument("--cache-max-entries", type=int, default=500000)
+    worker.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Seconds before a silent worker's shard is re-queued")
+    worker.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Attempts per shard before it is marked failed")
+    worker.add_argument("--poll-interval", type=float, default=5, help="Seconds between claims while other workers finish")
+    merge = subparsers.add_parser("merge", help="Combine the finished shards into the temp_*.jsonl.gz transform results")
+    add_queue_args(merge)
+    merge.add_argument("--ngram-top-k", type=int, default=None, help="Keep only the N most frequent bigrams/trigrams")
+    merge.add_argument("--ngram-min-count", type=int, default=1, help="Drop bigrams/trigrams seen fewer than N times")
+    return parser
+
+def run_extract(args, temp_files=True):
+    return extract(args.limit, workers=max(args.fetch_workers, 1), rate_limit=args.rate_limit,
+                   max_age=args.max_age * 3600 if args.max_age is not None else None,
+                   checkpoint_file=args.checkpoint, temp_files=temp_files, refresh_games=args.refresh_games)
+
+def run_transform_stage(args, games, all_reports, temp_files=True, game_reports=None):
+    return transform(games, all_reports, workers=max(args.workers, 1), stages=args.stages,
+                     cache_file=None if args.no_cache else args.cache, cache_max_entries=args.cache_max_entries,
+                     temp_files=temp_files, tokenizer=args.tokenizer, ngram_top_k=args.ngram_top_k,
+                     ngram_min_count=args.ngram_min_count, game_reports=game_reports, dedup=args.dedup,
+                     ngram_memory=args.ngram_memory)
+
+def run_load(args, transformed, ngram_memory=None):
+    from load import load
+    return load(*transformed, db_path=args.db, output_formats=args.formats, visualize_charts=not args.no_charts,
+                plot_workers=args.plot_workers, output_dir=args.output_dir, rebuild_freq=args.rebuild_freq,
+                ngram_memory=ngram_memory)
+
+def run_cli(argv):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "extract":
+            games, all_reports = run_extract(args)
+            print(f"Extracted {len(games)} games.")
+        elif args.command == "transform":
+            # Report dibaca lazy per game dari file handoff
+            notes_data = run_transform_stage(args, None, None, game_reports=iter_game_reports(REPORTS_FILE))[0]
+            print(f"Transformed {len(notes_data)} notes.")
+        elif args.command == "load":
+            output_dir = run_load(args, read_transformed(), transformed_ngram_memory())
+            print(f"Output saved to {output_dir}")
+        elif args.command == "queue":
+            if args.status:
+                counts, jobs = queue_status(args.queue_file)
+                print(f"{len(jobs)} shards: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+                for job in jobs:
+                    if job["status"] == "failed":
+                        print(f"- shard {job['job_id']} failed after {job['attempts']} attempts: {job['error']}")
+            else:
+                plan_jobs(args.limit, args.shard_size, args.max_age * 3600 if args.max_age is not None else None,
+                          args.stages, args.tokenizer, args.dedup, args.queue_file, args.shard_dir, args.ngram_memory,
+                          args.refresh_games)
+        elif args.command == "worker":
+            run_worker(args.queue_file, args.shard_dir, args.worker_id, max(args.fetch_workers, 1), max(args.workers, 1),
+                       max(args.batch_size, 1), args.rate_limit, args.checkpoint, None if args.no_cache else args.cache,
+                       args.cache_max_entries, args.lease, max(args.max_attempts, 1), args.poll_interval)
+        elif args.command == "merge":
+            notes_file = merge_partials(args.queue_file, args.shard_dir, NOTES_FILE, args.ngram_top_k, args.ngram_min_count)[0]
+            print(f"Merged shards into {notes_file}; run the load command next.")
+        elif args.command == "run-all":
+            # Data diteruskan langsung antar stage di memori; temp_*.jsonl.gz hanya ditulis dengan --keep-temp
+            if args.stream:
+                notes_file, *freqs = extract_transform(
+                    args.limit, fetch_workers=max(args.fetch_workers, 1), workers=max(args.workers, 1),
+                    batch_size=max(args.batch_size, 1), stages=args.stages, rate_limit=args.rate_limit,
+                    max_age=args.max_age * 3600 if args.max_age is not None else None, checkpoint_file=args.checkpoint,
+                    cache_file=None if args.no_cache else args.cache, cache_max_entries=args.cache_max_entries,
+                    queue_size=max(args.queue_size, 1), tokenizer=args.tokenizer, ngram_top_k=args.ngram_top_k,
+                    ngram_min_count=args.ngram_min_count, dedup=args.dedup, ngram_memory=args.ngram_memory,
+                    refresh_games=args.refresh_games)
+                # Load (file output, laporan, chart) tetap memuat semua notes ke memori
+                transformed = (list(iter_notes_file(notes_file)), *freqs)
+            else:
+                games, all_reports = run_extract(args, args.keep_temp)
+                transformed = run_transform_stage(args, games, all_reports, args.keep_temp)
+            output_dir = run_load(args, transformed, args.ngram_memory)
+            print(f"Output saved to {output_dir}")
+    except MissingInputError as e:
+        # File handoff/antrian dari stage sebelumnya atau data NLTK belum ada
+        print(f"Missing input: {e}", file=sys.stderr)
+        return EXIT_MISSING_INPUT
+    except InvalidArgumentError as e:
+        print(f"Invalid argument: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except Exception as e:
+        # Kesalahan lain (termasuk bug) dicatat lengkap dengan traceback
+        traceback.print_exc()
+        print(f"Error during {args.command}: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        menu()
+    sys.exit(run_cli(argv))
 
 if __name__ == "__main__":
     main()
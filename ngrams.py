@@ -0,0 +1,298 @@
+# ngrams.py
+# Penghitungan bigram/trigram dengan token yang di-intern menjadi id integer.
+# Setiap n-gram disimpan sebagai satu key int64 (id dipack 21 bit per token),
+# dihitung dengan NumPy per shard, lalu digabung di proses utama. Urutan hasil
+# sama dengan Counter.most_common(): frekuensi turun, tie mengikuti kemunculan pertama.
+import numpy as np
+from errors import InvalidArgumentError
+
+ID_BITS = 21
+ID_MASK = (1 << ID_BITS) - 1
+# Key tertunda digabung setelah melebihi max(COMPACT_SIZE, 1/4 jumlah n-gram unik),
+# sehingga memori tetap sebanding dengan hasil akhir dan biaya gabung teramortisasi
+COMPACT_SIZE = 200000
+
+def _empty():
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+def pack(components):
+    keys = np.zeros(len(components[0]), dtype=np.int64)
+    for component in components:
+        keys = (keys << ID_BITS) | component
+    return keys
+
+def unpack(keys, n):
+    return [(keys >> (ID_BITS * (n - 1 - i))) & ID_MASK for i in range(n)]
+
+def count_shard_ngrams(token_lists, orders=(2, 3)):
+    # Dijalankan di worker: vocab lokal shard + (keys, counts, first) per orde n-gram.
+    # first = posisi kemunculan pertama di shard, untuk urutan tie saat digabung.
+    flat = [token for tokens in token_lists for token in tokens]
+    # dict.fromkeys menjaga urutan kemunculan pertama; id = posisi di vocab
+    vocab = {token: i for i, token in enumerate(dict.fromkeys(flat))}
+    ids = np.fromiter(map(vocab.__getitem__, flat), dtype=np.int64, count=len(flat))
+    note_ids = np.repeat(np.arange(len(token_lists)), [len(tokens) for tokens in token_lists])
+    result = {"vocab": list(vocab)}
+    for n in orders:
+        if len(ids) < n:
+            result[n] = _empty()
+            continue
+        # n-gram hanya di dalam satu note: token awal dan akhir berasal dari note yang sama
+        starts = np.flatnonzero(note_ids[:len(ids) - n + 1] == note_ids[n - 1:])
+        keys = pack([ids[starts + i] for i in range(n)])
+        keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        result[n] = (keys, counts, first.astype(np.int64))
+    return result
+
+def _sum_parts(parts):
+    # Gabung beberapa (keys, counts, first): jumlahkan count, ambil first terkecil per key
+    keys = np.concatenate([part[0] for part in parts])
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    counts = np.add.reduceat(np.concatenate([part[1] for part in parts])[order], starts)
+    first = np.minimum.reduceat(np.concatenate([part[2] for part in parts])[order], starts)
+    return keys[starts], counts, first
+
+def counter_counts(counter):
+    # Counter kata satu shard dalam bentuk hasil count_shard_ngrams (orde 1); urutan
+    # Counter = urutan kemunculan pertama, jadi posisinya dipakai sebagai first
+    positions = np.arange(len(counter), dtype=np.int64)
+    return {"vocab": list(counter), 1: (positions, np.fromiter(counter.values(), dtype=np.int64, count=len(counter)), positions)}
+
+class NgramCounts:
+    # Akumulator global di proses utama; shard harus ditambahkan sesuai urutan
+    def __init__(self, orders=(2, 3)):
+        self.orders = orders
+        self.vocab = {}
+        self.tokens = []
+        self.shards = 0
+        self.counts = {n: _empty() for n in orders}
+        self.pending = {n: [] for n in orders}
+        self.pending_size = {n: 0 for n in orders}
+        self.indexes = {}
+
+    def intern(self, token):
+        token_id = self.vocab.get(token)
+        if token_id is None:
+            token_id = self.vocab[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def add(self, shard_counts):
+        remap = np.array([self.intern(token) for token in shard_counts["vocab"]], dtype=np.int64)
+        if len(self.tokens) > ID_MASK:
+            raise ValueError(f"Vocabulary exceeds {ID_MASK + 1} distinct tokens; n-gram ids no longer fit in 64 bits")
+        for n in self.orders:
+            keys, counts, first = shard_counts[n]
+            if not len(keys):
+                continue
+            keys = pack([remap[component] for component in unpack(keys, n)])
+            self.pending[n].append((keys, counts, (self.shards << 32) | first))
+            self.pending_size[n] += len(keys)
+            if self.pending_size[n] >= max(COMPACT_SIZE, len(self.counts[n][0]) // 4):
+                self.compact(n)
+        self.shards += 1
+        self.indexes = {}
+
+    def compact(self, n=None):
+        # Gabungkan key tertunda: urutkan, lalu jumlahkan count dan ambil first terkecil per key
+        for n in [n] if n else self.orders:
+            if not self.pending[n]:
+                continue
+            self.counts[n] = _sum_parts([self.counts[n]] + self.pending[n])
+            self.pending[n] = []
+            self.pending_size[n] = 0
+
+    def export(self):
+        # Bentuk sama dengan hasil count_shard_ngrams (first diganti peringkat kemunculan
+        # pertama), supaya hitungan dari proses/mesin lain bisa digabung lewat add()
+        self.compact()
+        result = {"vocab": list(self.tokens)}
+        for n in self.orders:
+            keys, counts, first = self.counts[n]
+            rank = np.empty(len(first), dtype=np.int64)
+            rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+            result[n] = (keys, counts, rank)
+        return result
+
+    def __len__(self):
+        return sum(len(self.counts[n][0]) + self.pending_size[n] for n in self.orders)
+
+    def _rank(self, n, rows=None, top_k=None, min_count=1):
+        self.compact(n)
+        keys, counts, first = self.counts[n]
+        if rows is None:
+            rows = np.arange(len(keys))
+        if min_count > 1:
+            rows = rows[counts[rows] >= min_count]
+        rows = rows[np.lexsort((first[rows], -counts[rows]))]
+        return rows[:top_k] if top_k else rows
+
+    def _decode(self, n, rows):
+        keys, counts, first = self.counts[n]
+        components = [component.tolist() for component in unpack(keys[rows], n)]
+        tokens = self.tokens
+        return [(" ".join(tokens[i] for i in ids), count)
+                for ids, count in zip(zip(*components), counts[rows].tolist())]
+
+    def most_common(self, n, top_k=None, min_count=1):
+        # List (n-gram sebagai string, frekuensi), seperti Counter.most_common()
+        return self._decode(n, self._rank(n, top_k=top_k, min_count=min_count))
+
+    def _index(self, n):
+        # Indeks per posisi token: id token terurut -> baris n-gram (untuk searchsorted)
+        if n not in self.indexes:
+            self.compact(n)
+            index = []
+            for component in unpack(self.counts[n][0], n):
+                order = np.argsort(component, kind="stable")
+                index.append((component, order, component[order]))
+            self.indexes[n] = index
+        return self.indexes[n]
+
+    def lookup(self, phrases, n, top_k=None, min_count=1):
+        # N-gram orde n yang memuat frasa (urutan token utuh) di posisi mana pun; beberapa
+        # frasa sekaligus (list) diurutkan bersama seperti most_common()
+        if isinstance(phrases, str):
+            phrases = [phrases]
+        index = self._index(n)
+        matches = [np.empty(0, dtype=np.int64)]
+        for phrase in phrases:
+            phrase_ids = [self.vocab.get(token) for token in phrase.split()]
+            if not phrase_ids or None in phrase_ids or len(phrase_ids) > n:
+                continue
+            for offset in range(n - len(phrase_ids) + 1):
+                component, order, sorted_ids = index[offset]
+                lo, hi = np.searchsorted(sorted_ids, [phrase_ids[0], phrase_ids[0] + 1])
+                rows = order[lo:hi]
+                for i, token_id in enumerate(phrase_ids[1:], 1):
+                    rows = rows[index[offset + i][0][rows] == token_id]
+                matches.append(rows)
+        rows = np.unique(np.concatenate(matches))
+        return self._decode(n, self._rank(n, rows, top_k, min_count))
+
+# Perkiraan memori per counter SpaceSaving (key, count, first, error int64), termasuk
+# buffer shard yang belum digabung dan array sementara saat penggabungan
+SKETCH_ENTRY_BYTES = 96
+
+def sketch_capacity(memory_mb, orders=(1, 2, 3)):
+    capacity = int(memory_mb * 1024 * 1024 // (SKETCH_ENTRY_BYTES * len(orders)))
+    if capacity < 1:
+        raise InvalidArgumentError(f"ngram memory budget of {memory_mb} MiB is too small")
+    return capacity
+
+def _merge_summaries(a, floor_a, b, floor_b, capacity):
+    # Gabungan dua ringkasan Space-Saving (a, b = keys unik, counts, first, errors). Key
+    # yang hanya ada di satu ringkasan bisa muncul sampai floor kali di ringkasan lain,
+    # jadi floor itu ditambahkan ke count dan error-nya. Hanya `capacity` count terbesar
+    # yang disimpan; floor baru = count terbesar yang dibuang.
+    keys = np.concatenate((a[0], b[0]))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    shared = np.diff(np.append(starts, len(keys))) == 2
+    overlap = shared * (floor_a + floor_b)
+    counts = np.add.reduceat(np.concatenate((a[1] + floor_b, b[1] + floor_a))[order], starts) - overlap
+    first = np.minimum.reduceat(np.concatenate((a[2], b[2]))[order], starts)
+    errors = np.add.reduceat(np.concatenate((a[3] + floor_b, b[3] + floor_a))[order], starts) - overlap
+    keys = keys[starts]
+    floor = floor_a + floor_b
+    if len(keys) > capacity:
+        rows = np.lexsort((first, -counts))
+        floor = max(floor, int(counts[rows[capacity]]))
+        rows = rows[:capacity]
+        keys, counts, first, errors = keys[rows], counts[rows], first[rows], errors[rows]
+    return (keys, counts, first, errors), floor
+
+class SpaceSaving(NgramCounts):
+    # Hitungan approximate dengan memori terbatas (Space-Saving yang bisa digabung antar
+    # shard): paling banyak `capacity` counter per orde; orde 1 = kata (counter_counts).
+    # Untuk setiap n-gram yang disimpan, count - error <= frekuensi sebenarnya <= count;
+    # n-gram yang tidak disimpan muncul paling banyak floor[n] kali.
+    def __init__(self, capacity, orders=(1, 2, 3)):
+        super().__init__(orders)
+        if capacity < 1:
+            raise InvalidArgumentError("capacity must be at least 1")
+        self.capacity = capacity
+        self.errors = {n: np.empty(0, dtype=np.int64) for n in orders}
+        self.floor = {n: 0 for n in orders}
+        self.total = {n: 0 for n in orders}
+        self.live_tokens = 0
+
+    def add(self, shard_counts):
+        # Input: hasil count_shard_ngrams/counter_counts (hitungan exact satu shard) atau
+        # export() SpaceSaving lain (dengan errors, floor dan total)
+        remap = np.array([self.intern(token) for token in shard_counts["vocab"]], dtype=np.int64)
+        if len(self.tokens) > ID_MASK:
+            raise ValueError(f"Vocabulary exceeds {ID_MASK + 1} distinct tokens; n-gram ids no longer fit in 64 bits")
+        floors = shard_counts.get("floor", {})
+        totals = shard_counts.get("total", {})
+        for n in self.orders:
+            if n not in shard_counts:
+                continue
+            keys, counts, first, *errors = shard_counts[n]
+            self.total[n] += int(totals.get(n, counts.sum()))
+            if not len(keys):
+                self.floor[n] += floors.get(n, 0)
+                continue
+            keys = pack([remap[component] for component in unpack(keys, n)])
+            first = (self.shards << 32) | first
+            if errors:
+                # Ringkasan dari proses lain langsung digabung
+                self.compact(n)
+                summary, self.floor[n] = _merge_summaries(self.counts[n] + (self.errors[n],), self.floor[n],
+                                                          (keys, counts, first, errors[0]), floors.get(n, 0), self.capacity)
+                self.counts[n], self.errors[n] = summary[:3], summary[3]
+                continue
+            self.pending[n].append((keys, counts, first))
+            self.pending_size[n] += len(keys)
+            if self.pending_size[n] >= self.capacity:
+                self.compact(n)
+        self.shards += 1
+        self.indexes = {}
+        if len(self.tokens) >= max(self.capacity, 2 * self.live_tokens):
+            self.prune_vocab()
+
+    def compact(self, n=None):
+        # Hitungan exact shard yang tertunda dijumlahkan dulu, lalu digabung ke ringkasan
+        for n in [n] if n else self.orders:
+            if not self.pending[n]:
+                continue
+            keys, counts, first = _sum_parts(self.pending[n])
+            self.pending[n] = []
+            self.pending_size[n] = 0
+            summary, self.floor[n] = _merge_summaries(self.counts[n] + (self.errors[n],), self.floor[n],
+                                                      (keys, counts, first, np.zeros(len(keys), dtype=np.int64)), 0, self.capacity)
+            self.counts[n], self.errors[n] = summary[:3], summary[3]
+
+    def prune_vocab(self):
+        # Buang token yang tidak lagi dipakai counter mana pun, supaya vocab ikut terbatas
+        self.compact()
+        components = [component for n in self.orders for component in unpack(self.counts[n][0], n)]
+        used = np.unique(np.concatenate(components)) if components else np.empty(0, dtype=np.int64)
+        remap = np.full(len(self.tokens), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        for n in self.orders:
+            keys, counts, first = self.counts[n]
+            if len(keys):
+                self.counts[n] = (pack([remap[component] for component in unpack(keys, n)]), counts, first)
+        self.tokens = [self.tokens[i] for i in used.tolist()]
+        self.vocab = {token: i for i, token in enumerate(self.tokens)}
+        self.live_tokens = len(self.tokens)
+        self.indexes = {}
+
+    def export(self):
+        result = super().export()
+        result["floor"] = dict(self.floor)
+        result["total"] = dict(self.total)
+        for n in self.orders:
+            result[n] = result[n] + (self.errors[n],)
+        return result
+
+    def error_bound(self, n, top_k=None, min_count=1):
+        # total = jumlah n-gram yang dihitung; max_error = overestimate terbesar di antara
+        # baris hasil most_common dengan argumen yang sama; floor = batas n-gram lainnya
+        rows = self._rank(n, top_k=top_k, min_count=min_count)
+        max_error = int(self.errors[n][rows].max()) if len(rows) else 0
+        return {"total": self.total[n], "rows": len(rows), "floor": self.floor[n], "max_error": max_error}
@@ -0,0 +1,152 @@
+# nltk_resources.py
+# Data dan model NLTK untuk transform. Tidak ada download saat import: data lokal
+# dicek sekali per proses, model dimuat saat pertama dipakai lalu dipakai ulang.
+# Download data (sekali, butuh internet): python nltk_resources.py --download
+# Cek data lokal saja:                   python nltk_resources.py
+import argparse
+import os
+from errors import MissingNLTKDataError, InvalidArgumentError
+
+# Download otomatis saat data hilang hanya jika diminta eksplisit
+AUTO_DOWNLOAD = os.environ.get("PROTONDB_NLTK_DOWNLOAD") == "1"
+
+# Resource -> (package, path) untuk NLTK >= 3.9 dan untuk versi lama (pickle)
+RESOURCES = {
+    "punkt": (("punkt_tab", "tokenizers/punkt_tab/english/"), ("punkt", "tokenizers/punkt/english.pickle")),
+    "stopwords": (("stopwords", "corpora/stopwords"),) * 2,
+    "averaged_perceptron_tagger": (("averaged_perceptron_tagger_eng", "taggers/averaged_perceptron_tagger_eng/"),
+                                   ("averaged_perceptron_tagger", "taggers/averaged_perceptron_tagger/")),
+    "maxent_ne_chunker": (("maxent_ne_chunker_tab", "chunkers/maxent_ne_chunker_tab/english_ace_multiclass/"),
+                          ("maxent_ne_chunker", "chunkers/maxent_ne_chunker/")),
+    "words": (("words", "corpora/words"),) * 2,
+    "vader_lexicon": (("vader_lexicon", "sentiment/vader_lexicon.zip"),) * 2,
+    "wordnet": (("wordnet", "corpora/wordnet"),) * 2
+}
+
+# Resource yang dibutuhkan setiap model
+MODEL_RESOURCES = {
+    "sent_tokenize": ["punkt"],
+    "word_tokenize": ["punkt"],
+    "stop_words": ["stopwords"],
+    "stemmer": [],
+    "lemmatizer": ["wordnet"],
+    "tagger": ["averaged_perceptron_tagger"],
+    "chunker": ["averaged_perceptron_tagger", "maxent_ne_chunker", "words"],
+    "sid": ["vader_lexicon"]
+}
+
+_verified = set()
+_models = {}
+
+def _modern_nltk():
+    import nltk
+    major, minor = (int(part) for part in nltk.__version__.split(".")[:2])
+    return (major, minor) >= (3, 9)
+
+def resource_package(name):
+    # (package, path) yang dipakai versi NLTK terpasang
+    if name not in RESOURCES:
+        raise InvalidArgumentError(f"Unknown NLTK resource: {name}. Available: {', '.join(RESOURCES)}")
+    return RESOURCES[name][0 if _modern_nltk() else 1]
+
+def missing_resources(names):
+    # Cek data lokal lewat nltk.data.find (tanpa akses jaringan); hasil positif di-cache
+    import nltk
+    missing = []
+    for name in names:
+        if name in _verified:
+            continue
+        package, path = resource_package(name)
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+        else:
+            _verified.add(name)
+    return missing
+
+def download_resources(names=None, quiet=False):
+    import nltk
+    for name in names or RESOURCES:
+        package, path = resource_package(name)
+        nltk.download(package, quiet=quiet)
+
+def require_resources(names):
+    missing = missing_resources(names)
+    if missing and AUTO_DOWNLOAD:
+        download_resources(missing, quiet=True)
+        missing = missing_resources(missing)
+    if missing:
+        packages = ", ".join(resource_package(name)[0] for name in missing)
+        raise MissingNLTKDataError(f"Missing NLTK data: {packages}. Install it with `python nltk_resources.py --download` "
+                          f"(or set PROTONDB_NLTK_DOWNLOAD=1); NLTK_DATA can point to a custom data directory.")
+
+def _load_tagger():
+    from nltk.tag import PerceptronTagger
+    # Sama dengan pos_tag(tokens), tanpa membuat tagger baru setiap panggilan
+    return PerceptronTagger().tag
+
+def _load_chunker():
+    try:
+        from nltk.chunk import ne_chunker
+    except ImportError:
+        # NLTK < 3.9: ne_chunk sudah memakai cache nltk.data
+        from nltk.chunk import ne_chunk
+        return ne_chunk
+    # ne_chunk di NLTK >= 3.9 memuat ulang model chunker setiap panggilan
+    return ne_chunker().parse
+
+def _load_sent_tokenize():
+    from nltk.tokenize import sent_tokenize
+    return sent_tokenize
+
+def _load_word_tokenize():
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+def _load_stop_words():
+    from nltk.corpus import stopwords
+    return set(stopwords.words('english'))
+
+def _load_stemmer():
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+def _load_lemmatizer():
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+def _load_sid():
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+MODEL_LOADERS = {
+    "sent_tokenize": _load_sent_tokenize,
+    "word_tokenize": _load_word_tokenize,
+    "stop_words": _load_stop_words,
+    "stemmer": _load_stemmer,
+    "lemmatizer": _load_lemmatizer,
+    "tagger": _load_tagger,
+    "chunker": _load_chunker,
+    "sid": _load_sid
+}
+
+def get_model(name):
+    # Dimuat sekali per proses lalu dipakai ulang oleh semua run berikutnya
+    if name not in _models:
+        require_resources(MODEL_RESOURCES[name])
+        _models[name] = MODEL_LOADERS[name]()
+    return _models[name]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or download the NLTK data used by transform.py")
+    parser.add_argument("--download", action="store_true", help="Download missing NLTK data")
+    args = parser.parse_args()
+    missing = missing_resources(RESOURCES)
+    if args.download and missing:
+        download_resources(missing)
+        missing = missing_resources(missing)
+    for name in RESOURCES:
+        print(f"{resource_package(name)[0]:<32} {'missing' if name in missing else 'ok'}")
+    if missing:
+        raise SystemExit(1)
@@ -0,0 +1,126 @@
+# note_cache.py
+# Cache hasil analisis per note, dengan key hash isi note + versi analisis,
+# dan memo per token (stem/lemma) yang disimpan di file yang sama
+import sqlite3
+import hashlib
+import json
+import time
+
+def note_key(notes, version):
+    return hashlib.sha256(f"{version}\0{notes}".encode()).hexdigest()
+
+def open_note_cache(path="temp_note_cache.db", readonly=False):
+    # busy timeout: beberapa worker di host yang sama bisa memakai cache bersamaan
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=60)
+    conn = sqlite3.connect(path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS note_cache (
+            key TEXT PRIMARY KEY,
+            row TEXT,
+            last_used REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_note_cache_last_used ON note_cache (last_used)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS token_cache (
+            kind TEXT,
+            token TEXT,
+            value TEXT,
+            PRIMARY KEY (kind, token)
+        )
+    ''')
+    conn.commit()
+    return conn
+
+def get_cached_rows(conn, keys):
+    # key -> row (dict) untuk key yang ada di cache
+    found = {}
+    keys = list(set(keys))
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for key, row in conn.execute(f"SELECT key, row FROM note_cache WHERE key IN ({placeholders})", chunk):
+            found[key] = json.loads(row)
+    return found
+
+def put_cached_rows(conn, entries, hit_keys=(), now=None):
+    # entries: list (key, row); hit_keys diperbarui last_used-nya untuk eviction LRU
+    now = now or time.time()
+    conn.executemany("INSERT OR REPLACE INTO note_cache (key, row, last_used) VALUES (?, ?, ?)",
+                     [(key, json.dumps(row), now) for key, row in entries])
+    conn.executemany("UPDATE note_cache SET last_used = ? WHERE key = ?", [(now, key) for key in hit_keys])
+    conn.commit()
+
+def evict_note_cache(conn, max_entries):
+    # Hapus entry yang paling lama tidak dipakai sampai jumlahnya <= max_entries
+    count = conn.execute("SELECT COUNT(*) FROM note_cache").fetchone()[0]
+    excess = count - max_entries
+    if excess > 0:
+        conn.execute("DELETE FROM note_cache WHERE key IN (SELECT key FROM note_cache ORDER BY last_used LIMIT ?)", (excess,))
+        conn.commit()
+    return max(excess, 0)
+
+class TokenCache:
+    # Memo terbatas untuk fungsi per token (mis. stemmer.stem). Saat penuh, entry
+    # yang paling awal masuk dibuang. Entry baru dicatat supaya bisa disimpan ke
+    # SQLite oleh proses utama.
+    def __init__(self, fn, max_entries=200000):
+        self.fn = fn
+        self.max_entries = max_entries
+        self.values = {}
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        value = self.values.get(token)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.fn(token)
+        if len(self.values) >= self.max_entries:
+            del self.values[next(iter(self.values))]
+        self.values[token] = value
+        self.new[token] = value
+        return value
+
+    def preload(self, entries):
+        for token, value in entries:
+            if len(self.values) >= self.max_entries:
+                break
+            self.values.setdefault(token, value)
+
+    def drain(self):
+        # Return (entry baru, hits, misses) sejak drain terakhir
+        result = (self.new, self.hits, self.misses)
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+        return result
+
+def get_token_entries(conn, kind, limit):
+    try:
+        return conn.execute("SELECT token, value FROM token_cache WHERE kind = ? LIMIT ?", (kind, limit)).fetchall()
+    except sqlite3.OperationalError:
+        # Cache lama yang belum punya tabel token_cache
+        return []
+
+def put_token_entries(conn, kind, entries):
+    conn.executemany("INSERT OR IGNORE INTO token_cache (kind, token, value) VALUES (?, ?, ?)",
+                     [(kind, token, value) for token, value in entries.items()])
+    conn.commit()
+
+def evict_token_cache(conn, max_entries):
+    # Batasi jumlah entry per kind; yang paling lama disimpan dibuang lebih dulu
+    evicted = 0
+    for (kind,) in conn.execute("SELECT DISTINCT kind FROM token_cache").fetchall():
+        evicted += conn.execute("""
+            DELETE FROM token_cache WHERE kind = ? AND rowid NOT IN (
+                SELECT rowid FROM token_cache WHERE kind = ? ORDER BY rowid DESC LIMIT ?)
+        """, (kind, kind, max_entries)).rowcount
+    conn.commit()
+    return evicted
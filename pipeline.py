@@ -0,0 +1,78 @@
+# pipeline.py
+# Mode pipeline: extract berjalan di thread producer dan mengirim (game, reports)
+# lewat queue terbatas ke transform, sehingga fetch (network) dan analisis (CPU)
+# berjalan bersamaan. Queue yang penuh menahan producer (backpressure), jadi
+# memori tetap terbatas walaupun extract lebih cepat dari transform.
+import queue
+import threading
+import time
+from extract import load_games, iter_extract
+from transform import transform_stream
+from handoff import NOTES_FILE
+from profiling import timed, record
+
+_DONE = object()
+
+def prefetch(iterable, maxsize=64, name="pipeline"):
+    # Jalankan iterable di thread terpisah dan yield item-nya sesuai urutan.
+    # Exception di producer diteruskan ke consumer; jika consumer berhenti lebih
+    # awal, producer ikut berhenti dan generator-nya ditutup di thread-nya sendiri.
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    waits = {"producer_blocked": 0.0, "consumer_waiting": 0.0}
+
+    def put(item):
+        start = time.perf_counter()
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        waits["producer_blocked"] += time.perf_counter() - start
+
+    def produce():
+        source = iter(iterable)
+        try:
+            for item in source:
+                put((None, item))
+                if stop.is_set():
+                    break
+        except BaseException as e:
+            put((e, None))
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+            put((None, _DONE))
+
+    producer = threading.Thread(target=produce, name=f"{name}-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            start = time.perf_counter()
+            error, item = items.get()
+            waits["consumer_waiting"] += time.perf_counter() - start
+            if error is not None:
+                raise error
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+        # Producer tertahan = transform yang jadi bottleneck; consumer menunggu = extract
+        record(f"{name}.producer_blocked", wall=waits["producer_blocked"], calls=0)
+        record(f"{name}.consumer_waiting", wall=waits["consumer_waiting"], calls=0)
+
+def extract_transform(limit=None, fetch_workers=8, workers=1, batch_size=200, stages=None, rate_limit=None,
+                      max_age=None, checkpoint_file="temp_checkpoint.db", cache_file=None, cache_max_entries=None,
+                      queue_size=64, notes_file=NOTES_FILE, tokenizer="nltk", ngram_top_k=None, ngram_min_count=1,
+                      dedup="exact", ngram_memory=None, refresh_games=False):
+    # Return sama dengan transform_stream: (notes_file, word, bigram, trigram)
+    games = load_games(limit, max_age, refresh=refresh_games)
+    print(f"Pipelining extract and transform (queue of {queue_size} games)...")
+    with timed("pipeline", cpu=False):
+        game_reports = prefetch(iter_extract(games, fetch_workers, rate_limit, max_age, checkpoint_file),
+                                queue_size, "pipeline")
+        return transform_stream(game_reports, notes_file, workers, batch_size, stages, cache_file, cache_max_entries,
+                                tokenizer, ngram_top_k, ngram_min_count, dedup, ngram_memory)
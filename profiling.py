@@ -0,0 +1,100 @@
+# profiling.py
+# Instrumentasi ringan per stage: wall time, CPU time, jumlah item dan peak memori.
+# Set PROTONDB_PROFILE=1 untuk menjalankan cProfile pada stage utama.
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_ENABLED = os.environ.get("PROTONDB_PROFILE") == "1"
+
+_records = {}
+_lock = threading.Lock()
+_started_at = datetime.now().isoformat()
+
+def _cpu_seconds():
+    # CPU proses ini + child process yang sudah selesai (worker pool)
+    usage_self = resource.getrusage(resource.RUSAGE_SELF)
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage_self.ru_utime + usage_self.ru_stime + usage_children.ru_utime + usage_children.ru_stime
+
+def _peak_rss_mb():
+    # ru_maxrss dalam KiB di Linux, byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def record(name, wall=0.0, cpu=0.0, items=0, calls=1):
+    with _lock:
+        entry = _records.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "items": 0, "peak_rss_mb": 0.0})
+        entry["calls"] += calls
+        entry["wall_seconds"] += wall
+        entry["cpu_seconds"] += cpu
+        entry["items"] += items
+        entry["peak_rss_mb"] = max(entry["peak_rss_mb"], _peak_rss_mb())
+    return entry
+
+@contextmanager
+def timed(name, items=0, profile=False, cpu=True):
+    # Context manager; counter["items"] bisa ditambah di dalam blok.
+    # cpu=False untuk blok yang berjalan paralel di banyak thread (mis. HTTP fetch),
+    # karena CPU time yang tersedia hanya per proses.
+    counter = {"items": items}
+    profiler = cProfile.Profile() if profile and PROFILE_ENABLED else None
+    wall_start = time.perf_counter()
+    cpu_start = _cpu_seconds() if cpu else 0.0
+    if profiler:
+        profiler.enable()
+    try:
+        yield counter
+    finally:
+        if profiler:
+            profiler.disable()
+        entry = record(name, time.perf_counter() - wall_start, _cpu_seconds() - cpu_start if cpu else 0.0, counter["items"])
+        if profiler:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+            with _lock:
+                entry["profile_top"] = stream.getvalue().splitlines()
+
+def get_records():
+    with _lock:
+        return {name: dict(entry) for name, entry in _records.items()}
+
+def reset():
+    global _started_at
+    with _lock:
+        _records.clear()
+    _started_at = datetime.now().isoformat()
+
+def print_summary():
+    records = get_records()
+    if not records:
+        return
+    print(f"{'step':<36} {'calls':>7} {'wall s':>9} {'cpu s':>9} {'items':>9} {'peak MB':>9}")
+    for name, entry in sorted(records.items()):
+        print(f"{name:<36} {entry['calls']:>7} {entry['wall_seconds']:>9.2f} {entry['cpu_seconds']:>9.2f} "
+              f"{entry['items']:>9} {entry['peak_rss_mb']:>9.1f}")
+
+def write_run_report(path, extra=None):
+    report = {
+        "started_at": _started_at,
+        "finished_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "profile_enabled": PROFILE_ENABLED,
+        "peak_rss_mb": _peak_rss_mb(),
+        "steps": get_records()
+    }
+    if extra:
+        report.update(extra)
+    with open(path, 'w') as rf:
+        json.dump(report, rf, indent=2)
+    return path
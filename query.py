@@ -0,0 +1,329 @@
+# query.py
+# Query read-only di atas protondb.db hasil load: full-text search (FTS5) atas
+# note_text/tokens, filter sentiment/topik/game/versi Proton, top n-gram dan tabel
+# agregat. Hasil query yang sering dipanggil disimpan di LRU cache di memori dan
+# otomatis dibuang setelah load berikutnya (penanda last_load di tabel load_meta).
+# Library:  from query import NotesQuery; NotesQuery().search("black screen", sentiment="negative")
+# CLI:      python query.py search "black screen" --sentiment negative
+# HTTP:     python query.py serve --port 8765  (GET /search?q=..., /notes, /ngrams, /games, /games/<app_id>)
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from errors import MissingInputError, InvalidArgumentError
+
+# Sama dengan load.SQLITE_DB; tidak diimport dari load supaya query tidak memuat pandas
+SQLITE_DB = "protondb.db"
+NGRAM_TABLES = {1: ("word_freq", "word"), 2: ("bigram_freq", "bigram"), 3: ("trigram_freq", "trigram")}
+NOTE_COLUMNS = ["report_id", "app_id", "title", "timestamp", "rating", "proton_version", "sentiment",
+                "compound_score", "topic_category", "word_count", "cluster_id", "duplicate", "note_text"]
+# Nama agregat -> (tabel, urutan)
+AGGREGATE_TABLES = {
+    "games": ("game_stats", "report_count DESC, app_id"),
+    "monthly": ("monthly_stats", "month"),
+    "proton_versions": ("proton_version_stats", "report_count DESC, proton_version")
+}
+# Kolom filter -> kondisi SQL; topic cocok juga untuk note dengan beberapa topik ("performance, bugs")
+FILTERS = {
+    "sentiment": "n.sentiment = ?",
+    "topic": "instr(n.topic_category, ?) > 0",
+    "app_id": "n.app_id = ?",
+    "proton_version": "n.proton_version = ?",
+    "rating": "lower(n.rating) = lower(?)",
+    "since": "n.timestamp >= ?",
+    "until": "n.timestamp < ?",
+    "cluster_id": "n.cluster_id = ?"
+}
+FILTER_COLUMNS = {"topic": "topic_category", "since": "timestamp", "until": "timestamp"}
+
+class LRUCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+        value = compute()
+        if self.max_entries:
+            with self.lock:
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+def fts_query(text):
+    # Teks bebas -> query FTS5: setiap kata dikutip (AND), jadi tanda baca tidak dibaca sebagai sintaks
+    terms = text.split()
+    if not terms:
+        raise InvalidArgumentError("Search text is empty")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+class NotesQuery:
+    # Satu koneksi read-only per thread (aman dipakai dari server HTTP), cache dipakai bersama
+    def __init__(self, db_path=SQLITE_DB, cache_size=256):
+        self.db_path = db_path
+        self.cache = LRUCache(cache_size)
+        self.local = threading.local()
+        self.last_load = None
+        try:
+            conn = self.connect()
+            self.tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        except sqlite3.OperationalError as e:
+            # Misalnya file database belum ada (mode=ro tidak membuat file baru)
+            raise MissingInputError(f"Cannot open {db_path}: {e}. Run the load stage first.") from None
+        if "notes" not in self.tables:
+            raise MissingInputError(f"No notes table in {db_path}. Run the load stage first.")
+        self.columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self.local.conn = conn
+        return conn
+
+    def cached(self, key, sql, params=()):
+        # Hasil di-copy supaya pemanggil bisa mengubahnya tanpa merusak isi cache
+        conn = self.connect()
+        last_load = None
+        if "load_meta" in self.tables:
+            row = conn.execute("SELECT value FROM load_meta WHERE key = 'last_load'").fetchone()
+            last_load = row[0] if row else None
+        if last_load != self.last_load:
+            self.cache.clear()
+            self.last_load = last_load
+        rows = self.cache.get((key, sql, tuple(params)), lambda: [dict(row) for row in conn.execute(sql, params)])
+        return [dict(row) for row in rows]
+
+    def note_filters(self, filters):
+        conditions, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in FILTERS:
+                raise InvalidArgumentError(f"Unknown filter: {name}. Available: {', '.join(FILTERS)}")
+            if FILTER_COLUMNS.get(name, name) not in self.columns:
+                raise InvalidArgumentError(f"Filter {name} needs the {FILTER_COLUMNS.get(name, name)} column, "
+                                 f"which this database does not have (stage disabled?)")
+            conditions.append(FILTERS[name])
+            params.append(value)
+        return conditions, params
+
+    def select_columns(self):
+        return ", ".join(f"n.{column}" for column in NOTE_COLUMNS if column in self.columns)
+
+    def search(self, text, limit=20, **filters):
+        # Full-text search, diurutkan menurut relevansi (bm25); snippet menandai kata yang cocok
+        conditions, params = self.note_filters(filters)
+        if "notes_fts" in self.tables:
+            sql = (f"SELECT {self.select_columns()}, snippet(notes_fts, 0, '[', ']', '...', 12) AS snippet "
+                   f"FROM notes_fts JOIN notes n ON n.report_id = notes_fts.rowid WHERE notes_fts MATCH ?"
+                   + "".join(f" AND {condition}" for condition in conditions) + " ORDER BY notes_fts.rank LIMIT ?")
+            return self.cached("search", sql, [fts_query(text)] + params + [limit])
+        # SQLite tanpa FTS5: semua kata harus muncul di note_text (scan penuh)
+        terms = text.lower().split()
+        if not terms:
+            raise InvalidArgumentError("Search text is empty")
+        conditions = ["instr(lower(n.note_text), ?) > 0"] * len(terms) + conditions
+        sql = (f"SELECT {self.select_columns()} FROM notes n WHERE " + " AND ".join(conditions)
+               + " ORDER BY n.report_id DESC LIMIT ?")
+        return self.cached("search", sql, terms + params + [limit])
+
+    def notes(self, limit=100, **filters):
+        # Note terbaru yang cocok dengan filter (tanpa teks pencarian)
+        conditions, params = self.note_filters(filters)
+        order = "n.timestamp DESC, n.report_id DESC" if "timestamp" in self.columns else "n.report_id DESC"
+        sql = (f"SELECT {self.select_columns()} FROM notes n"
+               + (" WHERE " + " AND ".join(conditions) if conditions else "") + f" ORDER BY {order} LIMIT ?")
+        return self.cached("notes", sql, params + [limit])
+
+    def count(self, **filters):
+        conditions, params = self.note_filters(filters)
+        sql = "SELECT COUNT(*) AS count FROM notes n" + (" WHERE " + " AND ".join(conditions) if conditions else "")
+        return self.cached("count", sql, params)[0]["count"]
+
+    def top_ngrams(self, n=2, limit=20, containing=None, min_count=1):
+        # Kata/bigram/trigram paling sering (dari tabel frekuensi inkremental load.py);
+        # containing membatasi ke n-gram yang memuat kata/frasa itu utuh
+        if n not in NGRAM_TABLES:
+            raise InvalidArgumentError(f"n must be one of {', '.join(map(str, NGRAM_TABLES))}")
+        table, key = NGRAM_TABLES[n]
+        if table not in self.tables:
+            return []
+        conditions, params = ["frequency >= ?"], [min_count]
+        if containing:
+            conditions.append(f"instr(' ' || {key} || ' ', ?) > 0")
+            params.append(f" {' '.join(containing.lower().split())} ")
+        sql = (f"SELECT {key} AS ngram, frequency FROM {table} WHERE " + " AND ".join(conditions)
+               + f" ORDER BY frequency DESC, {key} LIMIT ?")
+        return self.cached("ngrams", sql, params + [limit])
+
+    def game(self, app_id):
+        rows = self.cached("game", "SELECT * FROM game_stats WHERE app_id = ?", [app_id]) if "game_stats" in self.tables else []
+        return rows[0] if rows else None
+
+    def game_months(self, app_id):
+        if "game_monthly_stats" not in self.tables:
+            return []
+        return self.cached("game_months", "SELECT * FROM game_monthly_stats WHERE app_id = ? ORDER BY month", [app_id])
+
+    def aggregate(self, name, limit=100):
+        # games/proton_versions urut report_count, monthly urut bulan
+        if name not in AGGREGATE_TABLES:
+            raise InvalidArgumentError(f"Unknown aggregate: {name}. Available: {', '.join(AGGREGATE_TABLES)}")
+        table, order_by = AGGREGATE_TABLES[name]
+        if table not in self.tables:
+            return []
+        return self.cached(name, f"SELECT * FROM {table} ORDER BY {order_by} LIMIT ?", [limit])
+
+    def cache_info(self):
+        return {"hits": self.cache.hits, "misses": self.cache.misses, "entries": len(self.cache.entries)}
+
+def int_param(name, value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidArgumentError(f"{name} must be an integer, got {value!r}") from None
+
+def parse_filters(params):
+    filters = {}
+    for name in FILTERS:
+        if name in params:
+            value = params[name][0] if isinstance(params[name], list) else params[name]
+            filters[name] = int_param(name, value) if name in ("app_id", "since", "until", "cluster_id") else value
+    return filters
+
+def serve(query, host="127.0.0.1", port=8765):
+    # Server JSON read-only kecil untuk tool internal; satu thread per request
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            parts = [part for part in url.path.split("/") if part]
+            try:
+                limit = int_param("limit", params["limit"][0]) if "limit" in params else 20
+                if parts == ["search"]:
+                    result = query.search(params.get("q", [""])[0], limit, **parse_filters(params))
+                elif parts == ["notes"]:
+                    result = query.notes(limit, **parse_filters(params))
+                elif parts == ["ngrams"]:
+                    result = query.top_ngrams(int_param("n", params.get("n", ["2"])[0]), limit, params.get("containing", [None])[0])
+                elif parts in (["games"], ["monthly"], ["proton_versions"]):
+                    result = query.aggregate(parts[0], limit)
+                elif len(parts) == 2 and parts[0] == "games" and parts[1].isdigit():
+                    result = query.game(int(parts[1]))
+                    if result is None:
+                        return self.send_json(404, {"error": f"Unknown app_id {parts[1]}"})
+                    result["months"] = query.game_months(int(parts[1]))
+                elif parts == ["cache"]:
+                    result = query.cache_info()
+                else:
+                    return self.send_json(404, {"error": f"Unknown path {url.path}"})
+            except InvalidArgumentError as e:
+                return self.send_json(400, {"error": str(e)})
+            except sqlite3.OperationalError as e:
+                # Sintaks MATCH FTS5 yang salah adalah kesalahan request; selain itu kesalahan database
+                if parts == ["search"]:
+                    return self.send_json(400, {"error": f"Invalid search query: {e}"})
+                return self.send_json(500, {"error": f"Database error: {e}"})
+            self.send_json(200, result)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving {query.db_path} on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the notes stored in protondb.db")
+    parser.add_argument("--db", default=SQLITE_DB, help="SQLite database written by the load stage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(p):
+        p.add_argument("--sentiment", choices=["positive", "neutral", "negative"])
+        p.add_argument("--topic", help="Topic contained in topic_category, e.g. performance")
+        p.add_argument("--app-id", type=int)
+        p.add_argument("--proton-version")
+        p.add_argument("--rating")
+        p.add_argument("--cluster-id", type=int, help="Notes of one duplicate cluster (see transform --dedup)")
+        p.add_argument("--limit", type=int, default=20)
+
+    search = subparsers.add_parser("search", help="Full-text search over note_text and tokens")
+    search.add_argument("text")
+    add_filters(search)
+    add_filters(subparsers.add_parser("notes", help="Latest notes matching the filters"))
+    ngrams = subparsers.add_parser("ngrams", help="Most frequent words, bigrams or trigrams")
+    ngrams.add_argument("-n", type=int, default=2, choices=sorted(NGRAM_TABLES))
+    ngrams.add_argument("--containing", help="Only n-grams containing this word or phrase")
+    ngrams.add_argument("--limit", type=int, default=20)
+    game = subparsers.add_parser("game", help="Aggregated stats of one game")
+    game.add_argument("app_id", type=int)
+    aggregate = subparsers.add_parser("aggregate", help="Aggregate table: games, monthly or proton_versions")
+    aggregate.add_argument("name", choices=sorted(AGGREGATE_TABLES))
+    aggregate.add_argument("--limit", type=int, default=20)
+    server = subparsers.add_parser("serve", help="Serve the queries as JSON over HTTP")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    try:
+        query = NotesQuery(args.db)
+        filters = {name: getattr(args, name, None) for name in ("sentiment", "topic", "app_id", "proton_version", "rating", "cluster_id")}
+        if args.command == "search":
+            result = query.search(args.text, args.limit, **filters)
+        elif args.command == "notes":
+            result = query.notes(args.limit, **filters)
+        elif args.command == "ngrams":
+            result = query.top_ngrams(args.n, args.limit, args.containing)
+        elif args.command == "game":
+            result = query.game(args.app_id)
+            if result is not None:
+                result["months"] = query.game_months(args.app_id)
+        elif args.command == "aggregate":
+            result = query.aggregate(args.name, args.limit)
+        else:
+            serve(query, args.host, args.port)
+            return 0
+    except MissingInputError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 3
+    except InvalidArgumentError as e:
+        print(f"Invalid argument: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
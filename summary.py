@@ -0,0 +1,157 @@
+# summary.py
+# Ringkasan notes untuk laporan analisis di load.py dan input chart di visualize.py.
+# Semua bagian dihitung dalam satu kali lewat baris note: counter, jumlah dan min/max
+# per grup, serta Counter token per sentimen (langsung dipakai word cloud lewat
+# frekuensi, tanpa menggabungkan semua token menjadi satu string besar).
+import math
+from collections import Counter
+from visualize import PERFORMANCE_WORDS, POS_COLUMNS
+
+# Urutan sentimen di laporan dan word cloud
+REPORT_SENTIMENTS = ["positive", "negative", "neutral"]
+# Jumlah kata terbanyak per word cloud (sama dengan max_words bawaan WordCloud)
+WORDCLOUD_WORDS = 200
+
+class Correlation:
+    # Korelasi Pearson online (Welford), stabil untuk jumlah baris besar
+    def __init__(self):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+
+    def add(self, x, y):
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        dy = y - self.mean_y
+        self.mean_y += dy / self.n
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c_xy += dx * (y - self.mean_y)
+
+    def value(self):
+        if self.n < 2 or not self.m2_x or not self.m2_y:
+            return float("nan")
+        return self.c_xy / math.sqrt(self.m2_x * self.m2_y)
+
+# Kolom yang dirata-rata untuk laporan (bagian 2 dan 9)
+MEAN_COLUMNS = ["word_count", "sentence_count", "lexical_diversity", "compound_score"]
+
+class NotesSummary:
+    # Nilai kosong harus None (baris dari DataFrame: NaN diganti None dulu, lihat from_frame)
+    def __init__(self, word_freq_data=(), technical_freq_data=()):
+        self.count = 0
+        self.columns = set()
+        self.sums = dict.fromkeys(MEAN_COLUMNS, 0)
+        self.counts = dict.fromkeys(MEAN_COLUMNS, 0)
+        self.topic_counts = Counter()
+        self.sentiment_counts = Counter()
+        # sentimen -> [jumlah note, total per kolom POS...]
+        self.pos_sums = {}
+        self.sentiment_tokens = {}
+        # topic -> [jumlah note, total kata, min, max]
+        self.length_stats = {}
+        self.correlation = Correlation()
+        # Titik per note untuk box plot dan scatter plot
+        self.points = {"topic_category": [], "word_count": [], "compound_score": []}
+        # Bagian yang berasal dari tabel frekuensi, bukan dari baris note
+        self.perf_freq = {w["word"]: w["frequency"] for w in word_freq_data if w["word"] in PERFORMANCE_WORDS}
+        # Frasa masalah teknis sudah dicari di transform (visualize.technical_bigrams)
+        self.technical = list(technical_freq_data)
+
+    def add(self, row):
+        self.count += 1
+        if not self.columns.issuperset(row):
+            self.columns.update(row)
+        sums, counts = self.sums, self.counts
+        for column in MEAN_COLUMNS:
+            value = row.get(column)
+            if value is not None:
+                sums[column] += value
+                counts[column] += 1
+
+        topic = row.get("topic_category")
+        sentiment = row.get("sentiment")
+        word_count = row.get("word_count")
+        compound = row.get("compound_score")
+        if topic is not None:
+            self.topic_counts[topic] += 1
+            if word_count is not None:
+                stats = self.length_stats.get(topic)
+                if stats is None:
+                    self.length_stats[topic] = [1, word_count, word_count, word_count]
+                else:
+                    stats[0] += 1
+                    stats[1] += word_count
+                    if word_count < stats[2]:
+                        stats[2] = word_count
+                    elif word_count > stats[3]:
+                        stats[3] = word_count
+        if sentiment is not None:
+            self.sentiment_counts[sentiment] += 1
+            tokens = row.get("tokens")
+            if tokens:
+                counter = self.sentiment_tokens.get(sentiment)
+                if counter is None:
+                    counter = self.sentiment_tokens[sentiment] = Counter()
+                counter.update(tokens.split())
+            if "noun_count" in row:
+                pos_sums = self.pos_sums.get(sentiment)
+                if pos_sums is None:
+                    pos_sums = self.pos_sums[sentiment] = [0] * (len(POS_COLUMNS) + 1)
+                pos_sums[0] += 1
+                for i, column in enumerate(POS_COLUMNS, 1):
+                    pos_sums[i] += row.get(column) or 0
+        if word_count is not None and compound is not None:
+            self.correlation.add(word_count, compound)
+        points = self.points
+        points["topic_category"].append(topic)
+        points["word_count"].append(word_count)
+        points["compound_score"].append(compound)
+
+    def update(self, rows):
+        for row in rows:
+            self.add(row)
+        return self
+
+    def has(self, *columns):
+        return set(columns) <= self.columns
+
+    def mean(self, column):
+        return self.sums[column] / self.counts[column] if self.counts.get(column) else float("nan")
+
+    def topic_distribution(self):
+        # List (kategori, jumlah) terurut jumlah turun, seperti value_counts()
+        return self.topic_counts.most_common()
+
+    def sentiment_distribution(self):
+        return self.sentiment_counts.most_common()
+
+    def pos_by_sentiment(self):
+        # sentimen -> rata-rata jumlah kata per jenis POS, terurut nama sentimen
+        return {sentiment: {column: total / sums[0] for column, total in zip(POS_COLUMNS, sums[1:])}
+                for sentiment, sums in sorted(self.pos_sums.items())}
+
+    def common_words(self, sentiment, n=5):
+        return self.sentiment_tokens.get(sentiment, Counter()).most_common(n)
+
+    def wordcloud_frequencies(self, sentiment):
+        return dict(self.common_words(sentiment, WORDCLOUD_WORDS))
+
+    def length_by_topic(self):
+        # topic -> (rata-rata, min, max) jumlah kata, terurut nama topic
+        return {topic: (total / count, low, high) for topic, (count, total, low, high) in sorted(self.length_stats.items())}
+
+    def length_points(self, *columns):
+        # Kolom titik per note untuk seaborn (dict of list), hanya note yang kolomnya lengkap
+        rows = [values for values in zip(*(self.points[column] for column in columns)) if None not in values]
+        return {column: [values[i] for values in rows] for i, column in enumerate(columns)}
+
+    @classmethod
+    def from_frame(cls, notes_df, word_freq_data=(), technical_freq_data=()):
+        # Untuk output yang dibaca ulang (visualize.py): NaN dari kolom kosong menjadi None
+        rows = notes_df.astype(object).where(notes_df.notna(), None).to_dict("records")
+        return cls(word_freq_data, technical_freq_data).update(rows)
+
+def summarize(notes_data, word_freq_data=(), technical_freq_data=()):
+    return NotesSummary(word_freq_data, technical_freq_data).update(notes_data)
@@ -0,0 +1,6 @@
+# tests/conftest.py
+# Modul pipeline ada di root repo (bukan package), jadi root ditambahkan ke sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
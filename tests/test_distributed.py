@@ -0,0 +1,83 @@
+# tests/test_distributed.py
+# Mode terdistribusi end-to-end terhadap stub server: beberapa proses worker, satu worker
+# dibunuh saat memegang lease shard, lalu hasil merge dibanding extract + transform satu host.
+# Jalankan: python -m pytest tests/test_distributed.py
+import json
+import multiprocessing
+import time
+import pytest
+import extract
+from benchmarks.bench_distributed import worker_main, result_data
+from benchmarks.stub_server import start_stub_server
+from benchmarks.synthetic import make_payload
+from distributed import plan_jobs, merge_partials, queue_status
+from errors import MissingNLTKDataError
+from pipeline import extract_transform
+from profiling import reset
+from transform import check_resources
+
+LEASE = 1.0
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    games, reports = make_payload(40, 6, near_ratio=0.2)
+    # Note kanonik tanpa kata bermakna (dibuang worker-nya) dengan hampir-duplikat di shard lain
+    reports[games[1]["appId"]][0]["notes"] = "1 2 3 4 5 6 7 8 9 10 11 12"
+    reports[games[32]["appId"]][0]["notes"] = "1 2 3 4 5 6 7 8 9 10 11 12 crash"
+    server, base_url = start_stub_server(games, reports, latency=0.02)
+    monkeypatch.setattr(extract, "BASE_URL", base_url)
+    yield base_url
+    server.shutdown()
+    reset()
+
+def wait_for_lease(worker_id, timeout=30):
+    # job_id shard yang sedang dipegang worker_id
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for job in queue_status()[1]:
+            if job["status"] == "running" and job["worker"] == worker_id:
+                return job["job_id"]
+        time.sleep(0.02)
+    raise AssertionError(f"{worker_id} did not claim a shard")
+
+@pytest.mark.parametrize("dedup", ["exact", "near"])
+def test_killed_worker_shard_is_retried_and_merge_matches_single_host(stub_server, tmp_path, monkeypatch, dedup):
+    try:
+        check_resources()
+    except MissingNLTKDataError as e:
+        pytest.skip(str(e))
+    single_dir, distributed_dir = tmp_path / "single", tmp_path / "distributed"
+    single_dir.mkdir()
+    distributed_dir.mkdir()
+
+    monkeypatch.chdir(single_dir)
+    single = json.loads(result_data(extract_transform(fetch_workers=2, dedup=dedup)))
+    reset()
+
+    monkeypatch.chdir(distributed_dir)
+    assert plan_jobs(shard_size=5, dedup=dedup) == 8
+    victim = multiprocessing.Process(target=worker_main, args=(stub_server, str(distributed_dir), "victim", LEASE, 1))
+    victim.start()
+    killed_job = wait_for_lease("victim")
+    victim.kill()
+    victim.join()
+
+    workers = [multiprocessing.Process(target=worker_main, args=(stub_server, str(distributed_dir), f"worker-{i}", LEASE, 2))
+               for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=120)
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+
+    counts, jobs = queue_status()
+    assert counts == {"done": 8}
+    retried = next(job for job in jobs if job["job_id"] == killed_job)
+    assert retried["attempts"] == 2
+    assert retried["worker"] != "victim"
+    merged = json.loads(result_data(merge_partials()))
+    # Dibanding per baris supaya selisihnya terbaca (bukan diff seluruh output)
+    assert len(merged[0]) == len(single[0])
+    for merged_row, single_row in zip(merged[0], single[0]):
+        assert merged_row == single_row
+    assert merged[1:] == single[1:]
@@ -1,168 +1,669 @@
 # transform.py
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer, WordNetLemmatizer
-from nltk import pos_tag
-from nltk.chunk import ne_chunk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import json
 import os
+import re
+import time
+from profiling import timed, record
+from note_cache import (note_key, open_note_cache, get_cached_rows, put_cached_rows, evict_note_cache,
+                        TokenCache, get_token_entries, put_token_entries, evict_token_cache)
+from nltk_resources import get_model, require_resources, MODEL_RESOURCES
+from ngrams import NgramCounts, SpaceSaving, count_shard_ngrams, counter_counts, sketch_capacity
+from handoff import HandoffWriter, NOTES_FILE, REPORTS_FILE, FREQ_FILES, freq_path, handoff_status, iter_records, write_records
+from dedup import Deduplicator, REUSE_ANALYSIS, NO_WORDS
+from visualize import technical_bigrams
+from errors import InvalidArgumentError
 
-# Download resource NLTK yang diperlukan
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('maxent_ne_chunker', quiet=True)
-nltk.download('words', quiet=True)
-nltk.download('vader_lexicon', quiet=True)
-nltk.download('wordnet', quiet=True)
+# Naikkan setiap kali logika analisis berubah supaya cache note lama tidak dipakai
+ANALYSIS_VERSION = "1"
 
-def transform(games, all_reports):
-    print("Starting transformation process with maximum NLTK analysis...")
+TOPIC_KEYWORDS = {
+    "performance": {"lag", "slow", "fast", "smooth", "runs", "fps"},
+    "bugs": {"crash", "bug", "error", "broken", "fail"},
+    "compatibility": {"works", "support", "compatible", "install"}
+}
+# keyword -> topic, supaya semua topik dicek dengan satu set intersection per note
+KEYWORD_TOPICS = {}
+for topic, keywords in TOPIC_KEYWORDS.items():
+    for keyword in keywords:
+        KEYWORD_TOPICS.setdefault(keyword, set()).add(topic)
 
-    notes_file = "temp_notes.json"
-    word_freq_file = "temp_word_freq.json"
-    bigram_freq_file = "temp_bigram_freq.json"
-    trigram_freq_file = "temp_trigram_freq.json"
-
-    # Cek apakah data transformasi sudah ada
-    if all(os.path.exists(f) for f in [notes_file, word_freq_file, bigram_freq_file, trigram_freq_file]):
-        print("Loading existing transformed data from JSON files...")
-        with open(notes_file, 'r') as nf:
-            notes_data = json.load(nf)
-        with open(word_freq_file, 'r') as wf:
-            word_freq_data = json.load(wf)
-        with open(bigram_freq_file, 'r') as bf:
-            bigram_freq_data = json.load(bf)
-        with open(trigram_freq_file, 'r') as tf:
-            trigram_freq_data = json.load(tf)
-        print(f"Loaded {len(notes_data)} notes from {notes_file}")
-        return notes_data, word_freq_data, bigram_freq_data, trigram_freq_data
+# Tokenizer "fast": regex yang dikompilasi sekali, meniru pemisahan word_tokenize
+# (tanda baca, kontraksi n't/'s/'ll, titik akhir kalimat) untuk token alfabet saja
+FAST_CHUNK = re.compile(r"(?:[^\s;@#$%&?!()\[\]{}<>\"`*«»“”‘’„\u2012-\u2015:,]|[:,](?=\d))+")
+FAST_SEPARATORS = re.compile(r"\.{2,}|--")
+FAST_CONTRACTION = re.compile(r"(?:n't|'(?:s|m|d|ll|re|ve)?)$")
+FAST_SPLITS = {"cannot": ["can", "not"], "gimme": ["gim", "me"], "gonna": ["gon", "na"],
+               "gotta": ["got", "ta"], "lemme": ["lem", "me"], "wanna": ["wan", "na"]}
+FAST_SENTENCE = re.compile(r"(?<=[.!?])\s+")
 
-    # Jika tidak ada, lakukan transformasi
-    notes_data = []
-    all_words = []
-    all_bigrams = []
-    all_trigrams = []
-
-    stop_words = set(stopwords.words('english'))
-    ps = PorterStemmer()
-    lemmatizer = WordNetLemmatizer()
-    sid = SentimentIntensityAnalyzer()
-
-    topic_keywords = {
-        "performance": {"lag", "slow", "fast", "smooth", "runs", "fps"},
-        "bugs": {"crash", "bug", "error", "broken", "fail"},
-        "compatibility": {"works", "support", "compatible", "install"}
-    }
+# Koneksi cache dibuka sekali per proses (bukan per task)
+_cache_conns = {}
+
+# Memo stem/lemma per token, per proses. POS tag tidak di-memo per token karena
+# tagger perceptron memakai konteks kata di sekitarnya.
+TOKEN_CACHE_MAX_ENTRIES = 200000
+_token_caches = {}
 
+def iter_notes(games, all_reports):
     for game in games:
         app_id = game["appId"]
-        reports = all_reports.get(app_id, [])
+        # Key appId menjadi string setelah round-trip lewat temp_reports.json
+        reports = all_reports.get(app_id) or all_reports.get(str(app_id)) or []
+        yield from notes_from_reports(reports, app_id, game.get("title"))
 
-        if not reports:
+def iter_game_notes(game_reports):
+    # Sama dengan iter_notes, untuk iterable (game, reports) yang dibaca lazy
+    for game, reports in game_reports:
+        yield from notes_from_reports(reports, game["appId"], game.get("title"))
+
+def report_meta(report, app_id=None, title=None):
+    # Metadata game/report yang ikut disimpan di baris note (untuk agregat per game,
+    # per bulan dan per versi Proton di load.py)
+    return {
+        "report_id": report.get("id"),
+        "app_id": report.get("appId", app_id),
+        "title": title,
+        "timestamp": report.get("timestamp"),
+        "rating": report.get("rating"),
+        "proton_version": report.get("protonVersion"),
+        "os": report.get("os"),
+        "gpu_driver": report.get("gpuDriver")
+    }
+
+def notes_from_reports(reports, app_id=None, title=None):
+    # Yield (meta, notes); meta berisi id report, appId dan metadata lain untuk baris note
+    for report in reports or []:
+        # Fix: Check if report is None first
+        if report is None:
+            continue
+            
+        # Fix: Safely get notes field and check if it's None
+        notes = report.get("notes")
+        if notes is None:
+            continue
+            
+        # Now safely call strip()
+        notes = notes.strip()
+        if not notes:
             continue
 
-        for report in reports:
-            # Fix: Check if report is None first
-            if report is None:
-                continue
-                
-            # Fix: Safely get notes field and check if it's None
-            notes = report.get("notes")
-            if notes is None:
+        yield report_meta(report, app_id, title), notes
+
+# Stage analisis yang bisa diaktifkan/dinonaktifkan per run. Setiap stage menerima
+# context note (notes, clean_tokens, models, dan hasil stage sebelumnya) dan
+# mengembalikan kolom tambahan untuk baris note.
+def token_cache(kind, fn):
+    if kind not in _token_caches:
+        _token_caches[kind] = TokenCache(fn, TOKEN_CACHE_MAX_ENTRIES)
+    return _token_caches[kind]
+
+def stage_stemming(ctx):
+    stem = token_cache("stem", ctx["models"]["stemmer"].stem).get
+    return {"stemmed_tokens": " ".join(stem(token) for token in ctx["clean_tokens"])}
+
+def stage_lemmatization(ctx):
+    lemmatize = token_cache("lemma", ctx["models"]["lemmatizer"].lemmatize).get
+    return {"lemmatized_tokens": " ".join(lemmatize(token) for token in ctx["clean_tokens"])}
+
+def get_pos_tags(ctx):
+    if "pos_tags" not in ctx:
+        ctx["pos_tags"] = ctx["models"]["tagger"](ctx["clean_tokens"])
+    return ctx["pos_tags"]
+
+def stage_pos(ctx):
+    pos_counts = Counter(tag for word, tag in get_pos_tags(ctx))
+    return {
+        "noun_count": pos_counts.get("NN", 0) + pos_counts.get("NNS", 0),
+        "verb_count": pos_counts.get("VB", 0) + pos_counts.get("VBD", 0) + pos_counts.get("VBG", 0),
+        "adjective_count": pos_counts.get("JJ", 0),
+        "adverb_count": pos_counts.get("RB", 0)
+    }
+
+def stage_ner(ctx):
+    from nltk import Tree
+    ner_tree = ctx["models"]["chunker"](get_pos_tags(ctx))
+    entities = []
+    for subtree in ner_tree:
+        if isinstance(subtree, Tree):
+            entity = " ".join(word for word, tag in subtree.leaves())
+            entities.append({"entity": entity, "label": subtree.label()})
+    return {"entities": json.dumps(entities)}
+
+def stage_sentiment(ctx):
+    sentiment_scores = ctx["models"]["sid"].polarity_scores(ctx["notes"])
+    sentiment = "positive" if sentiment_scores["compound"] > 0.05 else "negative" if sentiment_scores["compound"] < -0.05 else "neutral"
+    return {
+        "sentiment": sentiment,
+        "compound_score": sentiment_scores["compound"],
+        "positive_score": sentiment_scores["pos"],
+        "negative_score": sentiment_scores["neg"],
+        "neutral_score": sentiment_scores["neu"]
+    }
+
+def stage_topics(ctx):
+    clean_tokens = ctx["clean_tokens"]
+    matched = set().union(*(KEYWORD_TOPICS[token] for token in KEYWORD_TOPICS.keys() & set(clean_tokens)))
+    topics = [topic for topic in TOPIC_KEYWORDS if topic in matched]
+    return {"topic_category": ", ".join(topics) if topics else "other"}
+
+# Urutan stage menentukan urutan kolom di notes_data. Stage "ngrams" tidak
+# menambah kolom, hanya mengaktifkan penghitungan bigram/trigram.
+STAGES = {
+    "stemming": stage_stemming,
+    "lemmatization": stage_lemmatization,
+    "pos": stage_pos,
+    "ner": stage_ner,
+    "sentiment": stage_sentiment,
+    "topics": stage_topics,
+    "ngrams": None
+}
+ALL_STAGES = tuple(STAGES)
+# Stage murah yang hanya bergantung pada token; dihitung ulang untuk hampir-duplikat
+# (dedup "near"), sedangkan hasil model (pos, ner, sentiment) dipakai dari note kanonik
+TEXT_STAGES = ("stemming", "lemmatization", "topics")
+# Kolom hasil stage model, yaitu kolom yang diambil hampir-duplikat dari note kanonik
+MODEL_COLUMNS = ("noun_count", "verb_count", "adjective_count", "adverb_count", "entities",
+                 "sentiment", "compound_score", "positive_score", "negative_score", "neutral_score")
+
+def tokenize_nltk(notes, models):
+    # Return (sentence_count, clean_tokens)
+    sentences = models["sent_tokenize"](notes)
+    tokens = models["word_tokenize"](notes.lower())
+    stop_words = models["stop_words"]
+    return len(sentences), [token for token in tokens if token.isalpha() and token not in stop_words]
+
+def tokenize_fast(notes, models):
+    stop_words = models["stop_words"]
+    sentence_count = sum(1 for sentence in FAST_SENTENCE.split(notes.strip()) if sentence)
+    clean_tokens = []
+    for chunk in FAST_CHUNK.findall(FAST_SEPARATORS.sub(" ", notes.lower())):
+        token = FAST_CONTRACTION.sub("", chunk.strip("'").rstrip("."))
+        for token in FAST_SPLITS.get(token, (token,)):
+            if token.isalpha() and token not in stop_words:
+                clean_tokens.append(token)
+    return sentence_count, clean_tokens
+
+# "nltk" = Punkt + word_tokenize (default); "fast" = regex, tanpa data punkt.
+# Kesesuaian keduanya dicek dengan benchmarks/bench_tokenizer.py
+TOKENIZERS = {"nltk": tokenize_nltk, "fast": tokenize_fast}
+
+# Memo token yang dipakai setiap stage -> model pembuatnya
+STAGE_TOKEN_CACHES = {"stemming": ("stem", "stemmer", "stem"), "lemmatization": ("lemma", "lemmatizer", "lemmatize")}
+
+def token_cache_key(kind):
+    # Entry persisten ikut versi analisis supaya tidak terpakai setelah logika berubah
+    return f"{kind}:{ANALYSIS_VERSION}"
+
+def preload_token_caches(cache_file, stages, tokenizer="nltk"):
+    # Isi memo proses ini dari cache SQLite (read-only); dipanggil sekali per worker
+    models = get_models(stages, tokenizer)
+    conn = get_cache_conn(cache_file)
+    for stage in stages:
+        if stage in STAGE_TOKEN_CACHES:
+            kind, model, method = STAGE_TOKEN_CACHES[stage]
+            cache = token_cache(kind, getattr(models[model], method))
+            cache.preload(get_token_entries(conn, token_cache_key(kind), TOKEN_CACHE_MAX_ENTRIES))
+
+def drain_token_caches():
+    # kind -> (entry baru, hits, misses) sejak shard sebelumnya
+    return {kind: cache.drain() for kind, cache in _token_caches.items()}
+
+# Model NLTK yang dibutuhkan setiap tokenizer dan stage
+TOKENIZER_MODELS = {
+    "nltk": ["sent_tokenize", "word_tokenize", "stop_words"],
+    "fast": ["stop_words"]
+}
+STAGE_MODELS = {
+    "stemming": ["stemmer"],
+    "lemmatization": ["lemmatizer"],
+    "pos": ["tagger"],
+    "ner": ["tagger", "chunker"],
+    "sentiment": ["sid"]
+}
+_stage_models = {}
+
+def model_names(stages, tokenizer="nltk"):
+    return TOKENIZER_MODELS[tokenizer] + [name for stage in stages for name in STAGE_MODELS.get(stage, [])]
+
+def get_models(stages=ALL_STAGES, tokenizer="nltk"):
+    # Model hanya dimuat untuk stage yang aktif, sekali per proses
+    key = (tuple(stages), tokenizer)
+    if key not in _stage_models:
+        _stage_models[key] = {name: get_model(name) for name in model_names(stages, tokenizer)}
+    return _stage_models[key]
+
+def check_resources(stages=ALL_STAGES, tokenizer="nltk"):
+    # Cek data NLTK di proses utama sebelum worker dibuat supaya error-nya jelas
+    if tokenizer not in TOKENIZERS:
+        raise InvalidArgumentError(f"Unknown tokenizer: {tokenizer}. Available: {', '.join(TOKENIZERS)}")
+    names = model_names(stages, tokenizer)
+    require_resources(list(dict.fromkeys(resource for name in names for resource in MODEL_RESOURCES[name])))
+
+def resolve_stages(stages=None):
+    if stages is None:
+        return ALL_STAGES
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise InvalidArgumentError(f"Unknown analysis stage(s): {', '.join(unknown)}. Available: {', '.join(ALL_STAGES)}")
+    # Selalu jalankan dalam urutan registry supaya urutan kolom konsisten
+    return tuple(stage for stage in ALL_STAGES if stage in stages)
+
+def analyze_note(notes, stages=ALL_STAGES, timings=None, tokenizer="nltk"):
+    # Return (row, clean_tokens), atau None jika note tidak punya kata bermakna.
+    # timings (Counter) diisi durasi per stage dalam detik.
+    timings = timings if timings is not None else Counter()
+    models = get_models(stages, tokenizer)
+
+    start = time.perf_counter()
+    sentence_count, clean_tokens = TOKENIZERS[tokenizer](notes, models)
+    timings["tokenize"] += time.perf_counter() - start
+    
+    # Prevent division by zero
+    word_count = len(clean_tokens)
+    if word_count == 0:
+        return None
+        
+    char_count = len(notes)
+    avg_word_length = sum(len(word) for word in clean_tokens) / word_count if word_count > 0 else 0
+
+    unique_words = len(set(clean_tokens))
+    lexical_diversity = unique_words / word_count if word_count > 0 else 0
+
+    row = {
+        "note_text": notes,
+        "word_count": word_count,
+        "char_count": char_count,
+        "sentence_count": sentence_count,
+        "avg_word_length": avg_word_length,
+        "lexical_diversity": lexical_diversity,
+        "tokens": " ".join(clean_tokens)
+    }
+    ctx = {"notes": notes, "clean_tokens": clean_tokens, "models": models}
+    for stage in stages:
+        run_stage = STAGES[stage]
+        if run_stage is None:
+            continue
+        start = time.perf_counter()
+        row.update(run_stage(ctx))
+        timings[stage] += time.perf_counter() - start
+    return row, clean_tokens
+
+def get_cache_conn(cache_file):
+    if cache_file not in _cache_conns:
+        _cache_conns[cache_file] = open_note_cache(cache_file, readonly=True)
+    return _cache_conns[cache_file]
+
+def no_words_row(meta):
+    # Pengganti baris note tanpa kata bermakna untuk dedup.resolve (lihat dedup.NO_WORDS)
+    return {**{key: meta[key] for key in ("cluster_id", "duplicate", REUSE_ANALYSIS) if key in meta}, NO_WORDS: True}
+
+def analyze_shard(shard, stages=ALL_STAGES, cache_file=None, tokenizer="nltk"):
+    # Satu task worker: analisis sekumpulan note, lalu hitung n-gram shard tersebut.
+    # Note yang sudah ada di cache tidak dianalisis ulang; entry baru dikembalikan
+    # ke proses utama yang menjadi satu-satunya penulis cache.
+    rows = []
+    word_freq = Counter()
+    token_lists = []
+    ngram_counts = None
+    timings = Counter()
+    count_ngrams = "ngrams" in stages
+    cached = {}
+    hit_keys = []
+    new_entries = []
+    if cache_file:
+        start = time.perf_counter()
+        version = f"{ANALYSIS_VERSION}|{','.join(stages)}"
+        if tokenizer != "nltk":
+            version += f"|{tokenizer}"
+        keys = [note_key(notes, version) if notes is not None and not meta.get(REUSE_ANALYSIS) else None
+                for meta, notes in shard]
+        cached = get_cached_rows(get_cache_conn(cache_file), [key for key in keys if key is not None])
+        timings["cache_lookup"] += time.perf_counter() - start
+    for i, (meta, notes) in enumerate(shard):
+        if notes is None:
+            # Duplikat (lihat dedup.py): dilengkapi dari baris note kanoniknya di proses utama
+            rows.append(meta)
+            continue
+        key = keys[i] if cache_file else None
+        if meta.get(REUSE_ANALYSIS):
+            # Hampir-duplikat: hanya kolom teks, dilengkapi dari note kanonik di dedup.resolve
+            result = analyze_note(notes, [stage for stage in stages if stage in TEXT_STAGES], timings, tokenizer)
+            if result is None:
+                rows.append(no_words_row(meta))
                 continue
-                
-            # Now safely call strip()
-            notes = notes.strip()
-            if not notes:
+            row, clean_tokens = result
+        elif key in cached:
+            row = cached[key]
+            clean_tokens = row["tokens"].split()
+            hit_keys.append(key)
+        else:
+            result = analyze_note(notes, stages, timings, tokenizer)
+            if result is None:
+                if "cluster_id" in meta:
+                    rows.append(no_words_row(meta))
                 continue
+            row, clean_tokens = result
+            if cache_file:
+                new_entries.append((key, row))
+        # Metadata report tidak ikut disimpan di cache karena cache berbasis isi note
+        rows.append({**meta, **row})
+        word_freq.update(clean_tokens)
+        if count_ngrams:
+            token_lists.append(clean_tokens)
+    if count_ngrams:
+        # Bigram/trigram dihitung sekaligus per shard sebagai key integer (lihat ngrams.py)
+        start = time.perf_counter()
+        ngram_counts = count_shard_ngrams(token_lists)
+        timings["ngrams"] += time.perf_counter() - start
+    return rows, word_freq, ngram_counts, timings, (hit_keys, new_entries), drain_token_caches()
 
-            sentences = sent_tokenize(notes)
-            tokens = word_tokenize(notes.lower())
-            clean_tokens = [token for token in tokens if token.isalpha() and token not in stop_words]
-            
-            # Prevent division by zero
-            word_count = len(clean_tokens)
-            if word_count == 0:
-                continue
-                
-            char_count = len(notes)
-            sentence_count = len(sentences)
-            avg_word_length = sum(len(word) for word in clean_tokens) / word_count if word_count > 0 else 0
-
-            stemmed_tokens = [ps.stem(token) for token in clean_tokens]
-            lemmatized_tokens = [lemmatizer.lemmatize(token) for token in clean_tokens]
-
-            pos_tags = pos_tag(clean_tokens)
-            pos_counts = Counter(tag for word, tag in pos_tags)
-
-            ner_tree = ne_chunk(pos_tags)
-            entities = []
-            for subtree in ner_tree:
-                if isinstance(subtree, nltk.Tree):
-                    entity = " ".join(word for word, tag in subtree.leaves())
-                    entities.append({"entity": entity, "label": subtree.label()})
-
-            sentiment_scores = sid.polarity_scores(notes)
-            sentiment = "positive" if sentiment_scores["compound"] > 0.05 else "negative" if sentiment_scores["compound"] < -0.05 else "neutral"
-
-            bigrams = list(nltk.bigrams(clean_tokens))
-            trigrams = list(nltk.trigrams(clean_tokens))
-            all_bigrams.extend(bigrams)
-            all_trigrams.extend(trigrams)
-
-            unique_words = len(set(clean_tokens))
-            lexical_diversity = unique_words / word_count if word_count > 0 else 0
-
-            topics = []
-            for topic, keywords in topic_keywords.items():
-                if any(keyword in clean_tokens for keyword in keywords):
-                    topics.append(topic)
-            topic_category = ", ".join(topics) if topics else "other"
-
-            notes_data.append({
-                "note_text": notes,
-                "word_count": word_count,
-                "char_count": char_count,
-                "sentence_count": sentence_count,
-                "avg_word_length": avg_word_length,
-                "lexical_diversity": lexical_diversity,
-                "tokens": " ".join(clean_tokens),
-                "stemmed_tokens": " ".join(stemmed_tokens),
-                "lemmatized_tokens": " ".join(lemmatized_tokens),
-                "noun_count": pos_counts.get("NN", 0) + pos_counts.get("NNS", 0),
-                "verb_count": pos_counts.get("VB", 0) + pos_counts.get("VBD", 0) + pos_counts.get("VBG", 0),
-                "adjective_count": pos_counts.get("JJ", 0),
-                "adverb_count": pos_counts.get("RB", 0),
-                "entities": json.dumps(entities),
-                "sentiment": sentiment,
-                "compound_score": sentiment_scores["compound"],
-                "positive_score": sentiment_scores["pos"],
-                "negative_score": sentiment_scores["neg"],
-                "neutral_score": sentiment_scores["neu"],
-                "topic_category": topic_category
-            })
-            all_words.extend(clean_tokens)
-
-    word_freq = Counter(all_words)
-    bigram_freq = Counter(all_bigrams)
-    trigram_freq = Counter(all_trigrams)
-    word_freq_data = [{"word": word, "frequency": freq} for word, freq in word_freq.most_common()]
-    bigram_freq_data = [{"bigram": " ".join(bigram), "frequency": freq} for bigram, freq in bigram_freq.most_common()]
-    trigram_freq_data = [{"trigram": " ".join(trigram), "frequency": freq} for trigram, freq in trigram_freq.most_common()]
-
-    # Simpan ke file JSON sementara
-    with open(notes_file, 'w') as nf:
-        json.dump(notes_data, nf)
-    with open(word_freq_file, 'w') as wf:
-        json.dump(word_freq_data, wf)
-    with open(bigram_freq_file, 'w') as bf:
-        json.dump(bigram_freq_data, bf)
-    with open(trigram_freq_file, 'w') as tf:
-        json.dump(trigram_freq_data, tf)
-    print(f"Transformed data saved to {notes_file}, {word_freq_file}, {bigram_freq_file}, {trigram_freq_file}")
+def iter_shards(notes_iter, shard_size):
+    shard = []
+    for notes in notes_iter:
+        shard.append(notes)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+def _init_worker(stages, tokenizer="nltk", cache_file=None):
+    get_models(stages, tokenizer)
+    if cache_file:
+        preload_token_caches(cache_file, stages, tokenizer)
+
+def ordered_map(executor, fn, iterable, window):
+    # Seperti executor.map, tetapi hanya `window` task yang di-submit sekaligus
+    # sehingga input generator tidak dibaca habis ke memori
+    items = iter(iterable)
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            break
+    while pending:
+        future = pending.popleft()
+        item = next(items, None)
+        if item is not None:
+            pending.append(executor.submit(fn, item))
+        yield future.result()
+
+def iter_analyzed_shards(notes_iter, workers=1, shard_size=200, stages=ALL_STAGES, cache_file=None, tokenizer="nltk"):
+    check_resources(stages, tokenizer)
+    shards = iter_shards(notes_iter, shard_size)
+    task = partial(analyze_shard, stages=stages, cache_file=cache_file, tokenizer=tokenizer)
+    if workers <= 1:
+        _init_worker(stages, tokenizer, cache_file)
+        drain_token_caches()
+        yield from map(task, shards)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stages, tokenizer, cache_file)) as executor:
+        yield from ordered_map(executor, task, shards, workers * 2)
+
+def freq_tables(word_freq, ngrams, ngram_top_k=None, ngram_min_count=1):
+    # ngram_top_k / ngram_min_count memangkas tabel bigram/trigram (default: semua).
+    # word_freq None: kata ikut dihitung approximate di ngrams (SpaceSaving, orde 1)
+    words = word_freq.most_common() if word_freq is not None else ngrams.most_common(1)
+    word_freq_data = [{"word": word, "frequency": freq} for word, freq in words]
+    bigram_freq_data = [{"bigram": bigram, "frequency": freq}
+                        for bigram, freq in ngrams.most_common(2, ngram_top_k, ngram_min_count)]
+    trigram_freq_data = [{"trigram": trigram, "frequency": freq}
+                         for trigram, freq in ngrams.most_common(3, ngram_top_k, ngram_min_count)]
+    return word_freq_data, bigram_freq_data, trigram_freq_data, technical_bigrams(ngrams)
+
+def print_stage_timings(timings):
+    # Total waktu CPU per stage (dijumlahkan dari semua worker)
+    total = sum(timings.values())
+    if not total:
+        return
+    print("Per-stage analysis time:")
+    for stage, seconds in sorted(timings.items(), key=lambda x: x[1], reverse=True):
+        print(f"- {stage}: {seconds:.2f}s ({seconds / total * 100:.1f}%)")
+
+def new_ngram_counts(ngram_memory=None):
+    # ngram_memory (MiB): hitungan approximate kata/bigram/trigram dengan memori terbatas
+    # (ngrams.SpaceSaving), selain itu hitungan exact
+    if ngram_memory:
+        return SpaceSaving(sketch_capacity(ngram_memory))
+    return NgramCounts()
+
+def new_totals(ngram_memory=None):
+    ngrams = new_ngram_counts(ngram_memory)
+    return {
+        "word_freq": None if isinstance(ngrams, SpaceSaving) else Counter(),
+        "ngrams": ngrams,
+        "timings": Counter(),
+        "cache": Counter(),
+        "token_cache": Counter()
+    }
+
+def add_counts(totals, words, shard_ngrams):
+    if totals["word_freq"] is None:
+        totals["ngrams"].add(counter_counts(words))
+    else:
+        totals["word_freq"].update(words)
+    if shard_ngrams is not None:
+        totals["ngrams"].add(shard_ngrams)
+
+def merge_shards(shard_results, totals, cache_conn=None, dedup=None):
+    # Gabungkan hasil shard (sesuai urutan) ke totals, tulis entry cache baru,
+    # dan yield baris note per shard
+    for rows, shard_words, shard_ngrams, shard_timings, (hit_keys, new_entries), token_entries in shard_results:
+        add_counts(totals, shard_words, shard_ngrams)
+        totals["timings"].update(shard_timings)
+        if dedup is not None:
+            # Token duplikat tetap dihitung di tabel frekuensi. Semua kata/n-gram-nya sudah
+            # muncul di note kanonik, jadi urutan tie hasil most_common tidak berubah.
+            start = time.perf_counter()
+            rows, token_lists = dedup.resolve(rows)
+            if token_lists:
+                add_counts(totals, Counter(token for tokens in token_lists for token in tokens),
+                           count_shard_ngrams(token_lists) if shard_ngrams is not None else None)
+            totals["timings"]["dedup"] += time.perf_counter() - start
+        if cache_conn is not None:
+            put_cached_rows(cache_conn, new_entries, hit_keys)
+            totals["cache"]["hits"] += len(hit_keys)
+            totals["cache"]["misses"] += len(new_entries)
+        for kind, (new_tokens, hits, misses) in token_entries.items():
+            if cache_conn is not None and new_tokens:
+                put_token_entries(cache_conn, token_cache_key(kind), new_tokens)
+            totals["token_cache"][f"{kind}_hits"] += hits
+            totals["token_cache"][f"{kind}_misses"] += misses
+        yield rows
+
+def print_cache_stats(stats, evicted=0):
+    lookups = stats["hits"] + stats["misses"]
+    if lookups:
+        print(f"Note cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hits'] / lookups * 100:.1f}% hit rate), {evicted} entries evicted")
+
+def print_token_cache_stats(stats):
+    # Hit rate memo stem/lemma; juga dicatat ke laporan run
+    for kind in sorted({key.rsplit("_", 1)[0] for key in stats}):
+        hits, misses = stats[f"{kind}_hits"], stats[f"{kind}_misses"]
+        if hits + misses:
+            print(f"Token cache ({kind}): {hits} hits, {misses} misses ({hits / (hits + misses) * 100:.1f}% hit rate)")
+            record(f"transform.token_cache.{kind}_hits", items=hits, calls=0)
+            record(f"transform.token_cache.{kind}_misses", items=misses, calls=0)
+
+def record_stage_timings(timings):
+    for stage, seconds in timings.items():
+        record(f"transform.{stage}", wall=seconds, calls=0)
+
+def new_deduplicator(dedup, stages, tokenizer="nltk", trace=False):
+    # dedup: "none" (setiap note dianalisis), "exact" atau "near" (lihat dedup.py)
+    if dedup in (None, "none"):
+        return None
+    return Deduplicator(dedup, partial(analyze_note, stages=stages, tokenizer=tokenizer), trace=trace)
+
+def finish_dedup(dedup, totals):
+    # Waktu hashing/MinHash masuk ke timing stage "dedup"; statistik dicatat ke laporan run
+    if dedup is None:
+        return
+    totals["timings"]["dedup"] += dedup.seconds
+    dedup.print_stats()
+    for key, value in dedup.stats.items():
+        record(f"transform.dedup.{key}", items=value, calls=0)
+
+def print_sketch_bounds(ngrams, ngram_top_k=None, ngram_min_count=1):
+    # Batas error hitungan approximate untuk tabel yang ditulis; juga dicatat ke laporan run
+    if not isinstance(ngrams, SpaceSaving):
+        return
+    print(f"Approximate frequencies (up to {ngrams.capacity} counters per table):")
+    for n, name in zip(ngrams.orders, ("words", "bigrams", "trigrams")):
+        bound = ngrams.error_bound(n, None if n == 1 else ngram_top_k, 1 if n == 1 else ngram_min_count)
+        print(f"- {name}: {bound['total']} counted, listed counts are at most {bound['max_error']} too high, "
+              f"unlisted {name} occur at most {bound['floor']} times")
+        record(f"transform.sketch.{name}_max_error", items=bound["max_error"], calls=0)
+        record(f"transform.sketch.{name}_floor", items=bound["floor"], calls=0)
+
+def run_transform(games, all_reports, workers=1, shard_size=200, stages=None, timings=None,
+                  cache_file=None, cache_max_entries=None, tokenizer="nltk",
+                  ngram_top_k=None, ngram_min_count=1, game_reports=None, dedup="exact", ngram_memory=None):
+    # Shard digabung sesuai urutan aslinya, sehingga notes_data dan urutan frekuensi
+    # (termasuk tie pada most_common) identik berapapun jumlah worker
+    stages = resolve_stages(stages)
+    totals = new_totals(ngram_memory)
+    notes_data = []
+    deduplicator = new_deduplicator(dedup, stages, tokenizer)
+    cache_conn = open_note_cache(cache_file) if cache_file else None
+    try:
+        # game_reports (iterable (game, reports)) menggantikan games/all_reports jika diberikan
+        notes_iter = iter_notes(games, all_reports) if game_reports is None else iter_game_notes(game_reports)
+        if deduplicator is not None:
+            notes_iter = deduplicator.tag(notes_iter)
+        shard_results = iter_analyzed_shards(notes_iter, workers, shard_size, stages, cache_file, tokenizer)
+        for rows in merge_shards(shard_results, totals, cache_conn, deduplicator):
+            notes_data.extend(rows)
+        finish_dedup(deduplicator, totals)
+        if cache_conn is not None:
+            evicted = evict_note_cache(cache_conn, cache_max_entries) if cache_max_entries else 0
+            evict_token_cache(cache_conn, TOKEN_CACHE_MAX_ENTRIES)
+            print_cache_stats(totals["cache"], evicted)
+        print_token_cache_stats(totals["token_cache"])
+    finally:
+        if cache_conn is not None:
+            cache_conn.close()
+    if timings is not None:
+        timings.update(totals["timings"])
+
+    print_sketch_bounds(totals["ngrams"], ngram_top_k, ngram_min_count)
+    return (notes_data,) + freq_tables(totals["word_freq"], totals["ngrams"], ngram_top_k, ngram_min_count)
+
+def handoff_meta(stages, tokenizer="nltk", ngram_top_k=None, ngram_min_count=1, dedup="exact", ngram_memory=None):
+    # Disimpan di header file handoff transform; file dengan meta berbeda dianggap stale
+    return {"analysis_version": ANALYSIS_VERSION, "stages": list(stages), "tokenizer": tokenizer,
+            "ngram_top_k": ngram_top_k, "ngram_min_count": ngram_min_count, "dedup": dedup, "ngram_memory": ngram_memory}
+
+def write_freq_handoffs(freqs, meta, directory=""):
+    for name, freq_data in zip(FREQ_FILES, freqs):
+        write_records(freq_path(name, directory), name, freq_data, meta)
+
+def stream_notes(game_reports, notes_file, meta, workers=1, batch_size=200, stages=ALL_STAGES, cache_file=None,
+                 cache_max_entries=None, tokenizer="nltk", dedup="exact", ngram_memory=None, dedup_trace=False):
+    # Analisis note dari iterable (game, reports) dan tulis barisnya per batch ke file
+    # handoff notes_file. Return (totals, jumlah note): hitungan kata/n-gram yang belum
+    # dipangkas, juga dipakai worker mode terdistribusi (distributed.py). Dengan
+    # dedup_trace, totals["dedup_trace"] berisi Deduplicator.trace.
+    totals = new_totals(ngram_memory)
+    note_count = 0
+
+    deduplicator = new_deduplicator(dedup, stages, tokenizer, dedup_trace)
+    totals["dedup_trace"] = deduplicator.trace if deduplicator is not None else None
+    notes_iter = iter_game_notes(game_reports)
+    if deduplicator is not None:
+        notes_iter = deduplicator.tag(notes_iter)
+    cache_conn = open_note_cache(cache_file) if cache_file else None
+    try:
+        with timed("transform_stream", profile=True) as counter, HandoffWriter(notes_file, "notes", meta) as writer:
+            shard_results = iter_analyzed_shards(notes_iter, workers, batch_size, stages, cache_file, tokenizer)
+            for rows in merge_shards(shard_results, totals, cache_conn, deduplicator):
+                writer.write_many(rows)
+                note_count += len(rows)
+                counter["items"] += len(rows)
+        finish_dedup(deduplicator, totals)
+        if cache_conn is not None:
+            evicted = evict_note_cache(cache_conn, cache_max_entries) if cache_max_entries else 0
+            evict_token_cache(cache_conn, TOKEN_CACHE_MAX_ENTRIES)
+            print_cache_stats(totals["cache"], evicted)
+        print_token_cache_stats(totals["token_cache"])
+    finally:
+        if cache_conn is not None:
+            cache_conn.close()
+    return totals, note_count
+
+def transform_stream(game_reports, notes_file=NOTES_FILE, workers=1, batch_size=200, stages=None,
+                     cache_file=None, cache_max_entries=None, tokenizer="nltk",
+                     ngram_top_k=None, ngram_min_count=1, dedup="exact", ngram_memory=None):
+    # Mode streaming: game_reports adalah iterable (game, reports), misalnya dari
+    # extract.iter_extract(). Baris note ditulis per batch ke file handoff dan hanya
+    # Counter frekuensi yang disimpan di memori.
+    print("Starting streaming transformation process...")
+    stages = resolve_stages(stages)
+    meta = handoff_meta(stages, tokenizer, ngram_top_k, ngram_min_count, dedup, ngram_memory)
+    totals, note_count = stream_notes(game_reports, notes_file, meta, workers, batch_size, stages,
+                                      cache_file, cache_max_entries, tokenizer, dedup, ngram_memory)
+
+    freqs = freq_tables(totals["word_freq"], totals["ngrams"], ngram_top_k, ngram_min_count)
+    # Tabel frekuensi ikut disimpan di samping file notes supaya stage load bisa dijalankan ulang
+    write_freq_handoffs(freqs, meta, os.path.dirname(notes_file))
+    print(f"Streamed {note_count} notes to {notes_file}")
+    print_sketch_bounds(totals["ngrams"], ngram_top_k, ngram_min_count)
+    print_stage_timings(totals["timings"])
+    record_stage_timings(totals["timings"])
+    return (notes_file,) + freqs
+
+def iter_notes_file(notes_file=NOTES_FILE):
+    return iter_records(notes_file, "notes")
+
+def transform(games, all_reports, workers=1, stages=None, cache_file="temp_note_cache.db", cache_max_entries=500000,
+              temp_files=True, tokenizer="nltk", ngram_top_k=None, ngram_min_count=1, game_reports=None, dedup="exact",
+              ngram_memory=None):
+    # Dengan cache_file, setiap run menganalisis ulang hanya note baru/berubah.
+    # Tanpa cache (None), temp_notes.jsonl.gz yang masih berlaku dipakai apa adanya.
+    # temp_files=False: file handoff temp_*.jsonl.gz tidak dibaca maupun ditulis
+    print("Starting transformation process with maximum NLTK analysis...")
+    stages = resolve_stages(stages)
+    meta = handoff_meta(stages, tokenizer, ngram_top_k, ngram_min_count, dedup, ngram_memory)
+    notes_file = NOTES_FILE
+    handoff_files = {"notes": notes_file, **FREQ_FILES}
+
+    # Cek apakah data transformasi sudah ada dan dibuat dengan stage/tokenizer yang sama
+    if temp_files and cache_file is None:
+        stale = {path: handoff_status(path, kind, meta, [REPORTS_FILE]) for kind, path in handoff_files.items()}
+        if not any(stale.values()):
+            print("Loading existing transformed data from handoff files...")
+            notes_data = list(iter_notes_file(notes_file))
+            freqs = [list(iter_records(path, kind, meta)) for kind, path in FREQ_FILES.items()]
+            print(f"Loaded {len(notes_data)} notes from {notes_file}")
+            return (notes_data,) + tuple(freqs)
+        path, reason = next((path, reason) for path, reason in stale.items() if reason)
+        if reason != "missing":
+            print(f"Not reusing {path}: {reason}")
+
+    # Jika tidak ada, lakukan transformasi
+    print(f"Analysis stages: {', '.join(stages)} (tokenizer: {tokenizer})")
+    if workers > 1:
+        print(f"Analyzing notes with {workers} worker processes...")
+    timings = Counter()
+    with timed("transform", profile=True) as counter:
+        notes_data, *freqs = run_transform(
+            games, all_reports, workers, stages=stages, timings=timings,
+            cache_file=cache_file, cache_max_entries=cache_max_entries, tokenizer=tokenizer,
+            ngram_top_k=ngram_top_k, ngram_min_count=ngram_min_count, game_reports=game_reports, dedup=dedup,
+            ngram_memory=ngram_memory)
+        counter["items"] = len(notes_data)
+    print_stage_timings(timings)
+    record_stage_timings(timings)
+
+    # Simpan ke file handoff
+    if temp_files:
+        with timed("transform.handoff_write", items=len(notes_data)):
+            write_records(notes_file, "notes", notes_data, meta)
+            write_freq_handoffs(freqs, meta)
+        print(f"Transformed data saved to {', '.join(handoff_files.values())}")
     print("Transformation completed!")
-    return notes_data, word_freq_data, bigram_freq_data, trigram_freq_data
\ No newline at end of file
+    return (notes_data,) + tuple(freqs)
@@ -0,0 +1,232 @@
+# visualize.py
+# Stage visualisasi: setiap chart dirender terpisah (paralel di process pool, backend Agg).
+# matplotlib/seaborn/wordcloud baru di-import saat chart pertama dirender.
+# Render ulang dari output yang sudah tersimpan: python visualize.py output_<timestamp>
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from profiling import timed, record
+
+PERFORMANCE_WORDS = ["fps", "performance", "smooth", "lag", "stutter", "slow", "fast", "run"]
+# Dicocokkan per token utuh (NgramCounts.lookup), jadi bentuk lain ditulis terpisah
+TECHNICAL_PHRASES = ["not working", "doesn work", "cant run", "black screen", "black screens",
+                     "crash game", "game crash", "game crashes", "game crashed", "game crashing",
+                     "no sound", "proton ge"]
+POS_COLUMNS = ["noun_count", "verb_count", "adjective_count", "adverb_count"]
+
+_plotting = {}
+
+def plotting():
+    if not _plotting:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        sns.set_style("whitegrid")
+        plt.rcParams['figure.figsize'] = (12, 8)
+        _plotting["plt"] = plt
+        _plotting["sns"] = sns
+    return _plotting["plt"], _plotting["sns"]
+
+# 1. Bar Plot: Distribusi Kategori Masalah
+def plot_issue_categories(topic_counts, path):
+    plt, sns = plotting()
+    plt.figure()
+    sns.barplot(x=[count for category, count in topic_counts], y=[category for category, count in topic_counts],
+                palette="RdYlGn_r")
+    plt.title("Distribusi Kategori Masalah di ProtonDB", fontsize=14)
+    plt.xlabel("Jumlah Laporan", fontsize=12)
+    plt.ylabel("Kategori Masalah", fontsize=12)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 2. Pie Chart: Sentimen Pengguna terhadap Proton
+def plot_proton_sentiment(sentiment_counts, path):
+    plt, sns = plotting()
+    plt.figure()
+    colors = {"positive": "#2ecc71", "neutral": "#f1c40f", "negative": "#e74c3c"}
+    plt.pie([count for sentiment, count in sentiment_counts], labels=[sentiment for sentiment, count in sentiment_counts],
+            autopct="%1.1f%%",
+            colors=[colors[s] for s, count in sentiment_counts])
+    plt.title("Sentimen Pengguna terhadap Kompatibilitas Proton", fontsize=14)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 3. Bar Plot: Kata-kata Terkait Performa
+def plot_performance_terms(perf_freq, path):
+    plt, sns = plotting()
+    plt.figure()
+    sns.barplot(x=list(perf_freq.values()), y=list(perf_freq.keys()), palette="YlOrRd")
+    plt.title("Frekuensi Kata Terkait Performa Game", fontsize=14)
+    plt.xlabel("Frekuensi", fontsize=12)
+    plt.ylabel("Kata", fontsize=12)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 4. Grouped Bar Plot: Distribusi POS Tags berdasarkan Sentimen
+def plot_pos_by_sentiment(pos_by_sentiment, path):
+    import pandas as pd
+    plt, sns = plotting()
+    plt.figure()
+    pd.DataFrame.from_dict(pos_by_sentiment, orient="index").plot(kind="bar", width=0.8)
+    plt.title("Penggunaan Kata berdasarkan Sentimen Review", fontsize=14)
+    plt.xlabel("Sentimen", fontsize=12)
+    plt.ylabel("Rata-rata Jumlah Kata", fontsize=12)
+    plt.legend(title="Jenis Kata")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 5. Word Cloud berdasarkan Sentimen
+def plot_wordcloud(data, path):
+    from wordcloud import WordCloud
+    plt, sns = plotting()
+    sentiment, frequencies = data
+    plt.figure(figsize=(10, 6))
+    color = "YlGn" if sentiment == "positive" else "Reds" if sentiment == "negative" else "Greys"
+    wordcloud = WordCloud(width=800, height=400,
+                        background_color="white",
+                        colormap=color).generate_from_frequencies(frequencies)
+    plt.imshow(wordcloud, interpolation="bilinear")
+    plt.axis("off")
+    plt.title(f"Kata-kata Umum dalam Review {sentiment.title()}", fontsize=14)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 6. Box Plot: Panjang Review berdasarkan Kategori Masalah
+def plot_review_length_by_category(lengths, path):
+    plt, sns = plotting()
+    plt.figure()
+    sns.boxplot(x="topic_category", y="word_count", data=lengths, palette="Set3")
+    plt.xticks(rotation=45, ha="right")
+    plt.title("Panjang Review berdasarkan Kategori Masalah", fontsize=14)
+    plt.xlabel("Kategori Masalah", fontsize=12)
+    plt.ylabel("Jumlah Kata", fontsize=12)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 7. Scatter Plot: Hubungan Sentimen dengan Panjang Review
+def plot_sentiment_vs_length(points, path):
+    plt, sns = plotting()
+    plt.figure()
+    sns.scatterplot(data=points, x="word_count", y="compound_score",
+                    hue="topic_category", alpha=0.6)
+    plt.axhline(y=0, color='r', linestyle='--', alpha=0.3)
+    plt.title("Hubungan Panjang Review dengan Sentimen", fontsize=14)
+    plt.xlabel("Jumlah Kata", fontsize=12)
+    plt.ylabel("Skor Sentimen", fontsize=12)
+    plt.legend(title="Kategori Masalah", bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+# 8. Bar Plot: Bigram Terkait Masalah Teknis
+def plot_technical_issues(technical_bigrams, path):
+    plt, sns = plotting()
+    plt.figure()
+    sns.barplot(x=[b["frequency"] for b in technical_bigrams],
+               y=[b["bigram"] for b in technical_bigrams],
+               palette="Reds_r")
+    plt.title("Masalah Teknis yang Sering Dilaporkan", fontsize=14)
+    plt.xlabel("Frekuensi", fontsize=12)
+    plt.ylabel("Masalah", fontsize=12)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+CHARTS = {
+    "issue_categories": plot_issue_categories,
+    "proton_sentiment": plot_proton_sentiment,
+    "performance_terms": plot_performance_terms,
+    "pos_by_sentiment": plot_pos_by_sentiment,
+    "wordcloud": plot_wordcloud,
+    "review_length_by_category": plot_review_length_by_category,
+    "sentiment_vs_length": plot_sentiment_vs_length,
+    "technical_issues": plot_technical_issues
+}
+
+def technical_bigrams(ngrams, limit=10):
+    # Dihitung di transform dari hitungan n-gram penuh (belum dipangkas top-k/min-count)
+    # lewat indeks frasa NgramCounts.lookup, bukan scan regex atas tabel bigram
+    return [{"bigram": bigram, "frequency": freq} for bigram, freq in ngrams.lookup(TECHNICAL_PHRASES, 2, top_k=limit)]
+
+def prepare_charts(summary):
+    # Input setiap chart diambil dari NotesSummary (dihitung sekali di proses utama);
+    # worker hanya menerima data yang dibutuhkan chart-nya. Return list (chart, nama file, data).
+    has_sentiment = summary.has("sentiment")
+    has_topics = summary.has("topic_category")
+    charts = []
+    if has_topics:
+        charts.append(("issue_categories", "issue_categories", summary.topic_distribution()))
+    if has_sentiment:
+        charts.append(("proton_sentiment", "proton_sentiment", summary.sentiment_distribution()))
+    if summary.perf_freq:
+        charts.append(("performance_terms", "performance_terms", summary.perf_freq))
+    if has_sentiment and summary.has(*POS_COLUMNS):
+        charts.append(("pos_by_sentiment", "pos_by_sentiment", summary.pos_by_sentiment()))
+    if has_sentiment:
+        for sentiment in ["positive", "negative", "neutral"]:
+            frequencies = summary.wordcloud_frequencies(sentiment)
+            if frequencies:
+                charts.append(("wordcloud", f"wordcloud_{sentiment}", (sentiment, frequencies)))
+    if has_topics:
+        charts.append(("review_length_by_category", "review_length_by_category",
+                       summary.length_points("topic_category", "word_count")))
+    if summary.has("compound_score") and has_topics:
+        charts.append(("sentiment_vs_length", "sentiment_vs_length",
+                       summary.length_points("word_count", "compound_score", "topic_category")))
+    if summary.technical:
+        charts.append(("technical_issues", "technical_issues", summary.technical))
+    return charts
+
+def render_chart(chart, data, path):
+    start = time.perf_counter()
+    CHARTS[chart](data, path)
+    return time.perf_counter() - start
+
+def visualize(summary, output_dir, timestamp, workers=None):
+    vis_dir = f"{output_dir}/visualizations"
+    os.makedirs(vis_dir, exist_ok=True)
+    with timed("load.visualize") as counter:
+        charts = prepare_charts(summary)
+        counter["items"] = len(charts)
+        workers = min(workers or os.cpu_count() or 1, len(charts))
+        paths = [f"{vis_dir}/{name}_{timestamp}.png" for chart, name, data in charts]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                durations = list(executor.map(render_chart, *zip(*[(chart, data, path) for (chart, name, data), path in zip(charts, paths)])))
+        else:
+            durations = [render_chart(chart, data, path) for (chart, name, data), path in zip(charts, paths)]
+    for (chart, name, data), seconds in zip(charts, durations):
+        record(f"load.plot.{name}", wall=seconds)
+    print("All visualizations saved in", vis_dir)
+    return vis_dir
+
+def visualize_dataset(output_dir, workers=None):
+    # Render chart dari output load yang sudah tersimpan (Arrow/Parquet di-memory-map)
+    from load import find_dataset, read_table
+    from summary import NotesSummary
+    dataset = find_dataset(output_dir)
+    if "notes" not in dataset:
+        raise FileNotFoundError(f"No notes table found in {output_dir}")
+    match = re.search(r"protondb_notes_(.+)\.\w+$", dataset["notes"])
+    timestamp = match.group(1)
+    notes_df = read_table(dataset["notes"])
+    word_freq_data = read_table(dataset["word_freq"]).to_dict("records") if "word_freq" in dataset else []
+    technical_freq_data = read_table(dataset["technical_freq"]).to_dict("records") if "technical_freq" in dataset else []
+    summary = NotesSummary.from_frame(notes_df, word_freq_data, technical_freq_data)
+    return visualize(summary, output_dir, timestamp, workers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render ProtonDB charts from a saved output directory")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="Chart rendering processes (default: CPU count)")
+    args = parser.parse_args()
+    visualize_dataset(args.output_dir, args.workers)